@@ -0,0 +1,6 @@
+from app.services.admission_service import AdmissionService
+from app.tasks.celery_client import get_admission
+
+
+def get_admission_service() -> AdmissionService:
+    return get_admission()
@@ -0,0 +1,12 @@
+from fastapi import Depends, Request
+
+from app.api.dependencies.tenant_id_dependency import get_tenant_id
+
+
+def get_client_id(
+    request: Request, tenant_id: str | None = Depends(get_tenant_id)
+) -> str:
+    # Rate limits apply per tenant, or per address for anonymous uploads
+    if tenant_id is not None:
+        return f"tenant:{tenant_id}"
+    return f"address:{request.client.host if request.client else 'unknown'}"
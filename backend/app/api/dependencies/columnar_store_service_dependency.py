@@ -0,0 +1,5 @@
+from app.services.columnar_store_service import ColumnarStoreService
+
+
+def get_columnar_store_service() -> ColumnarStoreService:
+    return ColumnarStoreService()
@@ -1,8 +1,9 @@
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import create_db_session
+from app.db.session import create_async_db_session, create_db_session
 
 
 def get_db_session() -> Iterator[Session]:
@@ -11,3 +12,11 @@ def get_db_session() -> Iterator[Session]:
         yield session
     finally:
         session.close()
+
+
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    session = create_async_db_session()
+    try:
+        yield session
+    finally:
+        await session.close()
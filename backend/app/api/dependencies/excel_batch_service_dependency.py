@@ -0,0 +1,13 @@
+from fastapi import Depends
+
+from app.api.dependencies.upload_staging_service_dependency import (
+    get_upload_staging_service,
+)
+from app.services.excel_batch_service import ExcelBatchService
+from app.services.upload_staging_service import UploadStagingService
+
+
+def get_excel_batch_service(
+    staging_service: UploadStagingService = Depends(get_upload_staging_service),
+) -> ExcelBatchService:
+    return ExcelBatchService(staging_service=staging_service)
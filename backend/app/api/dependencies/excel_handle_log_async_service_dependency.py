@@ -0,0 +1,15 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies.db_session_dependency import get_async_db_session
+from app.repositories.excel_handle_logs_async_repo import AsyncExcelHandleLogRepo
+from app.services.excel_handle_log_async_service import AsyncExcelHandleLogService
+
+
+def get_async_excel_handle_log_service(
+    session: AsyncSession = Depends(get_async_db_session),
+) -> AsyncExcelHandleLogService:
+    excel_handle_log_service = AsyncExcelHandleLogService(
+        repo=AsyncExcelHandleLogRepo(session=session)
+    )
+    return excel_handle_log_service
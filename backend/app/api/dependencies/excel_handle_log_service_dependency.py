@@ -0,0 +1,27 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.api.dependencies.db_session_dependency import get_db_session
+from app.api.dependencies.excel_result_cache_service_dependency import (
+    get_excel_result_cache_service,
+)
+from app.api.dependencies.processed_file_index_service_dependency import (
+    get_processed_file_index_service,
+)
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.services.excel_handle_log_service import ExcelHandleLogService
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+
+
+def get_excel_handle_log_service(
+    session: Session = Depends(get_db_session),
+    result_cache: ExcelResultCacheService = Depends(get_excel_result_cache_service),
+    file_index: ProcessedFileIndexService = Depends(get_processed_file_index_service),
+) -> ExcelHandleLogService:
+    excel_handle_log_service = ExcelHandleLogService(
+        repo=ExcelHandleLogRepo(session=session),
+        result_cache=result_cache,
+        file_index=file_index,
+    )
+    return excel_handle_log_service
@@ -0,0 +1,23 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.api.dependencies.db_session_dependency import get_db_session
+from app.api.dependencies.processed_file_index_service_dependency import (
+    get_processed_file_index_service,
+)
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.repositories.excel_result_cache_repo import ExcelResultCacheRepo
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+
+
+def get_excel_result_cache_service(
+    session: Session = Depends(get_db_session),
+    file_index: ProcessedFileIndexService = Depends(get_processed_file_index_service),
+) -> ExcelResultCacheService:
+    excel_result_cache_service = ExcelResultCacheService(
+        repo=ExcelResultCacheRepo(session=session),
+        log_repo=ExcelHandleLogRepo(session=session),
+        file_index=file_index,
+    )
+    return excel_result_cache_service
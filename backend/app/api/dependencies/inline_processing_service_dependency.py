@@ -0,0 +1,5 @@
+from app.services.inline_processing_service import InlineProcessingService
+
+
+def get_inline_processing_service() -> InlineProcessingService:
+    return InlineProcessingService()
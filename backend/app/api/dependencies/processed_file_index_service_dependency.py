@@ -0,0 +1,6 @@
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.tasks.celery_client import get_file_index
+
+
+def get_processed_file_index_service() -> ProcessedFileIndexService:
+    return get_file_index()
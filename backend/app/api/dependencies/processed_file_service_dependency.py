@@ -0,0 +1,13 @@
+from fastapi import Depends
+
+from app.api.dependencies.processed_file_index_service_dependency import (
+    get_processed_file_index_service,
+)
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.processed_file_service import ProcessedFileService
+
+
+def get_processed_file_service(
+    file_index: ProcessedFileIndexService = Depends(get_processed_file_index_service),
+) -> ProcessedFileService:
+    return ProcessedFileService(file_index=file_index)
@@ -0,0 +1,5 @@
+from app.services.series_service import SeriesService
+
+
+def get_series_service() -> SeriesService:
+    return SeriesService()
@@ -0,0 +1,14 @@
+from functools import cache
+
+from redis.asyncio import Redis
+
+from app.services.task_notification_service import TaskNotificationService
+from app.tasks.celery_client import celery_app, redis_url
+
+
+@cache
+def get_task_notification_service() -> TaskNotificationService:
+    # One subscription per API process, shared by every waiting request
+    return TaskNotificationService(
+        redis=Redis.from_url(redis_url), backend=celery_app.backend
+    )
@@ -0,0 +1,13 @@
+from fastapi import Depends
+
+from app.api.dependencies.processed_file_index_service_dependency import (
+    get_processed_file_index_service,
+)
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.task_profiling_service import TaskProfilingService
+
+
+def get_task_profiling_service(
+    file_index: ProcessedFileIndexService = Depends(get_processed_file_index_service),
+) -> TaskProfilingService:
+    return TaskProfilingService(file_index=file_index)
@@ -0,0 +1,6 @@
+from app.services.task_routing_service import TaskRoutingService
+from app.tasks.celery_client import get_task_routing
+
+
+def get_task_routing_service() -> TaskRoutingService:
+    return get_task_routing()
@@ -0,0 +1,5 @@
+from fastapi import Header
+
+
+def get_tenant_id(x_tenant_id: str | None = Header(default=None)) -> str | None:
+    return x_tenant_id
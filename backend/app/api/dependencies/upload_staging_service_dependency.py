@@ -0,0 +1,5 @@
+from app.services.upload_staging_service import UploadStagingService
+
+
+def get_upload_staging_service() -> UploadStagingService:
+    return UploadStagingService()
@@ -1,19 +1,78 @@
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 
+from fastapi import Depends, FastAPI, Request, status
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.api.dependencies.admission_service_dependency import get_admission_service
+from app.api.dependencies.task_notification_service_dependency import (
+    get_task_notification_service,
+)
 from app.api.routers import excel_handle_logs_router, excel_handle_tasks_router
-from app.db.setup import db_setup
+from app.db.setup import async_db_setup, db_setup
+from app.exceptions.invalid_archive_exception import InvalidArchiveException
+from app.exceptions.invalid_cursor_exception import InvalidCursorException
 from app.exceptions.not_found_exception import NotFoundException
+from app.exceptions.payload_too_large_exception import PayloadTooLargeException
+from app.exceptions.range_not_satisfiable_exception import (
+    RangeNotSatisfiableException,
+)
+from app.exceptions.too_many_requests_exception import TooManyRequestsException
 from app.exceptions.uuid_exception import UUIDException
+from app.schemas.health_schema import HealthSchema
+from app.services.admission_service import AdmissionService
+from app.services.excel_metrics_service import ExcelMetricsService
+from app.services.inline_processing_service import shutdown_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines are created once the process starts serving, so importing the
+    # app stays cheap and connects to nothing
+    db_setup()
+    async_db_setup()
+    yield
+    # Drops the shared task notification subscription of this process
+    await get_task_notification_service().close()
+    # Lets the uploads being processed inline finish
+    shutdown_executor()
 
-db_setup()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(excel_handle_logs_router.router)
 app.include_router(excel_handle_tasks_router.router)
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus scrape of the processing histograms recorded by this process,
+    or by every process sharing PROMETHEUS_MULTIPROC_DIR with it.
+    """
+    content, media_type = ExcelMetricsService.render()
+    # Passed as is, Starlette would append a second charset to text/plain
+    return Response(content=content, headers={"Content-Type": media_type})
+
+
+@app.get("/health", response_model=HealthSchema)
+async def get_health(admission: AdmissionService = Depends(get_admission_service)):
+    """
+    Queue pressure as seen by the admission control of the uploads: the depth of the
+    queues, the bytes staged for processing, how fast the workers drain them and
+    whether uploads are accepted now.
+
+    Args:
+        admission (AdmissionService): The service admitting uploads, injected through
+                                      dependency injection.
+
+    Returns:
+        dict: The 'status', 'ok' or 'overloaded', the current pressure and its limits.
+    """
+    pressure = await run_in_threadpool(admission.get_pressure)
+    return {"status": "ok" if pressure["accepting"] else "overloaded", **pressure}
+
+
 @app.exception_handler(NotFoundException)
 async def not_found_exception_handler(request: Request, exc: NotFoundException):
     return JSONResponse(
@@ -28,3 +87,55 @@ async def uuid_exception_handler(request: Request, exc: UUIDException):
         status_code=status.HTTP_400_BAD_REQUEST,
         content={"message": exc.message},
     )
+
+
+@app.exception_handler(TooManyRequestsException)
+async def too_many_requests_exception_handler(
+    request: Request, exc: TooManyRequestsException
+):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"message": exc.message},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(PayloadTooLargeException)
+async def payload_too_large_exception_handler(
+    request: Request, exc: PayloadTooLargeException
+):
+    return JSONResponse(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        content={"message": exc.message},
+    )
+
+
+@app.exception_handler(InvalidArchiveException)
+async def invalid_archive_exception_handler(
+    request: Request, exc: InvalidArchiveException
+):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"message": exc.message},
+    )
+
+
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor_exception_handler(
+    request: Request, exc: InvalidCursorException
+):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"message": exc.message},
+    )
+
+
+@app.exception_handler(RangeNotSatisfiableException)
+async def range_not_satisfiable_exception_handler(
+    request: Request, exc: RangeNotSatisfiableException
+):
+    return JSONResponse(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        content={"message": exc.message},
+        headers={"Content-Range": f"bytes */{exc.size}"},
+    )
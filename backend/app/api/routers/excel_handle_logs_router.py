@@ -1,10 +1,30 @@
-from fastapi import APIRouter, status, Depends
+from datetime import datetime
 
-from app.api.dependencies.excel_handle_service_dependency import (
-    get_excel_handling_service,
+from fastapi import APIRouter, status, Depends, Query
+from starlette.responses import FileResponse
+
+from app.api.dependencies.excel_handle_log_async_service_dependency import (
+    get_async_excel_handle_log_service,
+)
+from app.api.dependencies.excel_handle_log_service_dependency import (
+    get_excel_handle_log_service,
+)
+from app.api.dependencies.task_profiling_service_dependency import (
+    get_task_profiling_service,
+)
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.enum.profile_format import ProfileFormat
+from app.schemas.excel_handle_logs_schema import (
+    ExcelHandleLogPageSchema,
+    ExcelHandleLogSchema,
 )
-from app.schemas.excel_handle_logs_schema import ExcelHandleLogSchema
-from app.services.excel_handle_service import ExcelHandleService
+from app.services.excel_handle_log_async_service import AsyncExcelHandleLogService
+from app.schemas.task_profile_schema import TaskProfileSchema
+from app.services.excel_handle_log_service import ExcelHandleLogService
+from app.services.task_profiling_service import TaskProfilingService
+from app.utils.excel_handle_log_filters_dataclass import ExcelHandleLogFilters
+from app.utils.validate_uuid_format import validate_uuid_format
 
 router = APIRouter(
     prefix="/excel-logs",
@@ -19,41 +39,125 @@ router = APIRouter(
 )
 async def get_log(
     task_id: str,
-    service: ExcelHandleService = Depends(get_excel_handling_service),
+    service: AsyncExcelHandleLogService = Depends(get_async_excel_handle_log_service),
 ):
     """
     Retrieves the processing log for an Excel file handling task based on the given task ID.
 
     Parameters:
         task_id (str): The unique identifier of the background task for which the logs are requested.
-        service (ExcelHandleService): The service responsible for handling Excel file
-                                      operations, injected through dependency injection.
+        service (AsyncExcelHandleLogService): The service reading the processing logs without
+                                              blocking the event loop, injected through
+                                              dependency injection.
 
     Returns:
         ExcelHandleLogSchema: A Pydantic model containing the detailed log of the specified task.
     """
 
-    excel_log = service.get_log(uuid=task_id)
+    excel_log = await service.get_log(uuid=task_id)
     return excel_log
 
 
+@router.get(
+    path="/{task_id}/profile",
+    response_model=TaskProfileSchema,
+    status_code=status.HTTP_200_OK,
+)
+def get_profile(
+    task_id: str,
+    format: ProfileFormat = ProfileFormat.JSON,
+    service: TaskProfilingService = Depends(get_task_profiling_service),
+):
+    """
+    Retrieves the profile captured for an Excel file handling task that was uploaded with
+    'profile=true' or sampled for profiling.
+
+    Parameters:
+        task_id (str): The unique identifier of the background task whose profile is requested.
+        format (ProfileFormat): 'json' for the slowest functions and the largest allocation sites,
+                                'pstats' for the raw cProfile dump, readable with pstats or snakeviz.
+        service (TaskProfilingService): The service reading the saved profiles, injected through
+                                        dependency injection.
+
+    Returns:
+        TaskProfileSchema: The summary of the profile of the specified task.
+        FileResponse: The pstats dump of the profile of the specified task.
+    """
+    # Declared sync, the profile files are read in the threadpool
+    task_id = str(validate_uuid_format(string=task_id))
+    if format is ProfileFormat.PSTATS:
+        return FileResponse(
+            path=service.get_stats_path(task_id=task_id),
+            media_type="application/octet-stream",
+            filename=f"{task_id}.pstats",
+        )
+    return service.get_summary(task_id=task_id)
+
+
 @router.get(
     path="",
-    response_model=list[ExcelHandleLogSchema],
+    response_model=ExcelHandleLogPageSchema,
     status_code=status.HTTP_200_OK,
 )
 async def get_logs(
-    service: ExcelHandleService = Depends(get_excel_handling_service),
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+    status: ExcelHandleStatus | None = None,
+    error_type: ExcelHandleError | None = None,
+    filename_prefix: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    service: AsyncExcelHandleLogService = Depends(get_async_excel_handle_log_service),
 ):
     """
-    Retrieves all the processing logs for an Excel file handling task.
+    Retrieves one page of the processing logs, newest first.
 
     Parameters:
-        service (ExcelHandleService): The service responsible for handling Excel file
-                                      operations, injected through dependency injection.
+        limit (int | None): The maximum number of logs on the page, capped by the configuration.
+        cursor (str | None): The 'next_cursor' of the previous page, omitted for the first page.
+        status (ExcelHandleStatus | None): Only logs with this status.
+        error_type (ExcelHandleError | None): Only logs with this error type.
+        filename_prefix (str | None): Only logs of files whose name starts with this prefix.
+        created_from (datetime | None): Only logs created at or after this date.
+        created_to (datetime | None): Only logs created before this date.
+        service (AsyncExcelHandleLogService): The service reading the processing logs without
+                                              blocking the event loop, injected through
+                                              dependency injection.
 
     Returns:
-        list[ExcelHandleLogSchema]: A list of Pydantic models containing the detailed log of the specified task.
+        ExcelHandleLogPageSchema: A Pydantic model containing the logs of the page and the
+                                  cursor of the next page.
     """
-    excel_logs = service.get_logs()
+    excel_logs = await service.get_logs(
+        limit=limit,
+        cursor=cursor,
+        filters=ExcelHandleLogFilters(
+            status=status,
+            error_type=error_type,
+            filename_prefix=filename_prefix,
+            created_from=created_from,
+            created_to=created_to,
+        ),
+    )
     return excel_logs
+
+
+@router.delete(
+    path="/{task_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def delete_log(
+    task_id: str,
+    service: ExcelHandleLogService = Depends(get_excel_handle_log_service),
+):
+    """
+    Deletes the processing log and the processed file of an Excel file handling task.
+    Results shared with identical uploads stay available to the other tasks.
+
+    Parameters:
+        task_id (str): The unique identifier of the background task whose log is deleted.
+        service (ExcelHandleLogService): The service deleting the processing logs and their
+                                         files, injected through dependency injection.
+    """
+    # Declared sync, so the sync session and the file removal run in the threadpool
+    service.delete_log(uuid=task_id)
@@ -1,19 +1,104 @@
+import asyncio
+import json
 import os
-from typing import Optional
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from celery.result import AsyncResult  # type: ignore
-from fastapi import APIRouter, status, UploadFile, Depends
-from starlette.responses import FileResponse
+from celery import Signature, chord, group  # type: ignore
+from celery.result import AsyncResult, GroupResult  # type: ignore
+from fastapi import (
+    APIRouter,
+    status,
+    UploadFile,
+    Depends,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, StreamingResponse
 
+from app.api.dependencies.admission_service_dependency import get_admission_service
+from app.api.dependencies.client_id_dependency import get_client_id
+from app.api.dependencies.columnar_store_service_dependency import (
+    get_columnar_store_service,
+)
+from app.api.dependencies.excel_batch_service_dependency import (
+    get_excel_batch_service,
+)
+from app.api.dependencies.excel_handle_log_async_service_dependency import (
+    get_async_excel_handle_log_service,
+)
+from app.api.dependencies.excel_result_cache_service_dependency import (
+    get_excel_result_cache_service,
+)
+from app.api.dependencies.inline_processing_service_dependency import (
+    get_inline_processing_service,
+)
+from app.api.dependencies.processed_file_index_service_dependency import (
+    get_processed_file_index_service,
+)
+from app.api.dependencies.processed_file_service_dependency import (
+    get_processed_file_service,
+)
+from app.api.dependencies.series_service_dependency import get_series_service
 from app.api.dependencies.task_id_depenency import get_task_id
+from app.api.dependencies.task_notification_service_dependency import (
+    get_task_notification_service,
+)
+from app.api.dependencies.task_profiling_service_dependency import (
+    get_task_profiling_service,
+)
+from app.api.dependencies.task_routing_service_dependency import (
+    get_task_routing_service,
+)
+from app.api.dependencies.tenant_id_dependency import get_tenant_id
+from app.api.dependencies.upload_staging_service_dependency import (
+    get_upload_staging_service,
+)
 from app.config import AppConfig, get_config
+from app.enum.download_format import DownloadFormat
+from app.enum.series_aggregate import SeriesAggregate
+from app.enum.series_frequency import SeriesFrequency
+from app.exceptions.not_found_exception import NotFoundException
+from app.exceptions.payload_too_large_exception import PayloadTooLargeException
 from app.schemas.celery_task_schema import (
+    CeleryBatchNoArchiveSchema,
+    CeleryBatchSchema,
+    CeleryBatchStatusSchema,
+    CeleryQueueStatsSchema,
     CeleryTaskSchema,
     CeleryTaskNoExcelSchema,
+    CeleryTaskStatusesRequestSchema,
+    CeleryTaskStatusSchema,
+)
+from app.schemas.series_schema import SeriesSchema
+from app.services.admission_service import AdmissionService
+from app.services.columnar_store_service import ColumnarStoreService
+from app.services.excel_batch_service import ExcelBatchService
+from app.services.excel_engines import get_writer
+from app.services.excel_handle_log_async_service import AsyncExcelHandleLogService
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.inline_processing_service import InlineProcessingService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.processed_file_service import ProcessedFileService
+from app.services.series_service import SeriesService
+from app.services.task_notification_service import TaskNotificationService
+from app.services.task_profiling_service import TaskProfilingService
+from app.services.task_routing_service import TaskRoutingService
+from app.services.upload_staging_service import UploadStagingService
+from app.utils.staged_upload_dataclass import StagedUpload
+from app.utils.task_route_dataclass import TaskRoute
+from app.utils.validate_uuid_format import validate_uuid_format
+from app.tasks.celery_client import (
+    APPEND_EXCEL_FILE_TASK,
+    BUILD_EXCEL_BATCH_ARCHIVE_TASK,
+    PROCESS_EXCEL_FILE_TASK,
+    PROCESS_LARGE_EXCEL_FILE_TASK,
+    celery_app,
 )
-from app.tasks.celery_app import celery_app
-
-from app.tasks.celery_app import process_excel_file_task
 
 router = APIRouter(
     prefix="/excel-task",
@@ -23,89 +108,631 @@ router = APIRouter(
 
 @router.post(
     path="",
-    response_model=CeleryTaskSchema,
+    response_model=CeleryTaskStatusSchema,
     status_code=status.HTTP_202_ACCEPTED,
 )
 async def upload_file_to_process(
     upload_file: UploadFile,
+    response: Response,
+    profile: bool = False,
     task_id: str = Depends(get_task_id),
+    tenant_id: str | None = Depends(get_tenant_id),
+    client_id: str = Depends(get_client_id),
+    admission: AdmissionService = Depends(get_admission_service),
+    staging_service: UploadStagingService = Depends(get_upload_staging_service),
+    result_cache: ExcelResultCacheService = Depends(get_excel_result_cache_service),
+    routing: TaskRoutingService = Depends(get_task_routing_service),
+    profiling: TaskProfilingService = Depends(get_task_profiling_service),
+    inline: InlineProcessingService = Depends(get_inline_processing_service),
 ):
     """
     Handles the upload of an Excel file and initiates its processing as a background task.
+    Large uploads are queued apart from small ones, at the priority of the tenant. Small
+    uploads are processed right away and answered with 200 and their final status. While
+    the queues are over their limits, or the client sends too many uploads, the upload is
+    refused with 429 and a Retry-After header.
 
     Args:
         upload_file (UploadFile): The Excel file to be processed.
+        response (Response): The response, whose status is 200 for uploads processed inline.
+        profile (bool): Process the file under cProfile and tracemalloc, see GET
+                        /excel-logs/{task_id}/profile. A cached result is not reused then.
         task_id (str): The unique identifier for the task, obtained through dependency injection.
+        tenant_id (str | None): The tenant of the upload, from the 'X-Tenant-ID' header.
+        client_id (str): The client the rate limit applies to, the tenant or else the address.
+        admission (AdmissionService): The service admitting uploads under the queue pressure,
+                                      injected through dependency injection.
+        staging_service (UploadStagingService): The service that spools uploads to the shared
+                                                staging folder, injected through dependency injection.
+        result_cache (ExcelResultCacheService): The service that reuses results of identical uploads,
+                                                injected through dependency injection.
+        routing (TaskRoutingService): The service that picks the queue and priority of the task,
+                                      injected through dependency injection.
+        profiling (TaskProfilingService): The service that samples tasks for profiling, injected
+                                          through dependency injection.
+        inline (InlineProcessingService): The service processing small uploads in the API process,
+                                          injected through dependency injection.
 
     Returns:
-        dict: A dictionary containing the 'task_id' and the current 'status' of the background task.
+        dict: A dictionary containing the 'task_id' and the current 'status' of the background task,
+              and the 'log_status' and 'error_type' of its log once processed.
     """
-    # Read the content of the file
-    # Content is loaded entirely into memory.
-    # If dealing with very large files, this might not be the most efficient solution...
-    file_content = await upload_file.read()
+    # Refused before anything is staged, the multipart part reports its size
+    await run_in_threadpool(
+        admission.admit, client_id=client_id, size=upload_file.size or 0
+    )
 
-    # Dispatch the background task that processes uploaded file
-    task = process_excel_file_task.apply_async(
-        args=[
-            task_id,
-            upload_file.filename,
-            upload_file.content_type,
-            file_content,
-        ],
+    # Stream the file to the shared staging folder in chunks,
+    # so only its key travels through the broker (claim check)
+    staged_upload = await staging_service.stage(
+        upload_file=upload_file, task_id=task_id
+    )
+
+    # An identical upload was already processed: link its result to this task,
+    # unless the upload asks for a profile of its processing
+    cache_key = result_cache.get_cache_key(
+        sha256=staged_upload.sha256, content_type=upload_file.content_type or ""
+    )
+    if not profile and await _link_cached_result(
+        result_cache=result_cache,
+        staging_service=staging_service,
+        cache_key=cache_key,
         task_id=task_id,
+        filename=upload_file.filename or "",
+        staged_upload=staged_upload,
+    ):
+        return {
+            "task_id": task_id,
+            "status": "SUCCESS",
+            "log_status": None,
+            "error_type": None,
+        }
+
+    # Small uploads skip the broker, unless every inline thread is busy.
+    # Profiled tasks always run on a worker, the profilers are process wide
+    should_profile = profiling.should_profile(requested=profile)
+    if not should_profile and await run_in_threadpool(
+        inline.should_inline,
+        content_type=upload_file.content_type or "",
+        path=staging_service.get_path(key=staged_upload.key),
+        size=staged_upload.size,
+    ):
+        future = inline.submit(
+            task_id=task_id,
+            filename=upload_file.filename or "",
+            content_type=upload_file.content_type or "",
+            staged_upload=staged_upload,
+            cache_key=cache_key,
+        )
+        if future is not None:
+            log = await asyncio.wrap_future(future)
+            await run_in_threadpool(_store_inline_result, task_id=task_id)
+            response.status_code = status.HTTP_200_OK
+            return {
+                "task_id": task_id,
+                "status": "SUCCESS",
+                "log_status": log.status if log is not None else None,
+                "error_type": log.error_type if log is not None else None,
+            }
+
+    # Dispatch the background task that processes uploaded file
+    route = await run_in_threadpool(
+        routing.get_route,
+        content_type=upload_file.content_type or "",
+        path=staging_service.get_path(key=staged_upload.key),
+        size=staged_upload.size,
+        tenant_id=tenant_id,
+    )
+    await run_in_threadpool(
+        admission.track, key=staged_upload.key, size=staged_upload.size
+    )
+    task = await _publish(
+        signature=_get_task_signature(
+            routing=routing,
+            route=route,
+            task_id=task_id,
+            args=[
+                task_id,
+                upload_file.filename,
+                upload_file.content_type,
+                staged_upload.key,
+                staged_upload.size,
+                staged_upload.sha256,
+                cache_key,
+                should_profile,
+            ],
+        ),
+        admission=admission,
+        keys=[staged_upload.key],
     )
     # Create an AsyncResult instance using the task.id
     task_result = AsyncResult(task.id, app=celery_app)
 
+    return {
+        "task_id": task_id,
+        "status": task_result.status,
+        "log_status": None,
+        "error_type": None,
+    }
+
+
+@router.post(
+    path="/{parent_task_id}/append",
+    response_model=CeleryTaskSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def upload_file_to_append(
+    parent_task_id: str,
+    upload_file: UploadFile,
+    task_id: str = Depends(get_task_id),
+    tenant_id: str | None = Depends(get_tenant_id),
+    client_id: str = Depends(get_client_id),
+    admission: AdmissionService = Depends(get_admission_service),
+    columnar_store: ColumnarStoreService = Depends(get_columnar_store_service),
+    staging_service: UploadStagingService = Depends(get_upload_staging_service),
+    routing: TaskRoutingService = Depends(get_task_routing_service),
+):
+    """
+    Handles the upload of an Excel file holding the rows that follow a processed result,
+    and initiates a background task merging them into it. Only the rows after the last
+    known sales value of the parent are recomputed, the new task gets the whole series.
+
+    Args:
+        parent_task_id (str): The unique identifier of the task whose result is appended to.
+        upload_file (UploadFile): The Excel file with the new rows, in the format of an upload.
+        task_id (str): The unique identifier for the new task, obtained through dependency injection.
+        tenant_id (str | None): The tenant of the upload, from the 'X-Tenant-ID' header.
+        client_id (str): The client the rate limit applies to, the tenant or else the address.
+        admission (AdmissionService): The service admitting uploads under the queue pressure,
+                                      injected through dependency injection.
+        columnar_store (ColumnarStoreService): The service holding the columnar copies of results,
+                                               injected through dependency injection.
+        staging_service (UploadStagingService): The service that spools uploads to the shared
+                                                staging folder, injected through dependency injection.
+        routing (TaskRoutingService): The service that picks the queue and priority of the task,
+                                      injected through dependency injection.
+
+    Returns:
+        dict: A dictionary containing the 'task_id' and the current 'status' of the background task.
+    """
+    parent_task_id = str(validate_uuid_format(string=parent_task_id))
+    manifest_path = columnar_store.get_manifest_path(task_id=parent_task_id)
+    if not columnar_store.exists(manifest_path=manifest_path):
+        raise NotFoundException(
+            message=f"No result of the task with uuid={parent_task_id} to append to"
+        )
+
+    await run_in_threadpool(
+        admission.admit, client_id=client_id, size=upload_file.size or 0
+    )
+    staged_upload = await staging_service.stage(
+        upload_file=upload_file, task_id=task_id
+    )
+
+    # The cost of an append follows the size of the delta, it is routed by it
+    route = await run_in_threadpool(
+        routing.get_route,
+        content_type=upload_file.content_type or "",
+        path=staging_service.get_path(key=staged_upload.key),
+        size=staged_upload.size,
+        tenant_id=tenant_id,
+    )
+    await run_in_threadpool(
+        admission.track, key=staged_upload.key, size=staged_upload.size
+    )
+    task = await _publish(
+        signature=celery_app.signature(
+            APPEND_EXCEL_FILE_TASK,
+            args=[
+                task_id,
+                parent_task_id,
+                upload_file.filename,
+                upload_file.content_type,
+                staged_upload.key,
+            ],
+            task_id=task_id,
+            queue=route.queue,
+            priority=route.priority,
+            headers=routing.get_headers(),
+        ),
+        admission=admission,
+        keys=[staged_upload.key],
+    )
+    task_result = AsyncResult(task.id, app=celery_app)
+
     return {"task_id": task_id, "status": task_result.status}
 
 
+@router.post(
+    path="/batch",
+    response_model=CeleryBatchSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def upload_files_to_process(
+    upload_files: list[UploadFile],
+    batch_id: str = Depends(get_task_id),
+    tenant_id: str | None = Depends(get_tenant_id),
+    client_id: str = Depends(get_client_id),
+    admission: AdmissionService = Depends(get_admission_service),
+    batch_service: ExcelBatchService = Depends(get_excel_batch_service),
+    staging_service: UploadStagingService = Depends(get_upload_staging_service),
+    result_cache: ExcelResultCacheService = Depends(get_excel_result_cache_service),
+    routing: TaskRoutingService = Depends(get_task_routing_service),
+    profiling: TaskProfilingService = Depends(get_task_profiling_service),
+):
+    """
+    Handles the upload of several Excel files, or of zip archives of Excel files, and
+    initiates their processing as one group of background tasks.
+
+    Args:
+        upload_files (list[UploadFile]): The Excel files or zip archives to be processed.
+        batch_id (str): The unique identifier for the batch, obtained through dependency injection.
+        tenant_id (str | None): The tenant of the upload, from the 'X-Tenant-ID' header.
+        client_id (str): The client the rate limit applies to, the tenant or else the address.
+        admission (AdmissionService): The service admitting uploads under the queue pressure,
+                                      injected through dependency injection.
+        batch_service (ExcelBatchService): The service that stages batches and builds their
+                                           combined archive, injected through dependency injection.
+        staging_service (UploadStagingService): The service that spools uploads to the shared
+                                                staging folder, injected through dependency injection.
+        result_cache (ExcelResultCacheService): The service that reuses results of identical uploads,
+                                                injected through dependency injection.
+        routing (TaskRoutingService): The service that picks the queue and priority of each task,
+                                      injected through dependency injection.
+        profiling (TaskProfilingService): The service that samples tasks for profiling, injected
+                                          through dependency injection.
+
+    Returns:
+        dict: A dictionary containing the 'batch_id', its 'status' and the 'task_id' and 'status'
+              of every background task in the batch.
+    """
+    # A batch counts as one upload per file against the client's limit
+    await run_in_threadpool(
+        admission.admit,
+        client_id=client_id,
+        size=sum(upload_file.size or 0 for upload_file in upload_files),
+        count=len(upload_files),
+    )
+    items = await batch_service.stage(upload_files=upload_files)
+
+    tasks = []
+    signatures = []
+    tracked_keys = []
+    for item in items:
+        cache_key = result_cache.get_cache_key(
+            sha256=item.staged_upload.sha256, content_type=item.content_type
+        )
+        if await _link_cached_result(
+            result_cache=result_cache,
+            staging_service=staging_service,
+            cache_key=cache_key,
+            task_id=item.task_id,
+            filename=item.filename,
+            staged_upload=item.staged_upload,
+        ):
+            tasks.append({"task_id": item.task_id, "status": "SUCCESS"})
+            continue
+
+        route = await run_in_threadpool(
+            routing.get_route,
+            content_type=item.content_type,
+            path=staging_service.get_path(key=item.staged_upload.key),
+            size=item.staged_upload.size,
+            tenant_id=tenant_id,
+        )
+        await run_in_threadpool(
+            admission.track,
+            key=item.staged_upload.key,
+            size=item.staged_upload.size,
+        )
+        tracked_keys.append(item.staged_upload.key)
+        signatures.append(
+            _get_task_signature(
+                routing=routing,
+                route=route,
+                task_id=item.task_id,
+                args=[
+                    item.task_id,
+                    item.filename,
+                    item.content_type,
+                    item.staged_upload.key,
+                    item.staged_upload.size,
+                    item.staged_upload.sha256,
+                    cache_key,
+                    profiling.should_profile(requested=False),
+                ],
+            )
+        )
+        tasks.append({"task_id": item.task_id, "status": "PENDING"})
+
+    # The saved group lets the batch ID answer for all of its tasks. Saved
+    # first, so a status request right after publishing already finds it
+    task_ids = [task["task_id"] for task in tasks]
+    group_result = GroupResult(
+        batch_id,
+        [AsyncResult(task_id, app=celery_app) for task_id in task_ids],
+        app=celery_app,
+    )
+    await run_in_threadpool(group_result.save)
+
+    # Publish the whole batch as one group, the chord body zips the results
+    archive_task = celery_app.signature(
+        BUILD_EXCEL_BATCH_ARCHIVE_TASK, args=[batch_id, task_ids], immutable=True
+    )
+    try:
+        await _publish(
+            signature=(
+                chord(group(signatures), archive_task) if signatures else archive_task
+            ),
+            admission=admission,
+            keys=tracked_keys,
+        )
+    except Exception:
+        # A batch that was never published has no status to answer with
+        await run_in_threadpool(group_result.delete)
+        raise
+
+    return {"batch_id": batch_id, "status": "PENDING", "tasks": tasks}
+
+
+@router.get(
+    path="/batch/{batch_id}",
+    response_model=CeleryBatchStatusSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def check_batch_status(
+    batch_id: str,
+    batch_service: ExcelBatchService = Depends(get_excel_batch_service),
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+):
+    """
+    Retrieves the aggregate status of a batch of background tasks using its batch ID.
+
+    Args:
+        batch_id (str): The unique identifier of the batch whose status is to be checked.
+        batch_service (ExcelBatchService): The service that stages batches and builds their
+                                           combined archive, injected through dependency injection.
+        notifications (TaskNotificationService): The service reading task states from the result
+                                                 backend, injected through dependency injection.
+
+    Returns:
+        dict: A dictionary containing the 'batch_id', its aggregate 'status', the number of
+              'completed' and 'total' tasks, whether the combined archive is ready and the
+              status of every task in the batch.
+    """
+    group_result = GroupResult.restore(batch_id, app=celery_app)
+    if group_result is None:
+        raise NotFoundException(message=f"Batch with batch_id={batch_id} not found")
+
+    # The states of all tasks of the batch in one MGET
+    task_ids = [task_result.id for task_result in group_result.results]
+    task_statuses = await notifications.get_statuses(task_ids=task_ids)
+    tasks = [
+        {"task_id": task_id, "status": task_status}
+        for task_id, task_status in zip(task_ids, task_statuses)
+    ]
+    completed = sum(task["status"] in ("SUCCESS", "FAILURE") for task in tasks)
+    if all(task["status"] == "SUCCESS" for task in tasks):
+        batch_status = "SUCCESS"
+    elif completed == len(tasks):
+        batch_status = "FAILURE"
+    else:
+        batch_status = "PENDING"
+
+    return {
+        "batch_id": batch_id,
+        "status": batch_status,
+        "tasks": tasks,
+        "completed": completed,
+        "total": len(tasks),
+        "archive_ready": os.path.exists(
+            batch_service.get_archive_path(batch_id=batch_id)
+        ),
+    }
+
+
 @router.get(
+    path="/batch/{batch_id}/download",
+    response_model=Optional[CeleryBatchNoArchiveSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def get_processed_batch(
+    batch_id: str,
+    batch_service: ExcelBatchService = Depends(get_excel_batch_service),
+    file_index: ProcessedFileIndexService = Depends(get_processed_file_index_service),
+):
+    """
+    Endpoint to download the processed files of a batch as one zip archive.
+
+    Args:
+        batch_id (str): The unique identifier of the batch.
+        batch_service (ExcelBatchService): The service that stages batches and builds their
+                                           combined archive, injected through dependency injection.
+        file_index (ProcessedFileIndexService): The index of processed files the retention janitor
+                                                evicts from, injected through dependency injection.
+
+    Returns:
+        FileResponse: A zip archive with the processed file of every successful task of the batch.
+        dict: A dictionary containing the 'batch_id', its 'status' and a 'message' while the
+              archive is not built yet.
+    """
+    archive_path = batch_service.get_archive_path(batch_id=batch_id)
+    if not os.path.exists(archive_path):
+        return {
+            "batch_id": batch_id,
+            "status": "PENDING",
+            "message": "Batch processing is not completed or batch ID is invalid",
+        }
+
+    await run_in_threadpool(
+        file_index.touch, member=file_index.get_batch_member(batch_id=batch_id)
+    )
+    return FileResponse(
+        archive_path,
+        media_type="application/zip",
+        filename=os.path.basename(archive_path),
+    )
+
+
+@router.api_route(
     path="/download/{task_id}",
+    methods=["GET", "HEAD"],
     response_model=Optional[CeleryTaskNoExcelSchema],
     status_code=status.HTTP_200_OK,
 )
 async def get_processed_file(
     task_id: str,
-    config: AppConfig = Depends(get_config),
+    request: Request,
+    format: DownloadFormat | None = None,
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+    file_service: ProcessedFileService = Depends(get_processed_file_service),
 ):
     """
-    Endpoint to download a processed Excel file using a given task ID.
+    Endpoint to download a processed Excel file using a given task ID. Supports HEAD,
+    If-None-Match (304 while the client's copy is current) and single byte ranges.
 
     Args:
         task_id (str): The unique identifier for the task associated with the Excel file processing.
-        config: An instance of AppConfig class
+        request (Request): The incoming request, whose conditional, range and encoding headers are honoured.
+        format (DownloadFormat | None): 'xlsx', 'parquet' or 'json' for the result in that format,
+                                        'csv' for a zstd or gzip compressed CSV copy of it, omitted
+                                        for the format of the configured writer engine. Converted
+                                        on first request and kept until evicted.
+        notifications (TaskNotificationService): The service reading task states from the result
+                                                 backend, injected through dependency injection.
+        file_service (ProcessedFileService): The service serving processed files, injected through
+                                             dependency injection.
 
     Returns:
-        FileResponse: A response object that represents the processed Excel file, allowing the client to download it.
+        Response: The processed file, its requested byte range, or only its headers.
         dict: A dictionary containing the 'task_id' and the 'message' of the background task.
     """
-    # Check if task is completed using AsyncResult instance
-    task_result = AsyncResult(task_id, app=celery_app)
-    if task_result.status != "SUCCESS":
+    # Results are moved in place once complete, so an existing file is final
+    if not await run_in_threadpool(file_service.exists, task_id=task_id):
+        task_status = await notifications.get_status(task_id=task_id)
+        if task_status != "SUCCESS":
+            return {
+                "task_id": task_id,
+                "status": task_status,
+                "message": "File processing is not completed or task ID is invalid",
+            }
         return {
             "task_id": task_id,
-            "status": task_result.status,
-            "message": "File processing is not completed or task ID is invalid",
+            "status": task_status,
+            "message": "File processing error or the file expired (check logs)",
         }
 
-    # Check if file exists that means the task is completed
-    processed_file_path = os.path.join(config.excel.folder_path, f"{task_id}.xlsx")
-    if not os.path.exists(path=processed_file_path):
-        return {
-            "task_id": task_id,
-            "status": task_result.status,
-            "message": "File processing error (check logs)",
-        }
+    await run_in_threadpool(file_service.touch, task_id=task_id)
 
-    return FileResponse(
-        processed_file_path,
-        media_type=config.excel.mime_xlsx,
-        filename=processed_file_path,
+    if format is DownloadFormat.CSV:
+        encoding = file_service.get_csv_encoding(
+            accept_encoding=request.headers.get("accept-encoding", "")
+        )
+        # Generated once per encoding, later downloads read the cached copy
+        csv_path = await run_in_threadpool(
+            file_service.get_csv_variant_path,
+            task_id=task_id,
+            encoding=encoding or "gzip",
+        )
+        if encoding is None:
+            return await run_in_threadpool(
+                file_service.get_decompressed_response,
+                path=csv_path,
+                headers=request.headers,
+                method=request.method,
+                media_type="text/csv",
+                filename=f"{task_id}.csv",
+            )
+        return await run_in_threadpool(
+            file_service.get_response,
+            path=csv_path,
+            headers=request.headers,
+            method=request.method,
+            media_type="text/csv",
+            filename=f"{task_id}.csv",
+            extra_headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+    # Converted from the columnar copy of the result on first request
+    path = await run_in_threadpool(
+        file_service.get_format_path, task_id=task_id, format=format
+    )
+    # Hashing a file the first time is blocking work
+    return await run_in_threadpool(
+        file_service.get_response,
+        path=path,
+        headers=request.headers,
+        method=request.method,
+        media_type=file_service.get_media_type(format=format),
+        filename=os.path.basename(path),
+    )
+
+
+@router.get(
+    path="/{task_id}/series",
+    response_model=SeriesSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_processed_series(
+    task_id: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    resample: SeriesFrequency | None = None,
+    aggregate: SeriesAggregate = SeriesAggregate.SUM,
+    series_service: SeriesService = Depends(get_series_service),
+):
+    """
+    Endpoint to query the processed sales of a task by date, without downloading the file.
+
+    Args:
+        task_id (str): The unique identifier for the task associated with the Excel file processing.
+        start (datetime | None): The first date of the range, inclusive, the first row when omitted.
+        end (datetime | None): The last date of the range, inclusive, the last row when omitted.
+        resample (SeriesFrequency | None): 'day', 'week' (from Monday) or 'month' to aggregate
+                                           the range per period, omitted for the rows themselves.
+        aggregate (SeriesAggregate): 'sum' or 'mean' of the sales of each period.
+        series_service (SeriesService): The service querying the memory-mapped columnar copy of
+                                        the result, injected through dependency injection.
+
+    Returns:
+        dict: A dictionary containing the 'task_id', the query and its 'points', each with its
+              'date' and 'value'. Rows with a blank date are left out.
+    """
+    # Mapping a series the first time is blocking work
+    return await run_in_threadpool(
+        series_service.get_series,
+        task_id=task_id,
+        start=start,
+        end=end,
+        resample=resample,
+        aggregate=aggregate,
     )
 
 
+@router.get(
+    path="/queues",
+    response_model=list[CeleryQueueStatsSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def get_queue_stats(
+    routing: TaskRoutingService = Depends(get_task_routing_service),
+):
+    """
+    Reports the depth of the small and large task queues and how long their tasks wait,
+    to tune the size thresholds and the worker concurrency of each queue.
+
+    Args:
+        routing (TaskRoutingService): The service that routes tasks to the queues,
+                                      injected through dependency injection.
+
+    Returns:
+        list[dict]: For every queue, its 'queue' name, 'depth' overall and per priority, the
+                    'oldest_wait' of its queued tasks and the median and 95th percentile
+                    wait of its recently started tasks, in seconds.
+    """
+    return await run_in_threadpool(routing.get_stats)
+
+
 @router.get(
     path="/status/{task_id}",
     response_model=CeleryTaskSchema,
@@ -127,3 +754,240 @@ async def check_task_status(
     task_result = AsyncResult(task_id, app=celery_app)
 
     return {"task_id": task_id, "status": task_result.status}
+
+
+@router.post(
+    path="/status",
+    response_model=list[CeleryTaskStatusSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def check_task_statuses(
+    statuses_request: CeleryTaskStatusesRequestSchema,
+    config: AppConfig = Depends(get_config),
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+    log_service: AsyncExcelHandleLogService = Depends(
+        get_async_excel_handle_log_service
+    ),
+):
+    """
+    Retrieves the current status of many background tasks at once, together with the
+    status and error type of their processing logs.
+
+    Args:
+        statuses_request (CeleryTaskStatusesRequestSchema): The IDs of the background tasks to check.
+        config (AppConfig): The application configuration, injected through dependency injection.
+        notifications (TaskNotificationService): The service reading task states from the result
+                                                 backend, injected through dependency injection.
+        log_service (AsyncExcelHandleLogService): The service reading the processing logs,
+                                                  injected through dependency injection.
+
+    Returns:
+        list[dict]: For every task, in the requested order, a dictionary containing the 'task_id',
+                    its 'status' and the 'log_status' and 'error_type' of its log, if written yet.
+    """
+    task_ids = statuses_request.task_ids
+    if len(task_ids) > config.excel.max_status_task_ids:
+        raise PayloadTooLargeException(
+            message=f"At most {config.excel.max_status_task_ids} task IDs per request"
+        )
+    uuids = [validate_uuid_format(string=task_id) for task_id in task_ids]
+
+    # One MGET and one IN (...) query, run concurrently
+    task_statuses, log_statuses = await asyncio.gather(
+        notifications.get_statuses(task_ids=task_ids),
+        log_service.get_statuses(uuids=list(uuids)),
+    )
+
+    statuses = []
+    for task_id, uuid, task_status in zip(task_ids, uuids, task_statuses):
+        log_status, error_type = log_statuses.get(uuid, (None, None))
+        statuses.append(
+            {
+                "task_id": task_id,
+                "status": task_status,
+                "log_status": log_status,
+                "error_type": error_type,
+            }
+        )
+    return statuses
+
+
+@router.get(
+    path="/status/{task_id}/wait",
+    response_model=CeleryTaskSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def wait_task_status(
+    task_id: str,
+    timeout: float = Query(default=30.0, gt=0),
+    config: AppConfig = Depends(get_config),
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+):
+    """
+    Long-polls the status of a background task: answers as soon as the task is done,
+    or with the current status once the timeout expires.
+
+    Args:
+        task_id (str): The unique identifier of the background task to wait for.
+        timeout (float): The maximum number of seconds to wait, capped by the configuration.
+        config (AppConfig): The application configuration, injected through dependency injection.
+        notifications (TaskNotificationService): The service woken by the worker when a task
+                                                 finishes, injected through dependency injection.
+
+    Returns:
+        dict: A dictionary containing the 'task_id' and the final or current 'status' of the task.
+    """
+    timeout = min(timeout, config.excel.status_wait_max_timeout)
+    task_status = await notifications.wait(task_id=task_id, timeout=timeout)
+    return {"task_id": task_id, "status": task_status}
+
+
+@router.get(
+    path="/status/{task_id}/events",
+    status_code=status.HTTP_200_OK,
+)
+async def stream_task_status(
+    task_id: str,
+    config: AppConfig = Depends(get_config),
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+):
+    """
+    Streams the status of a background task as Server-Sent Events. The current status is
+    sent first, the final one when the task is done, and the stream then ends.
+
+    Args:
+        task_id (str): The unique identifier of the background task to follow.
+        config (AppConfig): The application configuration, injected through dependency injection.
+        notifications (TaskNotificationService): The service woken by the worker when a task
+                                                 finishes, injected through dependency injection.
+
+    Returns:
+        StreamingResponse: A 'text/event-stream' of 'status' events carrying the 'task_id' and 'status'.
+    """
+
+    async def events() -> AsyncIterator[str]:
+        task_status = await notifications.get_status(task_id=task_id)
+        yield _format_event(task_id=task_id, task_status=task_status)
+        while not notifications.is_ready(status=task_status):
+            new_status = await notifications.wait(
+                task_id=task_id, timeout=config.excel.status_heartbeat_interval
+            )
+            if new_status == task_status:
+                # Keeps proxies from closing the idle connection
+                yield ": heartbeat\n\n"
+                continue
+            task_status = new_status
+            yield _format_event(task_id=task_id, task_status=task_status)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket(path="/status/{task_id}/ws")
+async def websocket_task_status(
+    websocket: WebSocket,
+    task_id: str,
+    config: AppConfig = Depends(get_config),
+    notifications: TaskNotificationService = Depends(get_task_notification_service),
+):
+    """
+    Sends the status of a background task over a WebSocket: the current status on connect,
+    then every change until the task is done, after which the socket is closed.
+
+    Args:
+        websocket (WebSocket): The client connection.
+        task_id (str): The unique identifier of the background task to follow.
+        config (AppConfig): The application configuration, injected through dependency injection.
+        notifications (TaskNotificationService): The service woken by the worker when a task
+                                                 finishes, injected through dependency injection.
+    """
+    await websocket.accept()
+    try:
+        task_status = await notifications.get_status(task_id=task_id)
+        await websocket.send_json({"task_id": task_id, "status": task_status})
+        while not notifications.is_ready(status=task_status):
+            new_status = await notifications.wait(
+                task_id=task_id, timeout=config.excel.status_heartbeat_interval
+            )
+            if new_status != task_status:
+                task_status = new_status
+                await websocket.send_json({"task_id": task_id, "status": task_status})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+def _format_event(task_id: str, task_status: str) -> str:
+    data = json.dumps({"task_id": task_id, "status": task_status})
+    return f"event: status\ndata: {data}\n\n"
+
+
+def _get_task_signature(
+    routing: TaskRoutingService, route: TaskRoute, task_id: str, args: list
+) -> Signature:
+    # Large files run as the acks_late variant of the task, on their own workers.
+    # Published by name, the worker code is never imported by the API
+    task = PROCESS_LARGE_EXCEL_FILE_TASK if route.is_large else PROCESS_EXCEL_FILE_TASK
+    return celery_app.signature(
+        task,
+        args=args,
+        task_id=task_id,
+        queue=route.queue,
+        priority=route.priority,
+        headers=routing.get_headers(),
+    )
+
+
+async def _publish(
+    signature: Signature, admission: AdmissionService, keys: list[str]
+) -> AsyncResult:
+    # Uploads of tasks that never reached the broker are no longer in flight
+    try:
+        return signature.apply_async()
+    except Exception:
+        for key in keys:
+            await run_in_threadpool(admission.discard, key=key)
+        raise
+
+
+def _store_inline_result(task_id: str) -> None:
+    # Same state and notification as a task finished by a worker
+    celery_app.backend.store_result(task_id, None, "SUCCESS")
+    TaskNotificationService.publish(
+        client=celery_app.backend.client, task_id=task_id, status="SUCCESS"
+    )
+
+
+async def _link_cached_result(
+    result_cache: ExcelResultCacheService,
+    staging_service: UploadStagingService,
+    cache_key: str,
+    task_id: str,
+    filename: str,
+    staged_upload: StagedUpload,
+) -> bool:
+    # The result cache runs on the sync session, keep it off the event loop
+    excel_handle_log = await run_in_threadpool(
+        result_cache.link, cache_key=cache_key, task_id=task_id, filename=filename
+    )
+    if excel_handle_log is None:
+        return False
+
+    await run_in_threadpool(
+        _finish_cached_task,
+        staging_service=staging_service,
+        key=staged_upload.key,
+        task_id=task_id,
+    )
+    return True
+
+
+def _finish_cached_task(
+    staging_service: UploadStagingService, key: str, task_id: str
+) -> None:
+    staging_service.remove(key=key)
+    # The result backend reports the task as done without running the worker
+    celery_app.backend.store_result(task_id, None, "SUCCESS")
@@ -2,6 +2,8 @@ from functools import cache
 
 from pydantic_settings import BaseSettings
 
+from app.enum.excel_engines import ExcelReaderEngine, ExcelWriterEngine
+
 
 class BaseConfig(BaseSettings):
     class Config:
@@ -16,6 +18,13 @@ class DbConfig(BaseSettings):
     user: str
     password: str
 
+    # Connection pool of each engine, per process
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
 
 class RedisConfig(BaseSettings):
     host: str
@@ -29,6 +38,119 @@ class ExcelConfig(BaseSettings):
     mime_xls: str
     column_date: str
     column_sales: str
+    # Upper bound for the number of invalid rows reported at once
+    max_invalid_rows: int = 100
+    # Uploads are spooled here and only their key is sent through Celery
+    staging_path: str = "./app/data/staging"
+    max_upload_size: int = 100 * 1024 * 1024
+    upload_chunk_size: int = 1024 * 1024
+    # Files accepted by one batch upload, archive members included
+    max_batch_files: int = 1000
+    # .xlsx files above either threshold are processed in bounded memory
+    streaming_threshold_bytes: int = 50 * 1024 * 1024
+    streaming_threshold_rows: int = 500_000
+    streaming_chunk_size: int = 10_000
+    # calamine needs python-calamine, xlsxwriter and parquet need their packages
+    reader_engine: ExcelReaderEngine = ExcelReaderEngine.OPENPYXL
+    writer_engine: ExcelWriterEngine = ExcelWriterEngine.OPENPYXL
+    # Frames of at least `parallel_threshold_rows` rows are validated and
+    # interpolated in row partitions across `parallel_workers` processes (0 for
+    # one per CPU). Prefork pool children cannot start processes, run the
+    # worker with the solo or threads pool
+    parallel_enabled: bool = False
+    parallel_workers: int = 0
+    parallel_threshold_rows: int = 1_000_000
+    # Series.interpolate method used to fill missing sales
+    interpolation_method: str = "linear"
+    # Identical uploads reuse the processed result of the first one
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 10_000
+    # Workers write task logs in multi-row inserts, flushed by size or age and
+    # on shutdown. Logs still buffered when a worker is killed are lost
+    log_buffer_enabled: bool = False
+    log_buffer_size: int = 100
+    log_buffer_flush_interval: float = 1.0
+    # Uploads above either threshold go to the large queue, whose workers take
+    # one task at a time and acknowledge it once finished (acks_late)
+    small_task_queue: str = "excel-small"
+    large_task_queue: str = "excel-large"
+    large_task_threshold_bytes: int = 10 * 1024 * 1024
+    large_task_threshold_rows: int = 100_000
+    # Seconds before Redis redelivers an unacknowledged task, keep it above the
+    # longest large task
+    broker_visibility_timeout: int = 6 * 3600
+    # Broker priority per X-Tenant-ID header, 0 runs first and 9 last
+    tenant_priorities: dict[str, int] = {}
+    default_task_priority: int = 5
+    # Wait times kept per queue for the queue stats
+    queue_wait_samples: int = 1000
+    # Task IDs accepted by one bulk status request
+    max_status_task_ids: int = 1000
+    # Long-poll, SSE and WebSocket waits for a task to finish
+    status_wait_max_timeout: float = 60.0
+    status_heartbeat_interval: float = 15.0
+    # Retention janitor run by Celery beat every `retention_interval` seconds.
+    # Files unread for `processed_file_ttl` seconds go first, then the least
+    # recently downloaded ones until the folder fits the size budget
+    retention_interval: float = 3600.0
+    retention_batch_size: int = 500
+    processed_file_ttl: int = 7 * 24 * 3600
+    processed_files_max_bytes: int = 10 * 1024 * 1024 * 1024
+    # Logs older than `log_ttl` seconds are deleted in batches of this many rows
+    log_ttl: int = 30 * 24 * 3600
+    log_purge_batch_size: int = 1000
+    # Prometheus exporter of the worker's processing metrics, None to disable.
+    # Prefork workers need PROMETHEUS_MULTIPROC_DIR, see ExcelMetricsService
+    metrics_worker_port: int | None = 9808
+    metrics_worker_address: str = "0.0.0.0"
+    # Tasks run under cProfile and tracemalloc when their upload asks for it
+    # (?profile=true) or for this percentage of the other uploads. Processes of
+    # the parallel partitions are not profiled
+    profile_sample_percent: float = 0.0
+    profile_top_n: int = 50
+    profile_traceback_frames: int = 1
+    # Results are stored as a columnar copy (Arrow IPC), the canonical artifact
+    # every download format is converted from on first request and append
+    # uploads build on (POST /excel-task/{task_id}/append). The worker writes
+    # the processed file itself only when the copy is disabled, or eagerly
+    # too when `processed_file_eager` is set. Streamed results (above the
+    # streaming thresholds) always get both, written chunk by chunk
+    columnar_copy_enabled: bool = True
+    processed_file_eager: bool = False
+    # Converted downloads are evicted least recently downloaded first above
+    # this size (0 for no limit), and regenerated on their next request.
+    # A conversion holds a Redis lock, so one process at a time converts
+    conversion_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    conversion_lock_timeout: int = 600
+    # Uploads of at most `inline_max_bytes` bytes, and for .xlsx files of at
+    # most `inline_max_rows` rows, are processed by the API itself in a pool
+    # of `inline_workers` threads and answered with their final status. With
+    # every thread busy they are queued as any other (0 workers to disable)
+    inline_workers: int = 4
+    inline_max_bytes: int = 256 * 1024
+    inline_max_rows: int = 1000
+    # Uploads are refused with 429 while the queues hold more than
+    # `admission_max_queue_depth` tasks, or while the uploads staged for the
+    # workers exceed `admission_max_inflight_bytes` (0 disables either). Each
+    # client, by X-Tenant-ID or else by address, may send
+    # `admission_client_rate` uploads a second in bursts of
+    # `admission_client_burst`. Retry-After follows the rate uploads finished
+    # at over the last `admission_drain_window` seconds, up to
+    # `admission_retry_after_max` seconds. The retention janitor drops staged
+    # uploads whose file is gone or that were tracked `admission_inflight_max_age`
+    # seconds ago, above the visibility timeout so redelivered tasks still count
+    admission_enabled: bool = True
+    admission_max_queue_depth: int = 10_000
+    admission_max_inflight_bytes: int = 5 * 1024 * 1024 * 1024
+    admission_client_rate: float = 5.0
+    admission_client_burst: int = 50
+    admission_drain_window: float = 300.0
+    admission_drain_samples: int = 1000
+    admission_retry_after_max: int = 300
+    admission_inflight_max_age: int = 12 * 3600
+    # Page size of the /excel-logs listing
+    logs_page_size: int = 50
+    logs_max_page_size: int = 500
 
 
 class AppConfig(BaseConfig):
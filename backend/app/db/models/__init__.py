@@ -1,2 +1,3 @@
 from .base import Base
 from .excel_handle_logs import ExcelHandleLog
+from .excel_result_cache import ExcelResultCache
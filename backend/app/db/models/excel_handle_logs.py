@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String, Enum
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Float, Index, String
 from sqlalchemy_utils import UUIDType  # type: ignore
 
 from app.db.models import Base
@@ -10,6 +10,28 @@ from app.enum.excel_handle_status import ExcelHandleStatus
 
 class ExcelHandleLog(Base):
     __tablename__ = "excel_handle_logs"
+    # Keyset pagination of the listing, alone or filtered by status or error type
+    __table_args__ = (
+        Index("ix_excel_handle_logs_created_date_uuid", "created_date", "uuid"),
+        Index(
+            "ix_excel_handle_logs_status_created_date_uuid",
+            "status",
+            "created_date",
+            "uuid",
+        ),
+        Index(
+            "ix_excel_handle_logs_error_type_created_date_uuid",
+            "error_type",
+            "created_date",
+            "uuid",
+        ),
+        # text_pattern_ops lets LIKE 'prefix%' use the index under any collation
+        Index(
+            "ix_excel_handle_logs_filename_pattern",
+            "filename",
+            postgresql_ops={"filename": "text_pattern_ops"},
+        ),
+    )
 
     uuid = Column(UUIDType(binary=False), primary_key=True)  # type: ignore
     created_date = Column(DateTime, default=datetime.utcnow)  # type: ignore
@@ -17,3 +39,15 @@ class ExcelHandleLog(Base):
     status = Column(Enum(ExcelHandleStatus))  # type: ignore
     log = Column(String, nullable=False)  # type: ignore
     error_type = Column(Enum(ExcelHandleError))  # type: ignore
+    # Result cache entry the processed file is shared with
+    cache_key = Column(String(64), nullable=True, index=True)  # type: ignore
+    # Processing metrics, null for results linked from the cache
+    queue_wait_seconds = Column(Float, nullable=True)  # type: ignore
+    parse_seconds = Column(Float, nullable=True)  # type: ignore
+    validate_seconds = Column(Float, nullable=True)  # type: ignore
+    interpolate_seconds = Column(Float, nullable=True)  # type: ignore
+    write_seconds = Column(Float, nullable=True)  # type: ignore
+    processing_seconds = Column(Float, nullable=True)  # type: ignore
+    rows = Column(BigInteger, nullable=True)  # type: ignore
+    input_bytes = Column(BigInteger, nullable=True)  # type: ignore
+    output_bytes = Column(BigInteger, nullable=True)  # type: ignore
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum, Integer, String
+
+from app.db.models import Base
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+
+
+class ExcelResultCache(Base):
+    __tablename__ = "excel_result_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # type: ignore
+    created_date = Column(DateTime, default=datetime.utcnow)  # type: ignore
+    last_used_date = Column(DateTime, default=datetime.utcnow, index=True)  # type: ignore
+    # Path of the shared processed file, None for cached validation failures
+    artifact_path = Column(String, nullable=True)  # type: ignore
+    status = Column(Enum(ExcelHandleStatus))  # type: ignore
+    log = Column(String, nullable=False)  # type: ignore
+    error_type = Column(Enum(ExcelHandleError))  # type: ignore
+    # Number of ExcelHandleLog records linked to this result
+    ref_count = Column(Integer, nullable=False, default=0)  # type: ignore
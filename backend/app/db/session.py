@@ -1,7 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .setup import SessionLocal
+from .setup import AsyncSessionLocal, SessionLocal
 
 
 def create_db_session() -> Session:
     return SessionLocal()
+
+
+def create_async_db_session() -> AsyncSession:
+    return AsyncSessionLocal()
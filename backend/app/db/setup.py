@@ -1,28 +1,64 @@
+from typing import Any
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.future import Engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import DbConfig, get_config
 
 SessionLocal = sessionmaker()
+# Used by the API, Celery workers keep the sync psycopg2 session
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False)
 
 
 def configure_db_session(engine: Engine):
     SessionLocal.configure(bind=engine)
 
 
+def configure_async_db_session(engine: AsyncEngine):
+    AsyncSessionLocal.configure(bind=engine)
+
+
 def get_db_url(db_config: DbConfig):
     return f"postgresql://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
 
 
-def db_setup(db_config: DbConfig | None = None):
+def get_async_db_url(db_config: DbConfig):
+    return f"postgresql+asyncpg://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
+
+
+def get_pool_options(db_config: DbConfig) -> dict[str, Any]:
+    return {
+        "pool_size": db_config.pool_size,
+        "max_overflow": db_config.max_overflow,
+        "pool_timeout": db_config.pool_timeout,
+        "pool_recycle": db_config.pool_recycle,
+        "pool_pre_ping": db_config.pool_pre_ping,
+    }
+
+
+def _get_db_config(db_config: DbConfig | None) -> DbConfig:
     if db_config is None:
         config = get_config()
         db_config = config.db
 
     if db_config is None:
         raise RuntimeError("Database connection configuration is undefined")
+    return db_config
+
+
+def db_setup(db_config: DbConfig | None = None):
+    db_config = _get_db_config(db_config=db_config)
 
     db_url = get_db_url(db_config=db_config)
-    engine = create_engine(url=db_url)
+    engine = create_engine(url=db_url, **get_pool_options(db_config=db_config))
     configure_db_session(engine=engine)
+
+
+def async_db_setup(db_config: DbConfig | None = None):
+    db_config = _get_db_config(db_config=db_config)
+
+    db_url = get_async_db_url(db_config=db_config)
+    engine = create_async_engine(url=db_url, **get_pool_options(db_config=db_config))
+    configure_async_db_session(engine=engine)
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class DownloadFormat(Enum):
+    XLSX = "xlsx"
+    CSV = "csv"
+    PARQUET = "parquet"
+    JSON = "json"
@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class ExcelReaderEngine(Enum):
+    OPENPYXL = "openpyxl"
+    CALAMINE = "calamine"
+
+
+class ExcelWriterEngine(Enum):
+    OPENPYXL = "openpyxl"
+    XLSXWRITER = "xlsxwriter"
+    CSV = "csv"
+    PARQUET = "parquet"
+    JSON = "json"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ProfileFormat(Enum):
+    JSON = "json"
+    PSTATS = "pstats"
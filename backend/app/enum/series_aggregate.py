@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class SeriesAggregate(Enum):
+    SUM = "sum"
+    MEAN = "mean"
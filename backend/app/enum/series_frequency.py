@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class SeriesFrequency(Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
@@ -0,0 +1,3 @@
+class InvalidCursorException(Exception):
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,5 @@
+class RangeNotSatisfiableException(Exception):
+    def __init__(self, message: str, size: int):
+        self.message = message
+        # Sent back in `Content-Range: bytes */size`
+        self.size = size
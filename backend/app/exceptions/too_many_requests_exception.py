@@ -0,0 +1,5 @@
+class TooManyRequestsException(Exception):
+    def __init__(self, message: str, retry_after: int):
+        self.message = message
+        # Seconds the client should wait before sending the upload again
+        self.retry_after = retry_after
@@ -0,0 +1,122 @@
+import time
+
+from redis import Redis
+
+
+class AdmissionRepo:
+    """
+    Redis state of the upload admission control: a token bucket per client,
+    the size of every staged upload waiting for or processed by a worker
+    with their running total and the time they were tracked, and the last
+    finished uploads with their size.
+    """
+
+    bucket_key = "excel-admission:bucket:{client_id}"
+    inflight_key = "excel-admission:inflight"
+    inflight_total_key = "excel-admission:inflight-bytes"
+    inflight_since_key = "excel-admission:inflight-since"
+    finished_key = "excel-admission:finished"
+
+    # Refilled for the time since the last take, the wait is 0 when taken
+    _take_script = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or burst)
+    local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or now)
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', ARGV[4])
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+    # Tracking a key twice counts it once
+    _track_script = """
+    if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 1 then
+        redis.call('INCRBY', KEYS[2], ARGV[2])
+        redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+    end
+    return 1
+    """
+    # Releasing an untracked key records nothing, a discarded one no sample
+    _release_script = """
+    local size = redis.call('HGET', KEYS[1], ARGV[1])
+    if not size then
+        return 0
+    end
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[4], ARGV[1])
+    redis.call('DECRBY', KEYS[2], size)
+    if ARGV[4] == '1' then
+        redis.call('LPUSH', KEYS[3], ARGV[2] .. ':' .. size)
+        redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[3]) - 1)
+    end
+    return 1
+    """
+    # Entries without a tracking time are given the current one
+    _get_inflight_script = """
+    for _, key in ipairs(redis.call('HKEYS', KEYS[1])) do
+        redis.call('ZADD', KEYS[2], 'NX', ARGV[1], key)
+    end
+    return redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+    """
+
+    def __init__(self, client: Redis):
+        self._client = client
+        self._take = client.register_script(self._take_script)
+        self._track = client.register_script(self._track_script)
+        self._release = client.register_script(self._release_script)
+        self._get_inflight = client.register_script(self._get_inflight_script)
+
+    def take(self, client_id: str, rate: float, burst: int, cost: int) -> float:
+        # Seconds until the bucket holds `cost` tokens, 0 when they were taken
+        wait = self._take(
+            keys=[self.bucket_key.format(client_id=client_id)],
+            args=[rate, burst, cost, time.time()],
+        )
+        return float(wait)
+
+    def track(self, key: str, size: int) -> None:
+        self._track(
+            keys=[self.inflight_key, self.inflight_total_key, self.inflight_since_key],
+            args=[key, size, time.time()],
+        )
+
+    def release(self, key: str, samples: int, finished: bool = True) -> None:
+        self._release(
+            keys=[
+                self.inflight_key,
+                self.inflight_total_key,
+                self.finished_key,
+                self.inflight_since_key,
+            ],
+            args=[key, time.time(), samples, int(finished)],
+        )
+
+    def get_inflight(self) -> list[tuple[str, float]]:
+        # (key, tracked at) of every staged upload, oldest first
+        entries = self._get_inflight(
+            keys=[self.inflight_key, self.inflight_since_key], args=[time.time()]
+        )
+        return [
+            (key.decode(), float(tracked_at))
+            for key, tracked_at in zip(entries[::2], entries[1::2])  # type: ignore
+        ]
+
+    def get_inflight_bytes(self) -> int:
+        return int(self._client.get(self.inflight_total_key) or 0)  # type: ignore
+
+    def get_finished(self) -> list[tuple[float, int]]:
+        # (finished at, size) of the last released uploads, most recent first
+        entries = self._client.lrange(self.finished_key, 0, -1)
+        finished = []
+        for entry in entries:  # type: ignore
+            finished_at, size = entry.decode().split(":")
+            finished.append((float(finished_at), int(size)))
+        return finished
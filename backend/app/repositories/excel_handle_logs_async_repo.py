@@ -0,0 +1,69 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Row, Select, desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.excel_handle_logs import ExcelHandleLog
+from app.utils.excel_handle_log_filters_dataclass import ExcelHandleLogFilters
+
+
+class AsyncExcelHandleLogRepo:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+        self._object = ExcelHandleLog
+
+    def _select(self) -> Select:
+        return select(self._object)
+
+    async def get(self, uuid: UUID) -> ExcelHandleLog | None:
+        result = await self._session.scalars(
+            self._select().filter(self._object.uuid == uuid)
+        )
+        return result.first()
+
+    async def get_statuses(self, uuids: list[UUID]) -> list[Row]:
+        # Only the columns the status listing needs, tracebacks stay in the table
+        result = await self._session.execute(
+            select(
+                self._object.uuid, self._object.status, self._object.error_type
+            ).filter(self._object.uuid.in_(uuids))
+        )
+        return list(result.all())
+
+    async def get_page(
+        self,
+        limit: int,
+        filters: ExcelHandleLogFilters,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> list[ExcelHandleLog]:
+        statement = self._select()
+        if filters.status is not None:
+            statement = statement.filter(self._object.status == filters.status)
+        if filters.error_type is not None:
+            statement = statement.filter(self._object.error_type == filters.error_type)
+        if filters.filename_prefix:
+            statement = statement.filter(
+                self._object.filename.startswith(
+                    filters.filename_prefix, autoescape=True
+                )
+            )
+        if filters.created_from is not None:
+            statement = statement.filter(
+                self._object.created_date >= filters.created_from
+            )
+        if filters.created_to is not None:
+            statement = statement.filter(self._object.created_date < filters.created_to)
+
+        # Keyset condition, served by the (created_date, uuid) indexes
+        if after is not None:
+            statement = statement.filter(
+                tuple_(self._object.created_date, self._object.uuid) < tuple_(*after)  # type: ignore
+            )
+
+        result = await self._session.scalars(
+            statement.order_by(
+                desc(self._object.created_date), desc(self._object.uuid)
+            ).limit(limit)
+        )
+        return list(result.all())
@@ -0,0 +1,129 @@
+import threading
+import traceback
+from typing import Any, Callable
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.db.models.excel_handle_logs import ExcelHandleLog
+
+
+class ExcelHandleLogBuffer:
+    """
+    Collects the logs of many tasks and writes them with one multi-row
+    INSERT ... ON CONFLICT, once `size` logs are pending or every
+    `flush_interval` seconds, whichever comes first. Rows are kept for the
+    next flush when the database is unreachable; a batch it rejects is
+    written row by row and the rejected rows are dropped.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        size: int = 100,
+        flush_interval: float = 1.0,
+    ):
+        self._session_factory = session_factory
+        self._size = size
+        self._flush_interval = flush_interval
+        self._object = ExcelHandleLog
+        self._rows: dict[Any, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._flush_periodically, name="excel-log-buffer", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def create(self, model: ExcelHandleLog) -> ExcelHandleLog:
+        row = {
+            column.key: getattr(model, column.key)
+            for column in self._object.__table__.columns
+        }
+        with self._lock:
+            # A retried task replaces its pending row, one row per key per INSERT
+            self._rows[row["uuid"]] = row
+            full = len(self._rows) >= self._size
+        if full:
+            self.flush()
+        return model
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, {}
+            if not rows:
+                return 0
+
+            session = self._session_factory()
+            try:
+                self._insert(session=session, rows=list(rows.values()))
+            except (OperationalError, InterfaceError):
+                traceback.print_exc()
+                self._requeue(rows=rows)
+                return 0
+            except Exception:
+                traceback.print_exc()
+                # One rejected row fails the whole INSERT, the others still go in
+                return self._insert_one_by_one(session=session, rows=rows)
+            finally:
+                session.close()
+            return len(rows)
+
+    def _insert_one_by_one(self, session: Session, rows: dict[Any, dict]) -> int:
+        written = 0
+        keys = list(rows)
+        for position, key in enumerate(keys):
+            try:
+                self._insert(session=session, rows=[rows[key]])
+            except (OperationalError, InterfaceError):
+                traceback.print_exc()
+                # The connection is gone, what is left waits for the next flush
+                self._requeue(rows={key: rows[key] for key in keys[position:]})
+                return written
+            except Exception:
+                # Retried forever otherwise, the row is dropped
+                traceback.print_exc()
+                continue
+            written += 1
+        return written
+
+    def _insert(self, session: Session, rows: list[dict[str, Any]]) -> None:
+        statement = insert(self._object).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self._object.uuid],
+            set_={
+                column.key: statement.excluded[column.key]
+                for column in self._object.__table__.columns
+                if not column.primary_key
+            },
+        )
+        try:
+            session.execute(statement)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+    def _requeue(self, rows: dict[Any, dict[str, Any]]) -> None:
+        # Kept for the next flush, newer rows of a task win
+        with self._lock:
+            self._rows = {**rows, **self._rows}
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self._flush_interval):
+            self.flush()
@@ -1,6 +1,7 @@
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import asc
+from sqlalchemy import asc, delete, select
 from sqlalchemy.orm import Session, Query
 
 from app.db.models.excel_handle_logs import ExcelHandleLog
@@ -20,12 +21,43 @@ class ExcelHandleLogRepo:
     def get_all(self, order_by="created_date", desc=True) -> list[ExcelHandleLog]:
         return self._query().order_by(order_by if desc else asc(order_by)).all()
 
-    def create(self, model: ExcelHandleLog) -> ExcelHandleLog:
+    def create(self, model: ExcelHandleLog, refresh: bool = True) -> ExcelHandleLog:
         self._session.add(model)
         self._session.commit()
-        self._session.refresh(model)
+        # Expired attributes are loaded on access anyway, skip the extra SELECT
+        if refresh:
+            self._session.refresh(model)
         return model
 
-    def delete(self, model: ExcelHandleLog | None) -> None:
+    def update(self, model: ExcelHandleLog) -> ExcelHandleLog:
+        self._session.add(model)
+        self._session.commit()
+        return model
+
+    def delete(self, model: ExcelHandleLog | None, commit: bool = True) -> None:
         if model is not None:
             self._session.delete(model)
+            if commit:
+                self._session.commit()
+
+    def commit(self) -> None:
+        self._session.commit()
+
+    def delete_created_before(self, created_before: datetime, limit: int) -> list:
+        # One short transaction per batch, rows locked by others wait for the
+        # next batch. Returns the cache keys of the deleted rows
+        uuids = (
+            select(self._object.uuid)
+            .where(self._object.created_date < created_before)
+            .order_by(self._object.created_date)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = self._session.execute(
+            delete(self._object)
+            .where(self._object.uuid.in_(uuids.scalar_subquery()))
+            .returning(self._object.cache_key)
+        )
+        cache_keys = list(result.scalars())
+        self._session.commit()
+        return cache_keys
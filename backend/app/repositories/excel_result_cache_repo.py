@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session, Query
+
+from app.db.models.excel_result_cache import ExcelResultCache
+
+
+class ExcelResultCacheRepo:
+    def __init__(self, session: Session):
+        self._session = session
+        self._object = ExcelResultCache
+
+    def _query(self) -> Query:
+        return self._session.query(self._object)
+
+    def get(self, cache_key: str) -> ExcelResultCache | None:
+        return self._query().filter(self._object.cache_key == cache_key).first()
+
+    def get_evictable(self, keep: int, limit: int) -> list[ExcelResultCache]:
+        # Entries past the `keep` most recently used ones
+        return (
+            self._query()
+            .order_by(self._object.last_used_date.desc())
+            .offset(keep)
+            .limit(limit)
+            .all()
+        )
+
+    def create(self, model: ExcelResultCache) -> ExcelResultCache:
+        self._session.add(model)
+        self._session.commit()
+        return model
+
+    def add_reference(self, cache_key: str, count: int = 1) -> None:
+        # Atomic in the database, so concurrent links do not lose updates
+        self._query().filter(self._object.cache_key == cache_key).update(
+            {
+                self._object.ref_count: self._object.ref_count + count,
+                self._object.last_used_date: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        self._session.commit()
+
+    def rollback(self) -> None:
+        self._session.rollback()
+
+    def delete(self, model: ExcelResultCache | None) -> None:
+        if model is not None:
+            self._session.delete(model)
+            self._session.commit()
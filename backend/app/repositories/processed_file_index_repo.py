@@ -0,0 +1,149 @@
+import time
+
+from redis import Redis
+from redis.lock import Lock
+
+
+class ProcessedFileIndexRepo:
+    """
+    Redis index of the processed files: last access time of every task or
+    batch in a sorted set, and the size of each of their files in a hash
+    with a running total, so retention never has to scan the folder.
+    Converted downloads are also listed by their own last access, with a
+    total of their own, so they can be evicted apart from their task.
+    """
+
+    accessed_key = "excel-processed-files:accessed"
+    sizes_key = "excel-processed-files:sizes"
+    total_key = "excel-processed-files:bytes"
+    conversions_key = "excel-processed-files:conversions"
+    conversions_total_key = "excel-processed-files:conversion-bytes"
+    lock_key = "excel-processed-files:lock:{field}"
+
+    # Rewriting a file replaces its size instead of counting it twice
+    _add_script = """
+    local old = tonumber(redis.call('HGET', KEYS[2], ARGV[2]) or '0')
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    redis.call('INCRBY', KEYS[3], tonumber(ARGV[3]) - old)
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+    if ARGV[5] == '1' then
+        if not redis.call('ZSCORE', KEYS[4], ARGV[2]) then
+            old = 0
+        end
+        redis.call('INCRBY', KEYS[5], tonumber(ARGV[3]) - old)
+        redis.call('ZADD', KEYS[4], ARGV[4], ARGV[2])
+    end
+    return 1
+    """
+    # Entries accessed after `accessed_before` are kept and -1 is returned
+    _remove_script = """
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    if not score then
+        return -1
+    end
+    if ARGV[2] ~= 'inf' and tonumber(score) > tonumber(ARGV[2]) then
+        return -1
+    end
+    local freed = 0
+    for i = 3, #ARGV do
+        local size = tonumber(redis.call('HGET', KEYS[2], ARGV[i]) or '0')
+        freed = freed + size
+        redis.call('HDEL', KEYS[2], ARGV[i])
+        if redis.call('ZREM', KEYS[4], ARGV[i]) == 1 then
+            redis.call('DECRBY', KEYS[5], size)
+        end
+    end
+    redis.call('DECRBY', KEYS[3], freed)
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    return freed
+    """
+    # A single conversion, its task stays in the index
+    _discard_script = """
+    local score = redis.call('ZSCORE', KEYS[4], ARGV[1])
+    if not score then
+        return -1
+    end
+    if tonumber(score) > tonumber(ARGV[2]) then
+        return -1
+    end
+    local size = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('DECRBY', KEYS[3], size)
+    redis.call('DECRBY', KEYS[5], size)
+    redis.call('ZREM', KEYS[4], ARGV[1])
+    return size
+    """
+
+    def __init__(self, client: Redis):
+        self._client = client
+        self._add = client.register_script(self._add_script)
+        self._remove = client.register_script(self._remove_script)
+        self._discard = client.register_script(self._discard_script)
+
+    def _keys(self) -> list[str]:
+        return [
+            self.accessed_key,
+            self.sizes_key,
+            self.total_key,
+            self.conversions_key,
+            self.conversions_total_key,
+        ]
+
+    def add(self, member: str, field: str, size: int, conversion: bool = False) -> None:
+        self._add(
+            keys=self._keys(),
+            args=[member, field, size, time.time(), int(conversion)],
+        )
+
+    def touch(self, member: str) -> None:
+        # Only tracked entries, an evicted one is not brought back
+        self._client.zadd(self.accessed_key, {member: time.time()}, xx=True)
+
+    def remove(
+        self, member: str, fields: list[str], accessed_before: float | None = None
+    ) -> int:
+        # The freed bytes, or -1 when the entry is gone or was accessed since
+        cutoff = "inf" if accessed_before is None else repr(accessed_before)
+        return int(self._remove(keys=self._keys(), args=[member, cutoff, *fields]))
+
+    def get_accessed_before(
+        self, accessed_before: float, limit: int
+    ) -> list[tuple[str, float]]:
+        entries = self._client.zrangebyscore(
+            self.accessed_key,
+            "-inf",
+            accessed_before,
+            start=0,
+            num=limit,
+            withscores=True,
+        )
+        return [(member.decode(), score) for member, score in entries]  # type: ignore
+
+    def get_least_recent(self, limit: int) -> list[tuple[str, float]]:
+        entries = self._client.zrange(self.accessed_key, 0, limit - 1, withscores=True)
+        return [(member.decode(), score) for member, score in entries]  # type: ignore
+
+    def get_total_size(self) -> int:
+        return int(self._client.get(self.total_key) or 0)  # type: ignore
+
+    def touch_conversion(self, field: str) -> None:
+        self._client.zadd(self.conversions_key, {field: time.time()}, xx=True)
+
+    def discard_conversion(self, field: str, accessed_before: float) -> int:
+        # The freed bytes, or -1 when the conversion is gone or was read since
+        return int(
+            self._discard(keys=self._keys(), args=[field, repr(accessed_before)])
+        )
+
+    def get_least_recent_conversions(self, limit: int) -> list[tuple[str, float]]:
+        entries = self._client.zrange(
+            self.conversions_key, 0, limit - 1, withscores=True
+        )
+        return [(field.decode(), score) for field, score in entries]  # type: ignore
+
+    def get_conversions_size(self) -> int:
+        return int(self._client.get(self.conversions_total_key) or 0)  # type: ignore
+
+    def lock(self, field: str, timeout: float) -> Lock:
+        # Shared by the API processes and the workers
+        return self._client.lock(self.lock_key.format(field=field), timeout=timeout)
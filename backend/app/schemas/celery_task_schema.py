@@ -6,5 +6,45 @@ class CeleryTaskSchema(BaseModel):
     status: str
 
 
+class CeleryTaskStatusesRequestSchema(BaseModel):
+    task_ids: list[str]
+
+
+class CeleryTaskStatusSchema(CeleryTaskSchema):
+    # Filled in once the worker wrote the task's ExcelHandleLog
+    log_status: str | None
+    error_type: str | None
+
+
 class CeleryTaskNoExcelSchema(CeleryTaskSchema):
     message: str
+
+
+class CeleryBatchSchema(BaseModel):
+    batch_id: str
+    status: str
+    tasks: list[CeleryTaskSchema]
+
+
+class CeleryBatchStatusSchema(CeleryBatchSchema):
+    completed: int
+    total: int
+    archive_ready: bool
+
+
+class CeleryBatchNoArchiveSchema(BaseModel):
+    batch_id: str
+    status: str
+    message: str
+
+
+class CeleryQueueStatsSchema(BaseModel):
+    queue: str
+    depth: int
+    # Queued tasks per broker priority, 0 runs first
+    depth_by_priority: dict[int, int]
+    # Seconds the oldest queued task has waited, and recent waits of started tasks
+    oldest_wait: float | None
+    wait_p50: float | None
+    wait_p95: float | None
+    wait_samples: int
@@ -11,6 +11,22 @@ class ExcelHandleLogSchema(BaseModel):
     status: str
     log: str
     error_type: str
+    # Processing metrics, None for results linked from the cache
+    queue_wait_seconds: float | None = None
+    parse_seconds: float | None = None
+    validate_seconds: float | None = None
+    interpolate_seconds: float | None = None
+    write_seconds: float | None = None
+    processing_seconds: float | None = None
+    rows: int | None = None
+    input_bytes: int | None = None
+    output_bytes: int | None = None
 
     class Config:
         from_attributes = True
+
+
+class ExcelHandleLogPageSchema(BaseModel):
+    items: list[ExcelHandleLogSchema]
+    # Pass back as `cursor` to get the next page, None on the last page
+    next_cursor: str | None
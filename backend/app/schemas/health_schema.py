@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class HealthSchema(BaseModel):
+    # 'ok', or 'overloaded' while uploads are refused
+    status: str
+    accepting: bool
+    reasons: list[str]
+    # Seconds a refused upload is told to wait
+    retry_after: int | None
+    queue_depth: int
+    queue_depths: dict[str, int]
+    max_queue_depth: int
+    inflight_bytes: int
+    max_inflight_bytes: int
+    # Rate uploads finished at recently, None when none did
+    drain_tasks_per_second: float | None
+    drain_bytes_per_second: float | None
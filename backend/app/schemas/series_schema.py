@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class SeriesPointSchema(BaseModel):
+    date: datetime
+    # None where no sales value is known
+    value: float | None
+
+
+class SeriesSchema(BaseModel):
+    task_id: str
+    start: datetime | None
+    end: datetime | None
+    # Points are the rows themselves when not resampled
+    resample: str | None
+    aggregate: str | None
+    points: list[SeriesPointSchema]
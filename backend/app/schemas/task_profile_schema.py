@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+
+
+class TaskProfileFunctionSchema(BaseModel):
+    function: str
+    file: str
+    line: int
+    calls: int
+    primitive_calls: int
+    # Seconds in the function itself, and with the functions it called
+    total_seconds: float
+    cumulative_seconds: float
+
+
+class TaskProfileAllocationSchema(BaseModel):
+    file: str
+    line: int
+    size_bytes: int
+    count: int
+
+
+class TaskProfileSchema(BaseModel):
+    task_id: str
+    seconds: float
+    peak_bytes: int
+    # Slowest functions first, by cumulative time
+    functions: list[TaskProfileFunctionSchema]
+    # Largest allocation sites at the stage that held the most memory
+    allocations_stage: str | None
+    allocations: list[TaskProfileAllocationSchema]
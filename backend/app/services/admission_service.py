@@ -0,0 +1,144 @@
+import math
+import time
+from typing import Any, Callable
+
+from app.config import ExcelConfig, get_config
+from app.exceptions.too_many_requests_exception import TooManyRequestsException
+from app.repositories.admission_repo import AdmissionRepo
+from app.services.task_routing_service import TaskRoutingService
+
+
+class AdmissionService:
+    """
+    Admission control of the uploads. New tasks are refused while the queues
+    or the staged uploads are over their limits, and every client is held to
+    a token bucket. A refusal tells the client to retry once the workers,
+    at the rate they recently finished uploads, drained the excess.
+    """
+
+    def __init__(
+        self,
+        repo: AdmissionRepo,
+        routing: TaskRoutingService,
+        config: ExcelConfig | None = None,
+    ):
+        self._repo = repo
+        self._routing = routing
+        self._config = config or get_config().excel
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.admission_enabled
+
+    def admit(self, client_id: str, size: int, count: int = 1) -> None:
+        # Checked before the upload is staged, `size` as reported by the client
+        if not self.enabled:
+            return
+
+        pressure = self.get_pressure(size=size)
+        if not pressure["accepting"]:
+            raise TooManyRequestsException(
+                message=f"Uploads are not accepted now: {', '.join(pressure['reasons'])}",
+                retry_after=pressure["retry_after"],
+            )
+
+        # Only uploads the queues accept use up tokens, a batch one per file
+        wait = self._repo.take(
+            client_id=client_id,
+            rate=self._config.admission_client_rate,
+            burst=self._config.admission_client_burst,
+            cost=min(count, self._config.admission_client_burst),
+        )
+        if wait > 0:
+            raise TooManyRequestsException(
+                message=f"Too many uploads from client {client_id}",
+                retry_after=self._get_retry_after(excess=1, rate=1 / wait),
+            )
+
+    def track(self, key: str, size: int) -> None:
+        # Called before the task is published, released by the worker or
+        # discarded when publishing fails
+        if self.enabled:
+            self._repo.track(key=key, size=size)
+
+    def release(self, key: str) -> None:
+        self._repo.release(key=key, samples=self._config.admission_drain_samples)
+
+    def discard(self, key: str) -> None:
+        # A task that never ran, its upload drained nothing
+        self._repo.release(
+            key=key, samples=self._config.admission_drain_samples, finished=False
+        )
+
+    def reconcile(self, is_staged: Callable[[str], bool]) -> int:
+        # Uploads whose task was lost, to a failed publish or a killed worker,
+        # are dropped once their staged file is gone or they are too old
+        tracked_before = time.time() - self._config.admission_inflight_max_age
+        discarded = 0
+        for key, tracked_at in self._repo.get_inflight():
+            if tracked_at < tracked_before or not is_staged(key):
+                self.discard(key=key)
+                discarded += 1
+        return discarded
+
+    def get_pressure(self, size: int = 0) -> dict[str, Any]:
+        depths = self._routing.get_depths()
+        depth = sum(depths.values())
+        inflight_bytes = self._repo.get_inflight_bytes()
+        tasks_per_second, bytes_per_second = self.get_drain_rates()
+
+        reasons = []
+        retry_after = 0
+        max_depth = self._config.admission_max_queue_depth
+        if max_depth and depth >= max_depth:
+            reasons.append(f"{depth} tasks queued, the limit is {max_depth}")
+            retry_after = self._get_retry_after(
+                excess=depth - max_depth + 1, rate=tasks_per_second
+            )
+        # An upload larger than the limit is still taken once nothing is staged
+        max_bytes = self._config.admission_max_inflight_bytes
+        if max_bytes and inflight_bytes and inflight_bytes + size > max_bytes:
+            reasons.append(
+                f"{inflight_bytes} bytes staged for processing, the limit is {max_bytes}"
+            )
+            retry_after = max(
+                retry_after,
+                self._get_retry_after(
+                    excess=inflight_bytes + size - max_bytes, rate=bytes_per_second
+                ),
+            )
+
+        return {
+            "accepting": not reasons,
+            "reasons": reasons,
+            "retry_after": retry_after or None,
+            "queue_depth": depth,
+            "queue_depths": depths,
+            "max_queue_depth": max_depth,
+            "inflight_bytes": inflight_bytes,
+            "max_inflight_bytes": max_bytes,
+            "drain_tasks_per_second": tasks_per_second,
+            "drain_bytes_per_second": bytes_per_second,
+        }
+
+    def get_drain_rates(self) -> tuple[float | None, float | None]:
+        # Uploads and bytes finished a second over the window, None when idle
+        now = time.time()
+        finished = [
+            (finished_at, size)
+            for finished_at, size in self._repo.get_finished()
+            if finished_at >= now - self._config.admission_drain_window
+        ]
+        if not finished:
+            return None, None
+
+        seconds = max(now - min(finished_at for finished_at, _ in finished), 1.0)
+        return len(finished) / seconds, sum(size for _, size in finished) / seconds
+
+    def _get_retry_after(self, excess: float, rate: float | None) -> int:
+        # Workers that finished nothing lately get the longest wait
+        if not rate:
+            return self._config.admission_retry_after_max
+        return min(
+            self._config.admission_retry_after_max, max(1, math.ceil(excess / rate))
+        )
@@ -0,0 +1,329 @@
+import json
+import os
+from typing import TYPE_CHECKING, Any
+
+from app.config import ExcelConfig, get_config
+from app.utils.link_file import link_file
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd  # type: ignore
+    import pyarrow as pa  # type: ignore
+
+
+class ColumnarStoreService:
+    """
+    Columnar copy of processed results, the base append uploads build on.
+
+    A copy is a JSON manifest listing row ranges of Arrow IPC segments, with
+    the row of the last known sales value: the rows after it were filled
+    with that value and are the only ones a later append recomputes. An
+    appended copy hard-links the segments of its parent and adds one segment
+    of recomputed rows, so its cost follows the size of the delta. Segments
+    are never modified, every copy owns its links.
+
+    pyarrow and pandas are imported on first read or write, the API only
+    looks up paths.
+    """
+
+    manifest_suffix = ".columnar.json"
+    segment_extension = "arrow"
+
+    def __init__(self, config: ExcelConfig | None = None):
+        self._config = config or get_config().excel
+
+    @classmethod
+    def get_paths(cls, manifest_path: str) -> list[str]:
+        # The manifest and its segments, nothing when there is no copy
+        try:
+            manifest = cls._read_manifest(manifest_path=manifest_path)
+        except FileNotFoundError:
+            return []
+        folder = os.path.dirname(manifest_path)
+        return [
+            manifest_path,
+            *(
+                os.path.join(folder, segment["file"])
+                for segment in manifest["segments"]
+            ),
+        ]
+
+    def get_manifest_path(self, task_id: str) -> str:
+        # Next to the processed file of the task
+        return os.path.join(
+            self._config.folder_path, f"{task_id}{self.manifest_suffix}"
+        )
+
+    def exists(self, manifest_path: str) -> bool:
+        return os.path.exists(manifest_path)
+
+    def get_last_known_row(self, manifest_path: str) -> int | None:
+        return self._read_manifest(manifest_path=manifest_path)["last_known_row"]
+
+    def get_rows(self, manifest_path: str) -> int:
+        return self._read_manifest(manifest_path=manifest_path)["rows"]
+
+    def write(
+        self,
+        manifest_path: str,
+        dataframe: "pd.DataFrame",
+        last_known_row: int | None,
+    ) -> list[str]:
+        # A whole result as one segment, indexed by date like the processed frame
+        self._make_folder(manifest_path=manifest_path)
+        segment = self._write_segment(
+            path=self._get_segment_path(manifest_path=manifest_path, index=0),
+            dataframe=dataframe,
+        )
+        self._write_manifest(
+            manifest_path=manifest_path,
+            segments=[segment],
+            last_known_row=last_known_row,
+        )
+        return self.get_paths(manifest_path=manifest_path)
+
+    def open_segment(self, manifest_path: str) -> "ColumnarSegmentWriter":
+        # A whole result as one segment written batch by batch, for results
+        # streamed in chunks instead of loaded into a frame
+        self._make_folder(manifest_path=manifest_path)
+        return ColumnarSegmentWriter(
+            store=self,
+            manifest_path=manifest_path,
+            path=self._get_segment_path(manifest_path=manifest_path, index=0),
+        )
+
+    def append(
+        self,
+        parent_manifest_path: str,
+        manifest_path: str,
+        keep_rows: int,
+        dataframe: "pd.DataFrame | None",
+        last_known_row: int | None,
+    ) -> list[str]:
+        # The first `keep_rows` rows of the parent, linked, then the new rows
+        parent = self._read_manifest(manifest_path=parent_manifest_path)
+        parent_folder = os.path.dirname(parent_manifest_path)
+        self._make_folder(manifest_path=manifest_path)
+        segments: list[dict[str, Any]] = []
+        for segment in self._get_ranges(manifest=parent, start=0, stop=keep_rows):
+            path = self._get_segment_path(
+                manifest_path=manifest_path, index=len(segments)
+            )
+            link_file(source=os.path.join(parent_folder, segment["file"]), target=path)
+            segments.append({**segment, "file": os.path.basename(path)})
+
+        if dataframe is not None and len(dataframe):
+            segments.append(
+                self._write_segment(
+                    path=self._get_segment_path(
+                        manifest_path=manifest_path, index=len(segments)
+                    ),
+                    dataframe=dataframe,
+                )
+            )
+        self._write_manifest(
+            manifest_path=manifest_path,
+            segments=segments,
+            last_known_row=last_known_row,
+        )
+        return self.get_paths(manifest_path=manifest_path)
+
+    def link(self, source_manifest_path: str, manifest_path: str) -> list[str]:
+        # A copy of another task or of a cached result, sharing its segments
+        source = self._read_manifest(manifest_path=source_manifest_path)
+        return self.append(
+            parent_manifest_path=source_manifest_path,
+            manifest_path=manifest_path,
+            keep_rows=source["rows"],
+            dataframe=None,
+            last_known_row=source["last_known_row"],
+        )
+
+    def read(
+        self, manifest_path: str, start: int = 0, stop: int | None = None
+    ) -> "pd.DataFrame":
+        table = self.read_table(manifest_path=manifest_path, start=start, stop=stop)
+        if table is None:
+            return self._get_empty_dataframe()
+
+        dataframe = table.to_pandas()
+        return dataframe.set_index(self._config.column_date)
+
+    @classmethod
+    def read_table(
+        cls, manifest_path: str, start: int = 0, stop: int | None = None
+    ) -> "pa.Table | None":
+        import pyarrow as pa  # type: ignore
+
+        # Only the segments holding the rows are mapped, and sliced without a
+        # copy. The mapping lives as long as the buffers of the table. Nothing
+        # of the config is read, the manifest names the segments
+        manifest = cls._read_manifest(manifest_path=manifest_path)
+        folder = os.path.dirname(manifest_path)
+        stop = manifest["rows"] if stop is None else min(stop, manifest["rows"])
+        tables = []
+        for segment in cls._get_ranges(manifest=manifest, start=start, stop=stop):
+            with pa.memory_map(os.path.join(folder, segment["file"])) as source:
+                table = pa.ipc.open_file(source).read_all()
+            tables.append(table.slice(segment["offset"], segment["rows"]))
+        if not tables:
+            return None
+        return pa.concat_tables(tables)
+
+    def remove(self, manifest_path: str) -> None:
+        for path in self.get_paths(manifest_path=manifest_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_segment(self, path: str, dataframe: "pd.DataFrame") -> dict[str, Any]:
+        import numpy as np
+        import pyarrow as pa  # type: ignore
+
+        table = self._get_table(
+            dates=dataframe.index.to_numpy(dtype="datetime64[ns]"),
+            sales=dataframe[self._config.column_sales].to_numpy(dtype=np.float64),
+        )
+        partial_path = f"{path}.part"
+        try:
+            with pa.OSFile(partial_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return {"file": os.path.basename(path), "offset": 0, "rows": len(table)}
+
+    def _get_table(self, dates: "np.ndarray", sales: "np.ndarray") -> "pa.Table":
+        import numpy as np
+        import pyarrow as pa  # type: ignore
+
+        # Sales are stored as floats, so segments of a series share one schema
+        return pa.table(
+            {
+                self._config.column_date: pa.array(
+                    np.asarray(dates, dtype="datetime64[ns]")
+                ),
+                self._config.column_sales: pa.array(
+                    np.asarray(sales, dtype=np.float64)
+                ),
+            }
+        )
+
+    def _write_manifest(
+        self,
+        manifest_path: str,
+        segments: list[dict[str, Any]],
+        last_known_row: int | None,
+    ) -> None:
+        # Written last and moved in place, a copy exists once complete
+        manifest = {
+            "rows": sum(segment["rows"] for segment in segments),
+            "last_known_row": last_known_row,
+            "segments": segments,
+        }
+        partial_path = f"{manifest_path}.part"
+        with open(partial_path, "w") as file:
+            json.dump(manifest, file)
+        os.replace(partial_path, manifest_path)
+
+    @staticmethod
+    def _make_folder(manifest_path: str) -> None:
+        # The results folder may not exist before the first result is written
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    def _get_segment_path(self, manifest_path: str, index: int) -> str:
+        root = manifest_path.removesuffix(self.manifest_suffix)
+        return f"{root}.{index}.{self.segment_extension}"
+
+    def _get_empty_dataframe(self) -> "pd.DataFrame":
+        import pandas as pd  # type: ignore
+
+        return pd.DataFrame(
+            {self._config.column_sales: pd.Series(dtype="float64")},
+            index=pd.DatetimeIndex([], name=self._config.column_date),
+        )
+
+    @staticmethod
+    def _read_manifest(manifest_path: str) -> dict[str, Any]:
+        with open(manifest_path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def _get_ranges(
+        manifest: dict[str, Any], start: int, stop: int
+    ) -> list[dict[str, Any]]:
+        # Row ranges of the segments overlapping rows [start, stop)
+        ranges = []
+        position = 0
+        for segment in manifest["segments"]:
+            first = max(start, position)
+            last = min(stop, position + segment["rows"])
+            if first < last:
+                ranges.append(
+                    {
+                        "file": segment["file"],
+                        "offset": segment["offset"] + first - position,
+                        "rows": last - first,
+                    }
+                )
+            position += segment["rows"]
+        return ranges
+
+
+class ColumnarSegmentWriter:
+    """
+    First segment of a columnar copy, written one record batch per chunk.
+    The segment and the manifest are only moved in place on commit, a writer
+    closed without it leaves no copy behind.
+    """
+
+    def __init__(self, store: ColumnarStoreService, manifest_path: str, path: str):
+        self._store = store
+        self._manifest_path = manifest_path
+        self._path = path
+        self._partial_path = f"{path}.part"
+        self._sink: Any = None
+        self._writer: Any = None
+        self._rows = 0
+
+    def write(self, dates: "np.ndarray", sales: "np.ndarray") -> None:
+        import pyarrow as pa  # type: ignore
+
+        if not len(sales):
+            return
+        table = self._store._get_table(dates=dates, sales=sales)
+        if self._writer is None:
+            self._sink = pa.OSFile(self._partial_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, table.schema)
+        self._writer.write_table(table)
+        self._rows += len(table)
+
+    def commit(self, last_known_row: int | None) -> list[str]:
+        # A result without rows is a manifest without segments
+        segments = []
+        if self._writer is not None:
+            self._close_sink()
+            os.replace(self._partial_path, self._path)
+            segments.append(
+                {"file": os.path.basename(self._path), "offset": 0, "rows": self._rows}
+            )
+        self._store._write_manifest(
+            manifest_path=self._manifest_path,
+            segments=segments,
+            last_known_row=last_known_row,
+        )
+        return self._store.get_paths(manifest_path=self._manifest_path)
+
+    def close(self) -> None:
+        self._close_sink()
+        if os.path.exists(self._partial_path):
+            os.remove(self._partial_path)
+
+    def _close_sink(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
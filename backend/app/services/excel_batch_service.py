@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import zipfile
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import ExcelConfig, get_config
+from app.exceptions.invalid_archive_exception import InvalidArchiveException
+from app.exceptions.payload_too_large_exception import PayloadTooLargeException
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.processed_file_service import ProcessedFileService
+from app.services.upload_staging_service import UploadStagingService
+from app.utils.processed_file_path import get_processed_file_path
+from app.utils.staged_upload_dataclass import StagedBatchItem
+
+
+class ExcelBatchService:
+    archive_content_types = ("application/zip", "application/x-zip-compressed")
+
+    def __init__(
+        self,
+        staging_service: UploadStagingService,
+        config: ExcelConfig | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
+        self._staging_service = staging_service
+        self._config = config or get_config().excel
+        self._file_index = file_index
+        self._file_service = ProcessedFileService(
+            config=self._config, file_index=file_index
+        )
+
+    def is_archive(self, upload_file: UploadFile) -> bool:
+        return upload_file.content_type in self.archive_content_types or (
+            upload_file.filename or ""
+        ).lower().endswith(".zip")
+
+    def get_content_type(self, filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".xlsx":
+            return self._config.mime_xlsx
+        if extension == ".xls":
+            return self._config.mime_xls
+        # Anything else is staged too and reported as unsupported by the worker
+        return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    def get_archive_path(self, batch_id: str) -> str:
+        return os.path.join(self._config.folder_path, "batches", f"{batch_id}.zip")
+
+    async def stage(self, upload_files: list[UploadFile]) -> list[StagedBatchItem]:
+        items: list[StagedBatchItem] = []
+        try:
+            for upload_file in upload_files:
+                if self.is_archive(upload_file=upload_file):
+                    items += await run_in_threadpool(
+                        self._stage_archive, upload_file, len(items)
+                    )
+                else:
+                    self._check_batch_size(count=len(items) + 1)
+                    task_id = str(uuid4())
+                    staged_upload = await self._staging_service.stage(
+                        upload_file=upload_file, task_id=task_id
+                    )
+                    items.append(
+                        StagedBatchItem(
+                            task_id=task_id,
+                            filename=upload_file.filename or "",
+                            content_type=upload_file.content_type or "",
+                            staged_upload=staged_upload,
+                        )
+                    )
+
+        # A rejected batch leaves nothing behind in the staging folder
+        except BaseException:
+            for item in items:
+                self._staging_service.remove(key=item.staged_upload.key)
+            raise
+
+        return items
+
+    def build_archive(self, batch_id: str, task_ids: list[str]) -> str:
+        # Combined download of every processed file of the batch
+        archive_path = self.get_archive_path(batch_id=batch_id)
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        partial_path = f"{archive_path}.part"
+
+        with zipfile.ZipFile(partial_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for task_id in task_ids:
+                # Results with a columnar copy are written out for the archive
+                if self._file_service.exists(task_id=task_id):
+                    self._file_service.materialize(task_id=task_id)
+                processed_file_path = get_processed_file_path(
+                    config=self._config, task_id=task_id
+                )
+                if os.path.exists(processed_file_path):
+                    archive.write(
+                        processed_file_path,
+                        arcname=os.path.basename(processed_file_path),
+                    )
+
+        os.replace(partial_path, archive_path)
+        if self._file_index is not None:
+            self._file_index.track(
+                member=self._file_index.get_batch_member(batch_id=batch_id),
+                path=archive_path,
+            )
+        return archive_path
+
+    def _stage_archive(
+        self, upload_file: UploadFile, staged_count: int
+    ) -> list[StagedBatchItem]:
+        items: list[StagedBatchItem] = []
+        try:
+            with zipfile.ZipFile(upload_file.file) as archive:
+                members = [
+                    member
+                    for member in archive.infolist()
+                    if not member.is_dir()
+                    and not member.filename.startswith("__MACOSX/")
+                ]
+                self._check_batch_size(count=staged_count + len(members))
+
+                for member in members:
+                    # Sizes come from the central directory, before inflating anything
+                    if member.file_size > self._config.max_upload_size:
+                        raise PayloadTooLargeException(
+                            message=f"Archive member {member.filename} is larger than "
+                            f"{self._config.max_upload_size} bytes"
+                        )
+
+                    task_id = str(uuid4())
+                    with archive.open(member) as stream:
+                        staged_upload = self._staging_service.stage_stream(
+                            stream=stream, task_id=task_id
+                        )
+                    items.append(
+                        StagedBatchItem(
+                            task_id=task_id,
+                            filename=os.path.basename(member.filename),
+                            content_type=self.get_content_type(
+                                filename=member.filename
+                            ),
+                            staged_upload=staged_upload,
+                        )
+                    )
+
+        except BaseException as error:
+            for item in items:
+                self._staging_service.remove(key=item.staged_upload.key)
+            if isinstance(error, zipfile.BadZipFile):
+                raise InvalidArchiveException(
+                    message=f"Uploaded archive is not a valid zip file: {upload_file.filename}"
+                ) from error
+            raise
+
+        return items
+
+    def _check_batch_size(self, count: int) -> None:
+        if count > self._config.max_batch_files:
+            raise PayloadTooLargeException(
+                message=f"Batch contains more than {self._config.max_batch_files} files"
+            )
@@ -0,0 +1,100 @@
+from typing import TYPE_CHECKING, BinaryIO, Protocol
+
+from app.enum.excel_engines import ExcelReaderEngine, ExcelWriterEngine
+
+if TYPE_CHECKING:
+    # The engines are looked up by the API for file extensions and media types,
+    # pandas is only imported once a file is read
+    import pandas as pd  # type: ignore
+
+
+class ExcelReader(Protocol):
+    def read(self, file: BinaryIO) -> "pd.DataFrame":
+        ...
+
+
+class ExcelWriter(Protocol):
+    extension: str
+    media_type: str
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        ...
+
+
+class OpenpyxlReader:
+    def read(self, file: BinaryIO) -> "pd.DataFrame":
+        import pandas as pd  # type: ignore
+
+        # Reads .xlsx only, .xls falls back to pandas' xlrd engine
+        return pd.read_excel(file)
+
+
+class CalamineReader:
+    def read(self, file: BinaryIO) -> "pd.DataFrame":
+        import pandas as pd  # type: ignore
+
+        # Rust-backed reader, handles both .xlsx and .xls (python-calamine)
+        return pd.read_excel(file, engine="calamine")
+
+
+class OpenpyxlWriter:
+    extension = "xlsx"
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        dataframe.to_excel(path, engine="openpyxl")
+
+
+class XlsxWriterWriter:
+    extension = "xlsx"
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        dataframe.to_excel(path, engine="xlsxwriter")
+
+
+class CsvWriter:
+    extension = "csv"
+    media_type = "text/csv"
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        dataframe.to_csv(path)
+
+
+class ParquetWriter:
+    extension = "parquet"
+    media_type = "application/vnd.apache.parquet"
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        dataframe.to_parquet(path)
+
+
+class JsonWriter:
+    extension = "json"
+    media_type = "application/json"
+
+    def write(self, dataframe: "pd.DataFrame", path: str) -> None:
+        # One object per row, dates in ISO 8601
+        dataframe.reset_index().to_json(path, orient="records", date_format="iso")
+
+
+READERS: dict[ExcelReaderEngine, type[ExcelReader]] = {
+    ExcelReaderEngine.OPENPYXL: OpenpyxlReader,
+    ExcelReaderEngine.CALAMINE: CalamineReader,
+}
+
+WRITERS: dict[ExcelWriterEngine, type[ExcelWriter]] = {
+    ExcelWriterEngine.OPENPYXL: OpenpyxlWriter,
+    ExcelWriterEngine.XLSXWRITER: XlsxWriterWriter,
+    ExcelWriterEngine.CSV: CsvWriter,
+    ExcelWriterEngine.PARQUET: ParquetWriter,
+    ExcelWriterEngine.JSON: JsonWriter,
+}
+
+
+def get_reader(engine: ExcelReaderEngine) -> ExcelReader:
+    return READERS[engine]()
+
+
+def get_writer(engine: ExcelWriterEngine) -> ExcelWriter:
+    return WRITERS[engine]()
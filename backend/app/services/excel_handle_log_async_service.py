@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from app.config import ExcelConfig, get_config
+from app.db.models.excel_handle_logs import ExcelHandleLog
+from app.exceptions.not_found_exception import NotFoundException
+from app.repositories.excel_handle_logs_async_repo import AsyncExcelHandleLogRepo
+from app.utils.excel_handle_log_filters_dataclass import ExcelHandleLogFilters
+from app.utils.keyset_cursor import decode_cursor, encode_cursor
+from app.utils.validate_uuid_format import validate_uuid_format
+
+
+class AsyncExcelHandleLogService:
+    """
+    Read side of the processing logs for the API, on the asyncpg session.
+    """
+
+    def __init__(
+        self, repo: AsyncExcelHandleLogRepo, config: ExcelConfig | None = None
+    ):
+        self._repo = repo
+        self._config = config or get_config().excel
+
+    async def get_log(self, uuid: UUID | str) -> ExcelHandleLog:
+        uuid = validate_uuid_format(string=uuid)
+
+        excel_handle_log = await self._repo.get(uuid=uuid)
+        if excel_handle_log is None:
+            raise NotFoundException(
+                message=f"ExcelHandleLog record with uuid={uuid} not found"
+            )
+        return excel_handle_log
+
+    async def get_statuses(
+        self, uuids: list[UUID | str]
+    ) -> dict[UUID, tuple[str, str]]:
+        # (status, error_type) of every task that already has a log
+        if not uuids:
+            return {}
+        rows = await self._repo.get_statuses(
+            uuids=[validate_uuid_format(string=uuid) for uuid in uuids]
+        )
+        return {row.uuid: (row.status.value, row.error_type.value) for row in rows}
+
+    async def get_logs(
+        self,
+        limit: int | None = None,
+        cursor: str | None = None,
+        filters: ExcelHandleLogFilters | None = None,
+    ) -> dict[str, Any]:
+        limit = min(
+            limit or self._config.logs_page_size, self._config.logs_max_page_size
+        )
+        filters = filters or ExcelHandleLogFilters()
+        # created_date is stored as naive UTC
+        filters.created_from = self._to_naive_utc(date=filters.created_from)
+        filters.created_to = self._to_naive_utc(date=filters.created_to)
+        after = decode_cursor(cursor=cursor) if cursor else None
+
+        # One extra row tells whether another page follows
+        excel_handle_logs = await self._repo.get_page(
+            limit=limit + 1, filters=filters, after=after
+        )
+        next_cursor = None
+        if len(excel_handle_logs) > limit:
+            excel_handle_logs = excel_handle_logs[:limit]
+            last_log = excel_handle_logs[-1]
+            next_cursor = encode_cursor(
+                created_date=last_log.created_date,  # type: ignore
+                uuid=last_log.uuid,  # type: ignore
+            )
+        return {"items": excel_handle_logs, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _to_naive_utc(date: datetime | None) -> datetime | None:
+        if date is None or date.tzinfo is None:
+            return date
+        return date.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,61 @@
+import os
+from uuid import UUID
+
+from app.config import ExcelConfig, get_config
+from app.db.models.excel_handle_logs import ExcelHandleLog
+from app.exceptions.not_found_exception import NotFoundException
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.utils.processed_file_path import get_processed_variant_paths
+from app.utils.validate_uuid_format import validate_uuid_format
+
+
+class ExcelHandleLogService:
+    """
+    Write side of the processing logs for the API, on the sync session. Kept
+    apart from ExcelHandleService so the API never imports the processing
+    pipeline and its pandas and openpyxl.
+    """
+
+    def __init__(
+        self,
+        repo: ExcelHandleLogRepo,
+        config: ExcelConfig | None = None,
+        result_cache: ExcelResultCacheService | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
+        self._repo = repo
+        self._config = config or get_config().excel
+        self._result_cache = result_cache
+        self._file_index = file_index
+
+    def get_log(self, uuid: UUID | str) -> ExcelHandleLog:
+        uuid = validate_uuid_format(string=uuid)
+
+        excel_handle_log = self._repo.get(uuid=uuid)
+        if excel_handle_log is None:
+            raise NotFoundException(
+                message=f"ExcelHandleLog record with uuid={uuid} not found"
+            )
+        return excel_handle_log
+
+    def delete_log(self, uuid: UUID | str) -> None:
+        excel_handle_log = self.get_log(uuid=uuid)
+        task_id = str(excel_handle_log.uuid)
+        cache_key = excel_handle_log.cache_key
+
+        # The row goes in the transaction dropping its cache reference (the
+        # cache service shares the session), committed before any file of the
+        # task is removed
+        self._repo.delete(model=excel_handle_log, commit=False)
+        if cache_key and self._result_cache is not None:
+            self._result_cache.release(cache_key=str(cache_key))
+        self._repo.commit()
+
+        # Only this task's links are removed, a shared result stays for the others
+        for path in get_processed_variant_paths(config=self._config, task_id=task_id):
+            if os.path.exists(path):
+                os.remove(path)
+        if self._file_index is not None:
+            self._file_index.untrack(member=task_id)
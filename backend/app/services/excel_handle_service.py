@@ -4,38 +4,73 @@ from datetime import datetime
 from typing import BinaryIO, Any
 from uuid import UUID
 
+import numpy as np
 import pandas as pd  # type: ignore
 
-from app.config import get_config
+from app.config import ExcelConfig, get_config
 from app.db.models.excel_handle_logs import ExcelHandleLog
 from app.enum.excel_handle_errors import ExcelHandleError
 from app.enum.excel_handle_status import ExcelHandleStatus
-from app.exceptions.not_found_exception import NotFoundException
+from app.repositories.excel_handle_logs_buffer import ExcelHandleLogBuffer
 from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.services.columnar_store_service import ColumnarStoreService
+from app.services.excel_engines import get_reader, get_writer
+from app.services.excel_parallel_service import ExcelParallelService
+from app.services.excel_pipeline import (
+    ExcelPipeline,
+    ExcelPipelineStage,
+    ExcelProcessingContext,
+    LoadStage,
+    LogStage,
+    PartitionStage,
+    StreamStage,
+    TransformStage,
+    ValidatorStage,
+    WriteStage,
+)
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.excel_streaming_service import ExcelStreamingService
+from app.services.excel_validation_engine import ExcelValidationEngine
+from app.services.processed_file_index_service import ProcessedFileIndexService
 from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+from app.utils.processed_file_path import get_processed_file_path
 from app.utils.validate_uuid_format import validate_uuid_format
 
 
 class ExcelHandleService:
-    def __init__(self, repo: ExcelHandleLogRepo):
+    def __init__(
+        self,
+        repo: ExcelHandleLogRepo,
+        config: ExcelConfig | None = None,
+        result_cache: ExcelResultCacheService | None = None,
+        log_buffer: ExcelHandleLogBuffer | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
         self._repo = repo
-        self._config = get_config().excel
+        self._config = config or get_config().excel
+        self._result_cache = result_cache
+        # Workers may hand their logs to a shared buffer instead of the session
+        self._log_buffer = log_buffer
+        # Written files are tracked for the retention janitor
+        self._file_index = file_index
+        self._reader = get_reader(engine=self._config.reader_engine)
+        self._writer = get_writer(engine=self._config.writer_engine)
+        self._validation_engine = ExcelValidationEngine(config=self._config)
+        self._streaming_service = ExcelStreamingService(
+            config=self._config,
+            validation_engine=self._validation_engine,
+            columns_validator=lambda columns: self.get_log_invalid_columns(
+                columns=columns
+            ),
+        )
+        self._parallel_service = ExcelParallelService(
+            config=self._config, validation_engine=self._validation_engine
+        )
+        self._columnar_store = ColumnarStoreService(config=self._config)
         self._status = ExcelHandleStatus
         self._error = ExcelHandleError
 
-    def get_log(self, uuid: UUID | str) -> ExcelHandleLog:
-        uuid = validate_uuid_format(string=uuid)
-
-        excel_handle_log = self._repo.get(uuid=uuid)
-        if excel_handle_log is None:
-            raise NotFoundException(
-                message=f"ExcelHandleLog record with uuid={uuid} not found"
-            )
-        return excel_handle_log
-
-    def get_logs(self) -> list[ExcelHandleLog]:
-        return self._repo.get_all()
-
     def create_log(
         self,
         uuid: UUID | str,
@@ -43,24 +78,35 @@ class ExcelHandleService:
         status: str,
         log: str,
         error_type: str,
+        cache_key: str | None = None,
+        metrics: ExcelHandleMetrics | None = None,
     ) -> ExcelHandleLog:
         uuid = validate_uuid_format(string=uuid)
-        excel_handle_log = self._repo.create(
-            model=ExcelHandleLog(
-                uuid=uuid,
-                created_date=datetime.utcnow(),
-                filename=filename,
-                status=status,
-                log=log,
-                error_type=error_type,
-            )
+        metrics = metrics or ExcelHandleMetrics()
+        model = ExcelHandleLog(
+            uuid=uuid,
+            created_date=datetime.utcnow(),
+            filename=filename,
+            # Logs carry enum values, the database column stores enum names
+            status=self._status(status),
+            log=log,
+            error_type=self._error(error_type),
+            cache_key=cache_key,
+            queue_wait_seconds=metrics.queue_wait_seconds,
+            parse_seconds=metrics.stage_seconds.get("parse"),
+            validate_seconds=metrics.stage_seconds.get("validate"),
+            interpolate_seconds=metrics.stage_seconds.get("interpolate"),
+            write_seconds=metrics.stage_seconds.get("write"),
+            processing_seconds=metrics.processing_seconds,
+            rows=metrics.rows,
+            input_bytes=metrics.input_bytes,
+            output_bytes=metrics.output_bytes,
         )
-        return excel_handle_log
+        if self._log_buffer is not None:
+            return self._log_buffer.create(model=model)
 
-    def delete_log(self, uuid: UUID | str) -> None:
-        uuid = validate_uuid_format(string=uuid)
-        excel_handle_log = self._repo.get(uuid=uuid)
-        self._repo.delete(model=excel_handle_log)
+        excel_handle_log = self._repo.create(model=model, refresh=False)
+        return excel_handle_log
 
     # Validation methods:
 
@@ -75,9 +121,11 @@ class ExcelHandleService:
             return log
         return None
 
-    def get_log_unreadable(self, file: BinaryIO) -> LogMinor | None:
+    def read_dataframe(
+        self, file: BinaryIO
+    ) -> tuple[pd.DataFrame | None, LogMinor | None]:
         try:
-            dataframe = pd.read_excel(file)
+            dataframe = self._reader.read(file=file)
             # Catch error when uploaded file is not an Excel file
             if dataframe.empty:
                 log = LogMinor(
@@ -85,7 +133,7 @@ class ExcelHandleService:
                     log="The Excel file is empty",
                     error_type=self._error.UNSUPPORTED_TYPE.value,
                 )
-                return log
+                return None, log
 
         # Catch other pandas-related errors
         except Exception:
@@ -94,9 +142,13 @@ class ExcelHandleService:
                 log=traceback.format_exc(),
                 error_type=ExcelHandleError.PANDAS_RELATED.value,
             )
-            return log
+            return None, log
 
-        return None
+        return dataframe, None
+
+    def get_log_unreadable(self, file: BinaryIO) -> LogMinor | None:
+        _, log = self.read_dataframe(file=file)
+        return log
 
     def get_log_invalid_columns(self, columns: list) -> LogMinor | None:
         # Catch error when columns are not match with EXPECTED COLUMNS
@@ -135,37 +187,295 @@ class ExcelHandleService:
             return log
         return None
 
-    def validate_and_get_log(
-        self, content_type: str, file: BinaryIO
-    ) -> LogMinor | None:
-        # Pass all validation functions
-        log = self.get_log_invalid_content_type(content_type=content_type)
-        if log:
-            return log
+    def get_logs_invalid_rows(
+        self, dataframe: pd.DataFrame, limit: int | None = None
+    ) -> list[LogMinor]:
+        # Validate Date and Sales columns at once, reporting up to `limit` rows
+        if limit is None:
+            limit = self._config.max_invalid_rows
+        return self._validation_engine.get_logs_invalid_rows(
+            dataframe=dataframe, limit=limit
+        )
 
-        log = self.get_log_unreadable(file=file)
-        if log:
+    def get_log_missing_parent(self, parent_task_id: str) -> LogMinor | None:
+        # Appends build on the columnar copy kept with the parent's result
+        manifest_path = self.get_columnar_manifest_path(task_id=parent_task_id)
+        if not self._columnar_store.exists(manifest_path=manifest_path):
+            log = LogMinor(
+                status=self._status.FAILED.value,
+                log=f"No result of the task with uuid={parent_task_id} to append to",
+                error_type=self._error.OTHER.value,
+            )
             return log
+        return None
 
-        dataframe = pd.read_excel(file)
-        log = self.get_log_invalid_columns(columns=list(dataframe.columns))
-        if log:
-            return log
+    # Processing pipeline stages:
+
+    @staticmethod
+    def get_last_known_row(dataframe: pd.DataFrame, column: str) -> int | None:
+        # Position of the last sales value present before interpolation
+        known = np.flatnonzero(dataframe[column].notna().to_numpy())
+        return int(known[-1]) if len(known) else None
 
-        for index, row in dataframe.iterrows():
-            log = self.get_log_invalid_date(
-                date=row[self._config.column_date], index=int(index)
+    def interpolate(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        # Kept with the columnar copy, the rows after it are recomputed on append
+        dataframe.attrs["last_known_row"] = self.get_last_known_row(
+            dataframe=dataframe, column=self._config.column_sales
+        )
+
+        # Convert the 'Date' column to a datetime format
+        dataframe[self._config.column_date] = pd.to_datetime(
+            dataframe[self._config.column_date]
+        )
+
+        # Set the 'Date' column as the index of the dataframe
+        dataframe.set_index(self._config.column_date, inplace=True)
+
+        # Interpolating missing values
+        # Linear interpolation is used here, assuming that the values change uniformly between the known data points
+        dataframe[self._config.column_sales] = dataframe[
+            self._config.column_sales
+        ].interpolate(method=self._config.interpolation_method)
+        return dataframe
+
+    def get_processed_file_path(self, task_id: str) -> str:
+        # Create the directory if it does not exist
+        os.makedirs(self._config.folder_path, exist_ok=True)
+        return get_processed_file_path(config=self._config, task_id=task_id)
+
+    def write_dataframe(self, dataframe: pd.DataFrame, task_id: str) -> str:
+        # Frames interpolated by this service know their last known row, their
+        # columnar copy is the result every download format is converted from
+        paths: list[str] = []
+        if self._config.columnar_copy_enabled and "last_known_row" in dataframe.attrs:
+            paths = self._columnar_store.write(
+                manifest_path=self.get_columnar_manifest_path(task_id=task_id),
+                dataframe=dataframe,
+                last_known_row=dataframe.attrs["last_known_row"],
             )
-            if log:
-                return log
+            if not self._config.processed_file_eager:
+                return paths[-1]
+
+        processed_file_path = self.get_processed_file_path(task_id=task_id)
+        # Save the updated data with the configured writer engine, the file is
+        # moved in place once complete so downloads never see a partial file
+        root, extension = os.path.splitext(processed_file_path)
+        partial_path = f"{root}.part{extension}"
+        try:
+            self._writer.write(dataframe=dataframe, path=partial_path)
+            os.replace(partial_path, processed_file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return processed_file_path
+
+    def get_columnar_manifest_path(self, task_id: str) -> str:
+        return self._columnar_store.get_manifest_path(task_id=task_id)
+
+    def interpolate_appended(
+        self, parent_task_id: str, dataframe: pd.DataFrame
+    ) -> pd.DataFrame:
+        # Only the parent's rows from its last known value on are interpolated
+        # again, together with the delta. The last known row itself is kept
+        manifest_path = self.get_columnar_manifest_path(task_id=parent_task_id)
+        parent_rows = self._columnar_store.get_rows(manifest_path=manifest_path)
+        parent_last_known = self._columnar_store.get_last_known_row(
+            manifest_path=manifest_path
+        )
+        dataframe[self._config.column_date] = pd.to_datetime(
+            dataframe[self._config.column_date]
+        )
+        if parent_last_known is None:
+            # Every parent row is a leading empty row and stays empty
+            keep_rows, offset = parent_rows, 0
+        else:
+            keep_rows, offset = parent_last_known + 1, 1
+            tail = self._columnar_store.read(
+                manifest_path=manifest_path, start=parent_last_known, stop=parent_rows
+            ).reset_index()
+            # Filled from the last known value, the rows after it were empty
+            tail.loc[1:, self._config.column_sales] = np.nan
+            dataframe = pd.concat([tail, dataframe], ignore_index=True)
+        interpolated = self.interpolate(dataframe=dataframe)
+
+        # The kept last known row leads the tail, it is not written again
+        rows = interpolated.iloc[offset:]
+        last_known_row = interpolated.attrs["last_known_row"]
+        rows.attrs["keep_rows"] = keep_rows
+        rows.attrs["last_known_row"] = (
+            parent_last_known
+            if last_known_row is None
+            else keep_rows - offset + last_known_row
+        )
+        return rows
+
+    def write_appended(
+        self, parent_task_id: str, dataframe: pd.DataFrame, task_id: str
+    ) -> str:
+        # The parent's kept segments are linked and only the new rows written,
+        # the processed file is written from the copy on its first download
+        manifest_path = self.get_columnar_manifest_path(task_id=task_id)
+        paths = self._columnar_store.append(
+            parent_manifest_path=self.get_columnar_manifest_path(
+                task_id=parent_task_id
+            ),
+            manifest_path=manifest_path,
+            keep_rows=dataframe.attrs["keep_rows"],
+            dataframe=dataframe,
+            last_known_row=dataframe.attrs["last_known_row"],
+        )
+        # The new segment, the bytes this task wrote
+        return paths[-1]
+
+    def create_log_from_minor(
+        self, context: ExcelProcessingContext, log: LogMinor
+    ) -> ExcelHandleLog:
+        # The row names the cache entry the worker registers right after
+        cache_key = context.extra.get("cache_key")
+        if self._result_cache is None or not self._result_cache.is_cacheable(log=log):
+            cache_key = None
+
+        return self.create_log(
+            uuid=context.task_id,
+            filename=context.filename,
+            status=log.status,
+            log=log.log,
+            error_type=log.error_type,
+            cache_key=cache_key,
+            metrics=context.metrics,
+        )
 
-            log = self.get_log_invalid_sales(
-                sales=row[self._config.column_sales], index=int(index)
+    def validate_and_interpolate(
+        self, dataframe: pd.DataFrame
+    ) -> tuple[pd.DataFrame | None, LogMinor | None]:
+        # Large frames are split across the process pool, others run serially
+        if self._parallel_service.should_parallelize(dataframe=dataframe):
+            last_known_row = self.get_last_known_row(
+                dataframe=dataframe, column=self._config.column_sales
             )
-            if log:
-                return log
+            processed, log = self._parallel_service.process(dataframe=dataframe)
+            if processed is not None:
+                processed.attrs["last_known_row"] = last_known_row
+            return processed, log
 
-        return None
+        log = self._validation_engine.get_log_invalid_rows(dataframe=dataframe)
+        if log:
+            return None, log
+        return self.interpolate(dataframe=dataframe), None
+
+    def get_load_stages(self) -> list[ExcelPipelineStage]:
+        # Content type, then the workbook parsed by LoadStage and its columns
+        return [
+            ValidatorStage(
+                lambda context: self.get_log_invalid_content_type(
+                    content_type=context.content_type
+                )
+            ),
+            LoadStage(reader=self.read_dataframe),
+            ValidatorStage(
+                lambda context: self.get_log_invalid_columns(
+                    columns=list(context.dataframe.columns)  # type: ignore
+                )
+            ),
+        ]
+
+    def get_validation_stages(self) -> list[ExcelPipelineStage]:
+        # The existing validators, run against the frame parsed by LoadStage
+        return [
+            *self.get_load_stages(),
+            ValidatorStage(
+                lambda context: self._validation_engine.get_log_invalid_rows(
+                    dataframe=context.dataframe
+                )
+            ),
+        ]
+
+    def get_pipeline(self) -> ExcelPipeline:
+        # load -> validate -> interpolate -> write -> log
+        if self._config.parallel_enabled:
+            stages = [
+                *self.get_load_stages(),
+                PartitionStage(processor=self.validate_and_interpolate),
+            ]
+        else:
+            stages = [
+                *self.get_validation_stages(),
+                TransformStage(transform=self.interpolate),
+            ]
+        return ExcelPipeline(
+            stages=[*stages, WriteStage(writer=self.write_dataframe)],
+            log_stage=LogStage(log_writer=self.create_log_from_minor),
+        )
+
+    def get_streaming_pipeline(self) -> ExcelPipeline:
+        # Same stages in one bounded-memory pass over the rows
+        return ExcelPipeline(
+            stages=[
+                ValidatorStage(
+                    lambda context: self.get_log_invalid_content_type(
+                        content_type=context.content_type
+                    )
+                ),
+                StreamStage(
+                    processor=lambda file, output_path, metrics, manifest_path: self._streaming_service.process(
+                        file=file,
+                        output_path=output_path,
+                        metrics=metrics,
+                        manifest_path=manifest_path,
+                    ),
+                    output_path=lambda task_id: self.get_processed_file_path(
+                        task_id=task_id
+                    ),
+                    # Streamed results get their columnar copy chunk by chunk
+                    manifest_path=lambda task_id: (
+                        self.get_columnar_manifest_path(task_id=task_id)
+                        if self._config.columnar_copy_enabled
+                        else None
+                    ),
+                ),
+            ],
+            log_stage=LogStage(log_writer=self.create_log_from_minor),
+        )
+
+    def get_append_pipeline(self, parent_task_id: str) -> ExcelPipeline:
+        # The delta is validated like any upload, then merged into the parent
+        return ExcelPipeline(
+            stages=[
+                ValidatorStage(
+                    lambda context: self.get_log_missing_parent(
+                        parent_task_id=parent_task_id
+                    )
+                ),
+                *self.get_validation_stages(),
+                TransformStage(
+                    transform=lambda dataframe: self.interpolate_appended(
+                        parent_task_id=parent_task_id, dataframe=dataframe
+                    )
+                ),
+                WriteStage(
+                    writer=lambda dataframe, task_id: self.write_appended(
+                        parent_task_id=parent_task_id,
+                        dataframe=dataframe,
+                        task_id=task_id,
+                    )
+                ),
+            ],
+            log_stage=LogStage(log_writer=self.create_log_from_minor),
+        )
+
+    def validate_and_get_log(
+        self, content_type: str, file: BinaryIO
+    ) -> LogMinor | None:
+        # Pass all validation functions
+        pipeline = ExcelPipeline(stages=self.get_validation_stages())
+        return pipeline.run_stages(
+            context=ExcelProcessingContext(
+                task_id="",
+                filename="",
+                content_type=content_type,
+                file=file,
+            )
+        )
 
     def process_file(
         self,
@@ -173,53 +483,67 @@ class ExcelHandleService:
         filename: str,
         content_type: str,
         file: BinaryIO,
-    ) -> None:
-        # validate Excel file by all validators
-        log = self.validate_and_get_log(content_type=content_type, file=file)
-        if log:
-            self.create_log(
-                uuid=task_id,
-                filename=filename,
-                status=log.status,
-                log=log.log,
-                error_type=log.error_type,
-            )
-            return
+        pipeline: ExcelPipeline | None = None,
+        cache_key: str | None = None,
+        metrics: ExcelHandleMetrics | None = None,
+    ) -> LogMinor:
+        # The workbook is parsed once and the frame is passed between the stages
+        if pipeline is None:
+            # Very large workbooks are streamed instead of loaded into a frame
+            if self._streaming_service.should_stream(
+                content_type=content_type, file=file
+            ):
+                pipeline = self.get_streaming_pipeline()
+            else:
+                pipeline = self.get_pipeline()
 
-        try:
-            dataframe = pd.read_excel(file)
-            # Convert the 'Date' column to a datetime format
-            dataframe["Date"] = pd.to_datetime(dataframe["Date"])
-
-            # Set the 'Date' column as the index of the dataframe
-            dataframe.set_index("Date", inplace=True)
-
-            # Interpolating missing values
-            # Linear interpolation is used here, assuming that the values change uniformly between the known data points
-            dataframe["Sales"] = dataframe["Sales"].interpolate(method="linear")
-
-            processed_file_path = f"{task_id}.xlsx"
-            processed_files_folder = self._config.folder_path
-            # Create the directory if it does not exist
-            os.makedirs(processed_files_folder, exist_ok=True)
-            # Save the updated data back to an Excel file
-            dataframe.to_excel(
-                os.path.join(processed_files_folder, processed_file_path)
-            )
-            # Create log for success processing Excel file
-            self.create_log(
-                uuid=task_id,
-                filename=filename,
-                status=ExcelHandleStatus.SUCCESS.value,
-                log="",
-                error_type=ExcelHandleError.NONE.value,
-            )
+        context = ExcelProcessingContext(
+            task_id=task_id,
+            filename=filename,
+            content_type=content_type,
+            file=file,
+        )
+        if cache_key is not None:
+            context.extra["cache_key"] = cache_key
+        # Filled in by the stages, the caller may have set the queue wait
+        if metrics is not None:
+            context.metrics = metrics
+        file.seek(0, os.SEEK_END)
+        context.metrics.input_bytes = file.tell()
+        file.seek(0)
+        log = pipeline.run(context=context)
 
-        except Exception:
-            self.create_log(
-                uuid=task_id,
-                filename=filename,
-                status=ExcelHandleStatus.FAILED.value,
-                log=traceback.format_exc(),
-                error_type=ExcelHandleError.OTHER.value,
-            )
+        if self._file_index is not None and log.status == self._status.SUCCESS.value:
+            # Results with a columnar copy have no processed file until downloaded
+            processed_file_path = self.get_processed_file_path(task_id=task_id)
+            if os.path.exists(processed_file_path):
+                self._file_index.track(member=task_id, path=processed_file_path)
+            self.track_columnar_copy(task_id=task_id)
+        return log
+
+    def append_file(
+        self,
+        task_id: str,
+        parent_task_id: str,
+        filename: str,
+        content_type: str,
+        file: BinaryIO,
+        metrics: ExcelHandleMetrics | None = None,
+    ) -> LogMinor:
+        # Only the delta sheet is parsed, validated and written
+        log = self.process_file(
+            task_id=task_id,
+            filename=filename,
+            content_type=content_type,
+            file=file,
+            pipeline=self.get_append_pipeline(parent_task_id=parent_task_id),
+            metrics=metrics,
+        )
+        return log
+
+    def track_columnar_copy(self, task_id: str) -> None:
+        if self._file_index is None:
+            return
+        manifest_path = self.get_columnar_manifest_path(task_id=task_id)
+        for path in self._columnar_store.get_paths(manifest_path=manifest_path):
+            self._file_index.track(member=task_id, path=path)
@@ -0,0 +1,134 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+
+SECONDS_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+    1800,
+)
+ROWS_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BYTES_BUCKETS = (
+    1024,
+    10 * 1024,
+    100 * 1024,
+    1024**2,
+    10 * 1024**2,
+    100 * 1024**2,
+    1024**3,
+)
+
+
+class ExcelMetricsService:
+    """
+    Prometheus histograms of the processing metrics stored with each log.
+
+    Processes that run prefork children or several uvicorn workers set
+    PROMETHEUS_MULTIPROC_DIR, every process then writes its samples there
+    and the exporter sums them up.
+    """
+
+    stage_seconds = Histogram(
+        "excel_stage_duration_seconds",
+        "Seconds spent in each stage of processing an Excel file",
+        ["stage"],
+        buckets=SECONDS_BUCKETS,
+    )
+    processing_seconds = Histogram(
+        "excel_processing_duration_seconds",
+        "Seconds spent processing an Excel file, log insert excluded",
+        ["status"],
+        buckets=SECONDS_BUCKETS,
+    )
+    queue_wait_seconds = Histogram(
+        "excel_queue_wait_seconds",
+        "Seconds an Excel file task waited in its queue",
+        ["queue"],
+        buckets=SECONDS_BUCKETS,
+    )
+    rows = Histogram(
+        "excel_processed_rows",
+        "Data rows of the processed Excel files",
+        buckets=ROWS_BUCKETS,
+    )
+    input_bytes = Histogram(
+        "excel_input_size_bytes",
+        "Size of the uploaded Excel files",
+        buckets=BYTES_BUCKETS,
+    )
+    output_bytes = Histogram(
+        "excel_output_size_bytes",
+        "Size of the processed files",
+        buckets=BYTES_BUCKETS,
+    )
+
+    @classmethod
+    def observe(cls, metrics: ExcelHandleMetrics, status: str) -> None:
+        for stage, seconds in metrics.stage_seconds.items():
+            cls.stage_seconds.labels(stage=stage).observe(seconds)
+        if metrics.processing_seconds is not None:
+            cls.processing_seconds.labels(status=status).observe(
+                metrics.processing_seconds
+            )
+        if metrics.queue_wait_seconds is not None:
+            cls.queue_wait_seconds.labels(queue=metrics.queue or "").observe(
+                metrics.queue_wait_seconds
+            )
+        if metrics.rows is not None:
+            cls.rows.observe(metrics.rows)
+        if metrics.input_bytes is not None:
+            cls.input_bytes.observe(metrics.input_bytes)
+        if metrics.output_bytes is not None:
+            cls.output_bytes.observe(metrics.output_bytes)
+
+    @staticmethod
+    def is_multiprocess() -> bool:
+        return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+    @classmethod
+    def get_registry(cls) -> CollectorRegistry:
+        if not cls.is_multiprocess():
+            return REGISTRY
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+
+    @classmethod
+    def render(cls) -> tuple[bytes, str]:
+        # The body and content type of a scrape
+        return generate_latest(cls.get_registry()), CONTENT_TYPE_LATEST
+
+    @classmethod
+    def start_exporter(cls, port: int, address: str) -> None:
+        # Serves the scrapes from a daemon thread of this process
+        start_http_server(port=port, addr=address, registry=cls.get_registry())
+
+    @classmethod
+    def mark_process_dead(cls, pid: int) -> None:
+        # Live gauges of an exited process are dropped, histograms are kept
+        if cls.is_multiprocess():
+            multiprocess.mark_process_dead(pid)
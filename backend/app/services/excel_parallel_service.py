@@ -0,0 +1,320 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+
+import numpy as np
+import pandas as pd  # type: ignore
+from pandas.tseries.api import guess_datetime_format  # type: ignore
+
+from app.config import ExcelConfig
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.services.excel_validation_engine import ExcelValidationEngine
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.linear_interpolation import LinearInterpolationCarry
+from app.utils.partition_dataclass import (
+    PartitionResult,
+    PartitionTask,
+    SharedColumn,
+)
+
+try:
+    import pyarrow as pa  # type: ignore
+except ImportError:
+    # Optional, without it text dates are validated and parsed serially
+    pa = None
+
+# One pool per process, started on first use and reused by later tasks
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_executor()
+        # Spawned, so the pool does not inherit the worker's threads and sockets,
+        # the children import app from the sys.path start_celery.py runs with
+        _executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+class ExcelParallelService:
+    """
+    Validates and interpolates a large frame in row partitions across a pool
+    of processes, with the same logs and bit-identical values as the serial
+    ExcelValidationEngine and Series.interpolate(method="linear").
+
+    Columns are handed to the pool in shared memory, NumPy buffers for typed
+    columns and an Arrow IPC stream for text dates, never as pickled frames.
+    Each partition interpolates its inner NaN runs with
+    LinearInterpolationCarry and reports its first and last known points,
+    the runs crossing partition boundaries are filled here from those.
+    """
+
+    def __init__(self, config: ExcelConfig, validation_engine: ExcelValidationEngine):
+        self._config = config
+        self._validation_engine = validation_engine
+        self._status = ExcelHandleStatus
+        self._error = ExcelHandleError
+
+    @property
+    def workers(self) -> int:
+        return self._config.parallel_workers or os.cpu_count() or 1
+
+    def should_parallelize(self, dataframe: pd.DataFrame) -> bool:
+        if not self._config.parallel_enabled or self.workers < 2:
+            return False
+        # Stitching partitions only reproduces linear interpolation
+        if self._config.interpolation_method != "linear":
+            return False
+        if len(dataframe) < self._config.parallel_threshold_rows:
+            return False
+        # Daemonic processes, such as prefork pool children, cannot start a pool
+        if multiprocessing.current_process().daemon:
+            return False
+
+        # Integer sales have nothing to fill, other sales need per-cell checks
+        if dataframe[self._config.column_sales].dtype != np.float64:
+            return False
+        return self._get_dates_kind(dates=dataframe[self._config.column_date]) != ""
+
+    def process(
+        self, dataframe: pd.DataFrame
+    ) -> tuple[pd.DataFrame | None, LogMinor | None]:
+        dates = dataframe[self._config.column_date]
+        sales = dataframe[self._config.column_sales].to_numpy()
+        rows = len(dataframe)
+        dates_kind = self._get_dates_kind(dates=dates)
+
+        with ExitStack() as stack:
+            sales_in = self._share_array(stack=stack, array=sales)
+            sales_out = self._share_array(
+                stack=stack, array=np.empty(rows, dtype="float64")
+            )
+            # Typed dates are valid as they are, text dates are parsed in the pool
+            dates_in = dates_out = None
+            if dates_kind == "arrow":
+                dates_in = self._share_strings(stack=stack, values=dates)
+                dates_out = self._share_array(
+                    stack=stack, array=np.empty(rows, dtype="int64")
+                )
+
+            size = math.ceil(rows / self.workers)
+            tasks = [
+                PartitionTask(
+                    start=start,
+                    stop=min(start + size, rows),
+                    dates=dates_in,
+                    sales=sales_in,
+                    dates_out=dates_out,
+                    sales_out=sales_out,
+                )
+                for start in range(0, rows, size)
+            ]
+            executor = get_executor(workers=self.workers)
+            results = list(
+                executor.map(
+                    process_partition, tasks, [self._validation_engine] * len(tasks)
+                )
+            )
+
+            # The first invalid row overall, as the serial validation reports it
+            for result in results:
+                if result.invalid_row is not None:
+                    return None, self._get_log_invalid_row(
+                        index=result.invalid_row,
+                        invalid_date=result.invalid_date,
+                        dates=dates,
+                    )
+
+            with _attach_array(column=sales_out) as sales_values:
+                self._stitch(values=sales_values, results=results)
+                interpolated = sales_values.copy()
+                del sales_values
+
+            if dates_out is not None:
+                with _attach_array(column=dates_out) as date_values:
+                    parsed_dates = date_values.view("datetime64[ns]").copy()
+                    del date_values
+                index = pd.DatetimeIndex(parsed_dates, name=self._config.column_date)
+            else:
+                index = pd.DatetimeIndex(dates, name=self._config.column_date)
+
+        return (
+            pd.DataFrame({self._config.column_sales: interpolated}, index=index),
+            None,
+        )
+
+    def _get_dates_kind(self, dates: pd.Series) -> str:
+        # "numpy" for datetime columns, "arrow" for %Y-%m-%d text, "" otherwise
+        if pd.api.types.is_datetime64_dtype(dates):
+            return "numpy"
+        if pa is None or pd.api.types.infer_dtype(dates, skipna=True) != "string":
+            return ""
+
+        # Text dates must parse the way the serial pd.to_datetime infers them
+        first = dates.first_valid_index()
+        if first is None:
+            return ""
+        if guess_datetime_format(dates[first]) != self._validation_engine.date_format:
+            return ""
+        return "arrow"
+
+    def _get_log_invalid_row(
+        self, index: int, invalid_date: bool, dates: pd.Series
+    ) -> LogMinor:
+        if invalid_date:
+            log = f"Invalid date format in row: {index + 1}: {dates.iat[index]}"
+        else:
+            log = f"Invalid sales format in row: {index + 1}"
+        return LogMinor(
+            status=self._status.FAILED.value,
+            log=log,
+            error_type=self._error.INVALID_DATA.value,
+        )
+
+    @staticmethod
+    def _stitch(values: np.ndarray, results: list[PartitionResult]) -> None:
+        # np.interp between the two known points around a run computes the
+        # same values as between all known points of the column
+        previous = None
+        for result in results:
+            if result.first_known is None or result.last_known is None:
+                # All NaN, filled once the next known point shows up
+                continue
+            if previous is not None and result.first_known[0] > previous[0] + 1:
+                positions = np.arange(previous[0] + 1, result.first_known[0])
+                values[positions] = np.interp(
+                    positions,
+                    [previous[0], result.first_known[0]],
+                    [previous[1], result.first_known[1]],
+                )
+            previous = result.last_known
+
+        # Trailing NaNs take the last known value, leading ones stay NaN
+        if previous is not None:
+            values[previous[0] + 1 :] = previous[1]
+
+    @staticmethod
+    def _share_array(stack: ExitStack, array: np.ndarray) -> SharedColumn:
+        shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        stack.callback(shared_memory.unlink)
+        stack.callback(shared_memory.close)
+        buffer = np.ndarray(array.shape, dtype=array.dtype, buffer=shared_memory.buf)
+        buffer[:] = array
+        del buffer
+        return SharedColumn(
+            name=shared_memory.name,
+            kind="numpy",
+            dtype=array.dtype.str,
+            length=len(array),
+        )
+
+    @staticmethod
+    def _share_strings(stack: ExitStack, values: pd.Series) -> SharedColumn:
+        batch = pa.record_batch(
+            [pa.array(values, type=pa.string(), from_pandas=True)], names=["value"]
+        )
+        # Sized first, then written straight into the shared block
+        sink = pa.MockOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+
+        shared_memory = SharedMemory(create=True, size=sink.size())
+        stack.callback(shared_memory.unlink)
+        stack.callback(shared_memory.close)
+        buffer = pa.py_buffer(shared_memory.buf)
+        with pa.ipc.new_stream(
+            pa.FixedSizeBufferWriter(buffer), batch.schema
+        ) as writer:
+            writer.write_batch(batch)
+        del buffer
+        return SharedColumn(
+            name=shared_memory.name, kind="arrow", dtype="string", length=len(values)
+        )
+
+
+@contextmanager
+def _attach_array(column: SharedColumn) -> Iterator[np.ndarray]:
+    shared_memory = SharedMemory(name=column.name)
+    try:
+        array = np.ndarray(
+            (column.length,), dtype=np.dtype(column.dtype), buffer=shared_memory.buf
+        )
+        yield array
+        # The view must be released before the block can be closed
+        del array
+    finally:
+        shared_memory.close()
+
+
+@contextmanager
+def _attach_strings(column: SharedColumn, start: int, stop: int) -> Iterator[pd.Series]:
+    shared_memory = SharedMemory(name=column.name)
+    try:
+        buffer = pa.py_buffer(shared_memory.buf)
+        with pa.ipc.open_stream(buffer) as reader:
+            batch = reader.read_next_batch()
+        values = batch.column(0).slice(start, stop - start).to_pandas()
+        del batch, reader, buffer
+        yield values
+    finally:
+        shared_memory.close()
+
+
+def process_partition(
+    task: PartitionTask, validation_engine: ExcelValidationEngine
+) -> PartitionResult:
+    # Runs in the pool, reads its rows from and writes its results to shared memory
+    result = PartitionResult()
+    with ExitStack() as stack:
+        if task.dates is not None and task.dates_out is not None:
+            dates = stack.enter_context(
+                _attach_strings(column=task.dates, start=task.start, stop=task.stop)
+            )
+            parsed, invalid = validation_engine.parse_dates(dates=dates)
+            invalid_rows = np.flatnonzero(invalid)
+            if len(invalid_rows):
+                result.invalid_row = task.start + int(invalid_rows[0])
+                result.invalid_date = True
+                return result
+
+            dates_out = stack.enter_context(_attach_array(column=task.dates_out))
+            dates_out[task.start : task.stop] = parsed.to_numpy(  # type: ignore
+                dtype="datetime64[ns]"
+            ).view("int64")
+            del dates_out
+
+        sales = stack.enter_context(_attach_array(column=task.sales))
+        sales_out = stack.enter_context(_attach_array(column=task.sales_out))
+        values = sales[task.start : task.stop]
+        sales_out[task.start : task.stop] = values
+
+        known = np.flatnonzero(~np.isnan(values))
+        if len(known):
+            result.first_known = (task.start + int(known[0]), float(values[known[0]]))
+            result.last_known = (task.start + int(known[-1]), float(values[known[-1]]))
+
+        # Inner runs are final, the runs at both ends are stitched by the caller
+        carry = LinearInterpolationCarry(start=task.start)
+        keys, interpolated = carry.push(
+            keys=np.arange(task.start, task.stop), values=values
+        )
+        sales_out[keys] = interpolated
+        del sales, sales_out, values
+    return result
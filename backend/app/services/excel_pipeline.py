@@ -0,0 +1,197 @@
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Protocol
+
+import pandas as pd  # type: ignore
+
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+
+
+@dataclass
+class ExcelProcessingContext:
+    task_id: str
+    filename: str
+    content_type: str
+    file: BinaryIO
+    # Filled in by the load stage and shared by every following stage
+    dataframe: pd.DataFrame | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+    # Stage durations and sizes, stored with the log
+    metrics: ExcelHandleMetrics = field(default_factory=ExcelHandleMetrics)
+
+
+class ExcelPipelineStage(Protocol):
+    # Timed under this name by the pipeline, None for stages timing themselves
+    @property
+    def name(self) -> str | None:
+        ...
+
+    # A stage returns a log to stop the pipeline, or None to pass the context on
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        ...
+
+
+class ValidatorStage:
+    name = "validate"
+
+    def __init__(self, validator: Callable[[ExcelProcessingContext], LogMinor | None]):
+        self._validator = validator
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        return self._validator(context)
+
+
+class LoadStage:
+    name = "parse"
+
+    def __init__(
+        self,
+        reader: Callable[[BinaryIO], tuple[pd.DataFrame | None, LogMinor | None]],
+    ):
+        self._reader = reader
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        # The workbook is parsed here only, later stages reuse context.dataframe
+        dataframe, log = self._reader(context.file)
+        if log:
+            return log
+        context.dataframe = dataframe
+        context.metrics.rows = len(dataframe)  # type: ignore
+        return None
+
+
+class TransformStage:
+    name = "interpolate"
+
+    def __init__(self, transform: Callable[[pd.DataFrame], pd.DataFrame]):
+        self._transform = transform
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        context.dataframe = self._transform(context.dataframe)
+        return None
+
+
+class PartitionStage:
+    # The rows are validated while interpolating, both are timed together
+    name = "interpolate"
+
+    def __init__(
+        self,
+        processor: Callable[
+            [pd.DataFrame], tuple[pd.DataFrame | None, LogMinor | None]
+        ],
+    ):
+        self._processor = processor
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        # Validates the rows and interpolates the frame in one stage
+        dataframe, log = self._processor(context.dataframe)
+        if log:
+            return log
+        context.dataframe = dataframe
+        return None
+
+
+class WriteStage:
+    name = "write"
+
+    def __init__(self, writer: Callable[[pd.DataFrame, str], str]):
+        self._writer = writer
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        processed_file_path = self._writer(context.dataframe, context.task_id)
+        context.extra["processed_file_path"] = processed_file_path
+        context.metrics.output_bytes = os.path.getsize(processed_file_path)
+        return None
+
+
+class StreamStage:
+    # Parses, validates, interpolates and writes in one pass, timing each part
+    name = None
+
+    def __init__(
+        self,
+        processor: Callable[
+            [BinaryIO, str, ExcelHandleMetrics, str | None], LogMinor | None
+        ],
+        output_path: Callable[[str], str],
+        manifest_path: Callable[[str], str | None] = lambda task_id: None,
+    ):
+        self._processor = processor
+        self._output_path = output_path
+        self._manifest_path = manifest_path
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        # Loads, validates, interpolates and writes chunk by chunk in one pass
+        processed_file_path = self._output_path(context.task_id)
+        log = self._processor(
+            context.file,
+            processed_file_path,
+            context.metrics,
+            self._manifest_path(context.task_id),
+        )
+        if log:
+            return log
+        context.extra["processed_file_path"] = processed_file_path
+        context.metrics.output_bytes = os.path.getsize(processed_file_path)
+        return None
+
+
+class LogStage:
+    name = "log"
+
+    def __init__(self, log_writer: Callable[[ExcelProcessingContext, LogMinor], Any]):
+        self._log_writer = log_writer
+
+    def run(self, context: ExcelProcessingContext, log: LogMinor) -> None:
+        self._log_writer(context, log)
+
+
+class ExcelPipeline:
+    def __init__(
+        self,
+        stages: list[ExcelPipelineStage],
+        log_stage: LogStage | None = None,
+    ):
+        self.stages = stages
+        self.log_stage = log_stage
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor:
+        started = time.perf_counter()
+        try:
+            log = self.run_stages(context=context) or LogMinor(
+                status=ExcelHandleStatus.SUCCESS.value,
+                log="",
+                error_type=ExcelHandleError.NONE.value,
+            )
+        except Exception:
+            log = LogMinor(
+                status=ExcelHandleStatus.FAILED.value,
+                log=traceback.format_exc(),
+                error_type=ExcelHandleError.OTHER.value,
+            )
+
+        context.metrics.processing_seconds = time.perf_counter() - started
+
+        if self.log_stage is not None:
+            # Timed for the exporter only, the row is written by this very stage
+            with context.metrics.measure(stage=self.log_stage.name):
+                self.log_stage.run(context=context, log=log)
+        return log
+
+    def run_stages(self, context: ExcelProcessingContext) -> LogMinor | None:
+        # Stop at the first stage that reports a log
+        for stage in self.stages:
+            if stage.name is None:
+                log = stage.run(context=context)
+            else:
+                with context.metrics.measure(stage=stage.name):
+                    log = stage.run(context=context)
+            if log:
+                return log
+        return None
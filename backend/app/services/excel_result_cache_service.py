@@ -0,0 +1,189 @@
+import hashlib
+import os
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import ExcelConfig, get_config
+from app.db.models.excel_handle_logs import ExcelHandleLog
+from app.db.models.excel_result_cache import ExcelResultCache
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.repositories.excel_result_cache_repo import ExcelResultCacheRepo
+from app.services.columnar_store_service import ColumnarStoreService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.link_file import link_file
+from app.utils.processed_file_path import get_processed_file_path
+from app.utils.validate_uuid_format import validate_uuid_format
+
+
+class ExcelResultCacheService:
+    def __init__(
+        self,
+        repo: ExcelResultCacheRepo,
+        log_repo: ExcelHandleLogRepo,
+        config: ExcelConfig | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
+        self._repo = repo
+        self._log_repo = log_repo
+        self._config = config or get_config().excel
+        self._file_index = file_index
+        self._columnar_store = ColumnarStoreService(config=self._config)
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.result_cache_enabled
+
+    def get_cache_key(self, sha256: str, content_type: str) -> str:
+        # File bytes plus everything in the config that changes the result
+        fingerprint = "|".join(
+            [
+                sha256,
+                content_type,
+                self._config.column_date,
+                self._config.column_sales,
+                self._config.interpolation_method,
+                self._config.writer_engine.value,
+            ]
+        )
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    def get_artifact_path(self, cache_key: str) -> str:
+        processed_file_path = get_processed_file_path(
+            config=self._config, task_id=cache_key
+        )
+        return os.path.join(
+            self._config.folder_path, "cache", os.path.basename(processed_file_path)
+        )
+
+    def get_columnar_manifest_path(self, cache_key: str) -> str:
+        # The columnar copy of the result, so linked tasks can be appended to
+        manifest_path = self._columnar_store.get_manifest_path(task_id=cache_key)
+        return os.path.join(
+            self._config.folder_path, "cache", os.path.basename(manifest_path)
+        )
+
+    def link(
+        self, cache_key: str, task_id: str, filename: str
+    ) -> ExcelHandleLog | None:
+        # Reuse a cached result for a new task instead of running the worker
+        if not self.enabled:
+            return None
+
+        entry = self._repo.get(cache_key=cache_key)
+        if entry is None:
+            return None
+
+        if entry.artifact_path:
+            if not os.path.exists(entry.artifact_path):
+                self._repo.delete(model=entry)
+                return None
+            # Results with a columnar copy are cached without a processed file
+            artifact_path = self.get_artifact_path(cache_key=cache_key)
+            if os.path.exists(artifact_path):
+                processed_file_path = get_processed_file_path(
+                    config=self._config, task_id=task_id
+                )
+                link_file(source=artifact_path, target=processed_file_path)
+                # Counted at full size, although the link shares its bytes
+                if self._file_index is not None:
+                    self._file_index.track(member=task_id, path=processed_file_path)
+
+            manifest_path = self.get_columnar_manifest_path(cache_key=cache_key)
+            if self._columnar_store.exists(manifest_path=manifest_path):
+                for path in self._columnar_store.link(
+                    source_manifest_path=manifest_path,
+                    manifest_path=self._columnar_store.get_manifest_path(
+                        task_id=task_id
+                    ),
+                ):
+                    if self._file_index is not None:
+                        self._file_index.track(member=task_id, path=path)
+
+        excel_handle_log = self._log_repo.create(
+            model=ExcelHandleLog(
+                uuid=validate_uuid_format(string=task_id),
+                created_date=datetime.utcnow(),
+                filename=filename,
+                status=entry.status,
+                log=entry.log,
+                error_type=entry.error_type,
+                cache_key=cache_key,
+            ),
+            refresh=False,
+        )
+        self._repo.add_reference(cache_key=cache_key)
+        return excel_handle_log
+
+    def is_cacheable(self, log: LogMinor) -> bool:
+        # Unexpected errors may be transient, they are never cached
+        return self.enabled and log.error_type != ExcelHandleError.OTHER.value
+
+    def register(self, cache_key: str, task_id: str, log: LogMinor) -> None:
+        # Called by the worker with the outcome of the task, the log row is
+        # written by the task itself and may still sit in the log buffer
+        if not self.is_cacheable(log=log):
+            return
+
+        artifact_path = None
+        if log.status == ExcelHandleStatus.SUCCESS.value:
+            # The processed file when the worker wrote one, the columnar copy
+            # stands for the result when there is one
+            processed_file_path = get_processed_file_path(
+                config=self._config, task_id=task_id
+            )
+            if os.path.exists(processed_file_path):
+                artifact_path = self.get_artifact_path(cache_key=cache_key)
+                link_file(source=processed_file_path, target=artifact_path)
+            manifest_path = self._columnar_store.get_manifest_path(task_id=task_id)
+            if self._columnar_store.exists(manifest_path=manifest_path):
+                artifact_path = self.get_columnar_manifest_path(cache_key=cache_key)
+                self._columnar_store.link(
+                    source_manifest_path=manifest_path, manifest_path=artifact_path
+                )
+
+        try:
+            self._repo.create(
+                model=ExcelResultCache(
+                    cache_key=cache_key,
+                    artifact_path=artifact_path,
+                    status=ExcelHandleStatus(log.status),
+                    log=log.log,
+                    error_type=ExcelHandleError(log.error_type),
+                    ref_count=1,
+                )
+            )
+        except IntegrityError:
+            # An identical upload was registered concurrently, share its entry
+            self._repo.rollback()
+            self._repo.add_reference(cache_key=cache_key)
+
+        self.evict()
+
+    def release(self, cache_key: str, count: int = 1) -> None:
+        # Drop references, the entry goes away with its last reference
+        self._repo.add_reference(cache_key=cache_key, count=-count)
+        entry = self._repo.get(cache_key=cache_key)
+        if entry is not None and entry.ref_count <= 0:
+            self._remove(entry=entry)
+
+    def evict(self) -> None:
+        # Keep the most recently used entries, tasks keep their own hard links
+        for entry in self._repo.get_evictable(
+            keep=self._config.result_cache_max_entries, limit=100
+        ):
+            self._remove(entry=entry)
+
+    def _remove(self, entry: ExcelResultCache) -> None:
+        artifact_path = self.get_artifact_path(cache_key=str(entry.cache_key))
+        if os.path.exists(artifact_path):
+            os.remove(artifact_path)
+        self._columnar_store.remove(
+            manifest_path=self.get_columnar_manifest_path(
+                cache_key=str(entry.cache_key)
+            )
+        )
+        self._repo.delete(model=entry)
@@ -0,0 +1,264 @@
+import os
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Iterator
+
+import numpy as np
+import pandas as pd  # type: ignore
+from openpyxl import Workbook, load_workbook  # type: ignore
+from openpyxl.cell import WriteOnlyCell  # type: ignore
+from openpyxl.styles import Alignment, Border, Font, Side  # type: ignore
+
+from app.config import ExcelConfig
+from app.enum.excel_engines import ExcelWriterEngine
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.services.columnar_store_service import (
+    ColumnarSegmentWriter,
+    ColumnarStoreService,
+)
+from app.services.excel_validation_engine import ExcelValidationEngine
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+from app.utils.linear_interpolation import LinearInterpolationCarry
+from app.utils.workbook_dimension import get_sheet_max_row
+
+
+class ExcelStreamingService:
+    """
+    Bounded-memory counterpart of the in-memory processing pipeline.
+
+    Rows are read with an openpyxl read_only workbook in chunks, validated and
+    interpolated chunk by chunk, and written through a write_only workbook
+    with the same cell values and styles DataFrame.to_excel produces. Given a
+    manifest path, the rows also go to a columnar copy, one record batch per
+    chunk, so streamed results can be appended to and queried like the others.
+    The workbook is still written eagerly: converting it from the copy later
+    would load the whole result into a frame.
+    """
+
+    # Styles pandas applies to the header and to the 'Date' index cells
+    datetime_format = "YYYY-MM-DD HH:MM:SS"
+    header_font = Font(bold=True)
+    header_border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
+    header_alignment = Alignment(horizontal="center", vertical="top")
+
+    def __init__(
+        self,
+        config: ExcelConfig,
+        validation_engine: ExcelValidationEngine,
+        columns_validator: Callable[[list], LogMinor | None],
+    ):
+        self._config = config
+        self._validation_engine = validation_engine
+        self._columns_validator = columns_validator
+        self._columnar_store = ColumnarStoreService(config=config)
+        self._status = ExcelHandleStatus
+        self._error = ExcelHandleError
+
+    def should_stream(self, content_type: str, file: BinaryIO) -> bool:
+        # openpyxl can only stream .xlsx workbooks into .xlsx output
+        if content_type != self._config.mime_xlsx:
+            return False
+        # LinearInterpolationCarry only reproduces linear interpolation
+        if self._config.interpolation_method != "linear":
+            return False
+        if self._config.writer_engine not in (
+            ExcelWriterEngine.OPENPYXL,
+            ExcelWriterEngine.XLSXWRITER,
+        ):
+            return False
+
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        if size >= self._config.streaming_threshold_bytes:
+            return True
+
+        rows = get_sheet_max_row(file=file)
+        return rows is not None and rows > self._config.streaming_threshold_rows
+
+    def process(
+        self,
+        file: BinaryIO,
+        output_path: str,
+        metrics: ExcelHandleMetrics | None = None,
+        manifest_path: str | None = None,
+    ) -> LogMinor | None:
+        # Chunks interleave the stages, each part of every chunk is timed
+        if metrics is None:
+            metrics = ExcelHandleMetrics()
+        with metrics.measure(stage="parse"):
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        # The result is only moved in place once the whole sheet passed validation
+        root, extension = os.path.splitext(output_path)
+        partial_path = f"{root}.part{extension}"
+        segment = (
+            self._columnar_store.open_segment(manifest_path=manifest_path)
+            if manifest_path is not None
+            else None
+        )
+        try:
+            log, last_known_row = self._process_rows(
+                rows=self._iter_rows(worksheet=workbook.worksheets[0]),
+                output_path=partial_path,
+                metrics=metrics,
+                segment=segment,
+            )
+            if log:
+                self._remove(path=partial_path)
+                return log
+
+            os.replace(partial_path, output_path)
+            # The copy goes last, once it exists the workbook does too
+            if segment is not None:
+                with metrics.measure(stage="write"):
+                    segment.commit(last_known_row=last_known_row)
+        except BaseException:
+            self._remove(path=partial_path)
+            raise
+        finally:
+            workbook.close()
+            if segment is not None:
+                segment.close()
+        return None
+
+    def _process_rows(
+        self,
+        rows: Iterator[tuple],
+        output_path: str,
+        metrics: ExcelHandleMetrics,
+        segment: ColumnarSegmentWriter | None = None,
+    ) -> tuple[LogMinor | None, int | None]:
+        # The log of the first failure, or the row of the last known sales value
+        with metrics.measure(stage="parse"):
+            header = next(rows, None)
+            first_chunk = list(islice(rows, self._config.streaming_chunk_size))
+        if header is None or not first_chunk:
+            empty_log = LogMinor(
+                status=self._status.FAILED.value,
+                log="The Excel file is empty",
+                error_type=self._error.UNSUPPORTED_TYPE.value,
+            )
+            return empty_log, None
+
+        columns = self._trim(row=header)
+        with metrics.measure(stage="validate"):
+            log = self._columns_validator(columns)
+        if log:
+            return log, None
+
+        output_workbook = Workbook(write_only=True)
+        worksheet = output_workbook.create_sheet("Sheet1")
+        worksheet.append([self._header_cell(worksheet, column) for column in columns])
+
+        carry = LinearInterpolationCarry()
+        last_known_row = None
+        start = 0
+        chunk = first_chunk
+        while chunk:
+            with metrics.measure(stage="parse"):
+                dataframe = pd.DataFrame(
+                    [row[: len(columns)] for row in chunk], columns=columns
+                )
+            with metrics.measure(stage="validate"):
+                log = self._validation_engine.get_log_invalid_rows(
+                    dataframe=dataframe, start=start
+                )
+            if log:
+                # Finish the abandoned write_only sheet so its temp file is released
+                worksheet.close()
+                return log, None
+
+            with metrics.measure(stage="interpolate"):
+                dates = pd.to_datetime(dataframe[self._config.column_date]).to_numpy()
+                sales = pd.to_numeric(dataframe[self._config.column_sales]).to_numpy()
+                known = np.flatnonzero(~np.isnan(sales.astype("float64")))
+                if len(known):
+                    last_known_row = start + int(known[-1])
+                interpolated = carry.push(keys=dates, values=sales)
+            with metrics.measure(stage="write"):
+                self._append(worksheet, segment, *interpolated)
+
+            start += len(chunk)
+            with metrics.measure(stage="parse"):
+                chunk = list(islice(rows, self._config.streaming_chunk_size))
+
+        with metrics.measure(stage="interpolate"):
+            interpolated = carry.finish()
+        with metrics.measure(stage="write"):
+            self._append(worksheet, segment, *interpolated)
+            output_workbook.save(output_path)
+        metrics.rows = start
+        return None, last_known_row
+
+    def _iter_rows(self, worksheet: Any) -> Iterator[tuple]:
+        # pandas keeps blank rows between values as missing ones, drops the
+        # trailing ones and unboxes whole floats into ints. Blank rows are
+        # counted and only emitted once a row with values follows
+        blank_rows = 0
+        blank_row: tuple = ()
+        for row in worksheet.iter_rows(values_only=True):
+            if all(value is None for value in row):
+                blank_rows += 1
+                blank_row = row
+                continue
+            for _ in range(blank_rows):
+                yield blank_row
+            blank_rows = 0
+            yield tuple(
+                int(value) if isinstance(value, float) and value.is_integer() else value
+                for value in row
+            )
+
+    def _append(
+        self,
+        worksheet: Any,
+        segment: ColumnarSegmentWriter | None,
+        dates: np.ndarray,
+        sales: np.ndarray,
+    ) -> None:
+        if not len(sales):
+            return
+
+        if segment is not None:
+            segment.write(dates=dates, sales=sales)
+
+        for date, value in zip(pd.DatetimeIndex(dates), sales.tolist()):
+            worksheet.append(
+                [
+                    self._header_cell(
+                        worksheet,
+                        "" if pd.isna(date) else date.to_pydatetime(),
+                        number_format=self.datetime_format,
+                    ),
+                    "" if np.isnan(value) else value,
+                ]
+            )
+
+    def _header_cell(
+        self, worksheet: Any, value: Any, number_format: str | None = None
+    ) -> WriteOnlyCell:
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.font = self.header_font
+        cell.border = self.header_border
+        cell.alignment = self.header_alignment
+        if number_format is not None and value != "":
+            cell.number_format = number_format
+        return cell
+
+    @staticmethod
+    def _trim(row: tuple) -> list:
+        columns = list(row)
+        while columns and columns[-1] is None:
+            columns.pop()
+        return columns
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
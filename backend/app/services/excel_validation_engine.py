@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd  # type: ignore
+
+from app.config import ExcelConfig
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+from app.utils.excel_handle_log_dataclass import LogMinor
+
+
+class ExcelValidationEngine:
+    """
+    Column-at-a-time validation of the Date and Sales columns.
+
+    Produces the same messages and error codes as the row-by-row
+    ExcelHandleService.get_log_invalid_date / get_log_invalid_sales checks,
+    but parses the whole Date column once and checks Sales by dtype and mask.
+    """
+
+    date_format = "%Y-%m-%d"
+    # Strings pd.to_datetime reads as NaT when given a single cell, as the row
+    # loop did, but refuses with errors="coerce" on a column
+    missing_dates = frozenset({"", "NaT", "nat", "NAT", "NaN", "nan", "NAN"})
+
+    def __init__(self, config: ExcelConfig):
+        self._config = config
+        self._status = ExcelHandleStatus
+        self._error = ExcelHandleError
+
+    def parse_dates(self, dates: pd.Series) -> tuple[pd.Series | None, np.ndarray]:
+        # The parsed column and the mask of invalid dates, numeric cells never
+        # match the "%Y-%m-%d" format and are not parsed
+        if pd.api.types.is_numeric_dtype(dates):
+            return None, dates.notna().to_numpy()
+
+        parsed = pd.to_datetime(dates, format=self.date_format, errors="coerce")
+        # A missing date is accepted, a value that could not be parsed is not
+        invalid = (parsed.isna() & dates.notna()).to_numpy()
+        refused = np.flatnonzero(invalid)
+        if len(refused):
+            invalid[refused] = ~dates.iloc[refused].isin(self.missing_dates).to_numpy()
+        return parsed, invalid
+
+    def get_invalid_date_mask(self, dates: pd.Series) -> np.ndarray:
+        return self.parse_dates(dates=dates)[1]
+
+    def get_invalid_sales_mask(self, sales: pd.Series) -> np.ndarray:
+        # Numeric (and bool) columns are unboxed into int | float by the row loop
+        if pd.api.types.is_numeric_dtype(sales):
+            return np.zeros(len(sales), dtype=bool)
+
+        is_number = sales.map(lambda value: isinstance(value, (int, float)))
+        return (sales.notna() & ~is_number.astype(bool)).to_numpy()
+
+    def get_logs_invalid_rows(
+        self, dataframe: pd.DataFrame, limit: int | None = None, start: int = 0
+    ) -> list[LogMinor]:
+        # `start` is the position of the first row when validating a chunk
+        dates = dataframe[self._config.column_date]
+        sales = dataframe[self._config.column_sales]
+
+        invalid_date = self.get_invalid_date_mask(dates=dates)
+        invalid_sales = self.get_invalid_sales_mask(sales=sales)
+
+        # A row reports its date error first, the same way the row loop does
+        logs: list[LogMinor] = []
+        for index in np.flatnonzero(invalid_date | invalid_sales):
+            if limit is not None and len(logs) >= limit:
+                break
+
+            if invalid_date[index]:
+                # As the row loop saw it, cast to the common dtype of the row
+                date = dataframe.iloc[index][self._config.column_date]
+                log = LogMinor(
+                    status=self._status.FAILED.value,
+                    log=f"Invalid date format in row: {start + index + 1}: {date}",
+                    error_type=self._error.INVALID_DATA.value,
+                )
+            else:
+                log = LogMinor(
+                    status=self._status.FAILED.value,
+                    log=f"Invalid sales format in row: {start + index + 1}",
+                    error_type=self._error.INVALID_DATA.value,
+                )
+            logs.append(log)
+
+        return logs
+
+    def get_log_invalid_rows(
+        self, dataframe: pd.DataFrame, start: int = 0
+    ) -> LogMinor | None:
+        logs = self.get_logs_invalid_rows(dataframe=dataframe, limit=1, start=start)
+        if logs:
+            return logs[0]
+        return None
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.config import ExcelConfig, get_config
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+from app.utils.staged_upload_dataclass import StagedUpload
+from app.utils.workbook_dimension import get_sheet_max_row
+
+# One pool per API process, started on the first small upload. The free
+# threads are counted apart, so a full pool never queues work of its own
+_executor: ThreadPoolExecutor | None = None
+_executor_slots: threading.BoundedSemaphore | None = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers: int) -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _executor_slots, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_slots is None or _executor_workers != workers:
+            shutdown_executor()
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="excel-inline"
+            )
+            _executor_slots = threading.BoundedSemaphore(workers)
+            _executor_workers = workers
+        return _executor, _executor_slots
+
+
+def shutdown_executor() -> None:
+    global _executor, _executor_slots
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+        _executor_slots = None
+
+
+def _process_excel_file(*args, **kwargs) -> LogMinor | None:
+    # The processing pipeline and pandas are imported by the first upload
+    # processed inline, in its thread, the API process starts without them
+    from app.tasks.excel_processing import process_excel_file
+
+    return process_excel_file(*args, **kwargs)
+
+
+class InlineProcessingService:
+    """
+    Fast path of small uploads: processed by the API in a bounded pool of
+    threads instead of a worker, and answered with their final status. The
+    file and the log are written by the same code as the worker task.
+    """
+
+    # Uploads processed inline wait in no queue, their metrics say so under this name
+    queue = "inline"
+
+    def __init__(self, config: ExcelConfig | None = None):
+        self._config = config or get_config().excel
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.inline_workers > 0
+
+    def should_inline(self, content_type: str, path: str, size: int) -> bool:
+        if not self.enabled or size > self._config.inline_max_bytes:
+            return False
+        # Small .xlsx files may still hold many rows, .xls only go by size
+        if content_type != self._config.mime_xlsx:
+            return True
+        with open(path, "rb") as file:
+            rows = get_sheet_max_row(file=file)
+        return rows is not None and rows <= self._config.inline_max_rows
+
+    def submit(
+        self,
+        task_id: str,
+        filename: str,
+        content_type: str,
+        staged_upload: StagedUpload,
+        cache_key: str | None = None,
+    ) -> "Future[LogMinor | None] | None":
+        # None when every thread is busy, the upload is queued for a worker then
+        executor, slots = get_executor(workers=self._config.inline_workers)
+        if not slots.acquire(blocking=False):
+            return None
+
+        future = executor.submit(
+            _process_excel_file,
+            task_id,
+            filename,
+            content_type,
+            staged_upload.key,
+            staged_upload.size,
+            staged_upload.sha256,
+            cache_key,
+            metrics=ExcelHandleMetrics(queue=self.queue, queue_wait_seconds=0.0),
+        )
+        future.add_done_callback(lambda _: slots.release())
+        return future
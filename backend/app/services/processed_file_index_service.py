@@ -0,0 +1,113 @@
+import os
+
+from redis.lock import Lock
+
+from app.config import ExcelConfig, get_config
+from app.repositories.processed_file_index_repo import ProcessedFileIndexRepo
+from app.utils.processed_file_path import get_processed_variant_paths
+
+
+class ProcessedFileIndexService:
+    # Batch archives share the index with the task results
+    batch_prefix = "batch:"
+
+    def __init__(self, repo: ProcessedFileIndexRepo, config: ExcelConfig | None = None):
+        self._repo = repo
+        self._config = config or get_config().excel
+
+    def get_batch_member(self, batch_id: str) -> str:
+        return f"{self.batch_prefix}{batch_id}"
+
+    def get_paths(self, member: str) -> list[str]:
+        # Every file evicted together with an entry of the index
+        if member.startswith(self.batch_prefix):
+            batch_id = member.removeprefix(self.batch_prefix)
+            return [
+                os.path.join(self._config.folder_path, "batches", f"{batch_id}.zip")
+            ]
+        return get_processed_variant_paths(config=self._config, task_id=member)
+
+    def track(self, member: str, path: str, conversion: bool = False) -> None:
+        # Called once a file is moved in place, counts as an access. A
+        # conversion can be evicted on its own and regenerated
+        self._repo.add(
+            member=member,
+            field=self._get_field(path=path),
+            size=os.path.getsize(path),
+            conversion=conversion,
+        )
+
+    def touch(self, member: str) -> None:
+        self._repo.touch(member=member)
+
+    def untrack(self, member: str) -> None:
+        self._repo.remove(
+            member=member,
+            fields=[self._get_field(path=path) for path in self.get_paths(member)],
+        )
+
+    def evict(self, member: str, accessed_before: float) -> int:
+        # Dropped from the index first, so an access in between keeps the files
+        freed = self._repo.remove(
+            member=member,
+            fields=[self._get_field(path=path) for path in self.get_paths(member)],
+            accessed_before=accessed_before,
+        )
+        if freed < 0:
+            return freed
+
+        # Downloads already streaming keep reading the unlinked file
+        for path in self.get_paths(member=member):
+            if os.path.exists(path):
+                os.remove(path)
+        return freed
+
+    def get_accessed_before(
+        self, accessed_before: float, limit: int
+    ) -> list[tuple[str, float]]:
+        return self._repo.get_accessed_before(
+            accessed_before=accessed_before, limit=limit
+        )
+
+    def get_least_recent(self, limit: int) -> list[tuple[str, float]]:
+        return self._repo.get_least_recent(limit=limit)
+
+    def get_total_size(self) -> int:
+        return self._repo.get_total_size()
+
+    def touch_conversion(self, path: str) -> None:
+        self._repo.touch_conversion(field=self._get_field(path=path))
+
+    def evict_conversions(self, max_bytes: int, keep: str) -> int:
+        # Least recently read first, until the conversions fit `max_bytes`
+        freed = 0
+        keep_field = self._get_field(path=keep)
+        while self._repo.get_conversions_size() > max_bytes:
+            entries = [
+                entry
+                for entry in self._repo.get_least_recent_conversions(
+                    limit=self._config.retention_batch_size
+                )
+                if entry[0] != keep_field
+            ]
+            if not entries:
+                break
+            for field, accessed in entries:
+                size = self._repo.discard_conversion(
+                    field=field, accessed_before=accessed
+                )
+                if size < 0:
+                    continue
+                path = os.path.join(self._config.folder_path, field)
+                if os.path.exists(path):
+                    os.remove(path)
+                freed += size
+                if self._repo.get_conversions_size() <= max_bytes:
+                    break
+        return freed
+
+    def lock(self, path: str, timeout: float) -> Lock:
+        return self._repo.lock(field=self._get_field(path=path), timeout=timeout)
+
+    def _get_field(self, path: str) -> str:
+        return os.path.relpath(path, self._config.folder_path)
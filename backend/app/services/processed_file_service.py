@@ -0,0 +1,415 @@
+import gzip
+import hashlib
+import io
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+from uuid import uuid4
+
+from redis.exceptions import LockNotOwnedError
+
+from starlette.datastructures import Headers
+from starlette.responses import Response, StreamingResponse
+
+from app.config import ExcelConfig, get_config
+from app.enum.download_format import DownloadFormat
+from app.enum.excel_engines import ExcelWriterEngine
+from app.services.columnar_store_service import ColumnarStoreService
+from app.services.excel_engines import ExcelWriter, get_writer
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.utils.http_range import parse_range
+from app.utils.processed_file_path import (
+    get_conversion_path,
+    get_processed_file_path,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    # Optional, without it the CSV variant is only offered gzip compressed
+    zstandard = None  # type: ignore
+
+
+@lru_cache(maxsize=4096)
+def _get_digest(path: str, inode: int, size: int, mtime_ns: int) -> str:
+    # Keyed by the file's identity, a rewritten file is hashed again
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProcessedFileService:
+    """
+    Serves processed results with strong content-hash ETags, conditional and
+    ranged requests. Every download format is converted once, from the
+    columnar copy of the result or from the processed file of results
+    without one, and kept next to it. Conversions are evicted least recently
+    downloaded first and converted again on their next request.
+    """
+
+    # Preferred first when the client accepts several
+    csv_encodings = {"zstd": "zst", "gzip": "gz"}
+    csv_chunk_size = 10_000
+    # Writers of the formats the writer engine does not produce itself
+    format_engines = {
+        DownloadFormat.XLSX: ExcelWriterEngine.OPENPYXL,
+        DownloadFormat.PARQUET: ExcelWriterEngine.PARQUET,
+        DownloadFormat.JSON: ExcelWriterEngine.JSON,
+    }
+
+    _locks: dict[str, threading.Lock] = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(
+        self,
+        config: ExcelConfig | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
+        self._config = config or get_config().excel
+        # Variants count against the retention budget of their task
+        self._file_index = file_index
+        self._writer = get_writer(engine=self._config.writer_engine)
+        self._columnar_store = ColumnarStoreService(config=self._config)
+
+    @property
+    def media_type(self) -> str:
+        return self._writer.media_type
+
+    def get_path(self, task_id: str) -> str:
+        return get_processed_file_path(config=self._config, task_id=task_id)
+
+    def exists(self, task_id: str) -> bool:
+        # The processed file, or the columnar copy it is converted from
+        return os.path.exists(self.get_path(task_id=task_id)) or (
+            self._columnar_store.exists(
+                manifest_path=self._columnar_store.get_manifest_path(task_id=task_id)
+            )
+        )
+
+    def touch(self, task_id: str) -> None:
+        # Downloads keep a result away from the retention janitor
+        if self._file_index is not None:
+            self._file_index.touch(member=task_id)
+
+    def get_etag(self, path: str) -> str:
+        stat = os.stat(path)
+        digest = _get_digest(path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return f'"{digest}"'
+
+    def get_media_type(self, format: DownloadFormat | None) -> str:
+        return self._get_format_writer(format=format).media_type
+
+    def materialize(self, task_id: str) -> str:
+        # The processed file, written from the columnar copy on first download
+        return self.get_format_path(task_id=task_id, format=None)
+
+    def get_format_path(self, task_id: str, format: DownloadFormat | None) -> str:
+        # Generated on first request, then served as a plain file
+        writer = self._get_format_writer(format=format)
+        path = get_conversion_path(
+            config=self._config, task_id=task_id, extension=writer.extension
+        )
+        manifest_path = self._columnar_store.get_manifest_path(task_id=task_id)
+        if path == self.get_path(task_id=task_id) and not self._columnar_store.exists(
+            manifest_path=manifest_path
+        ):
+            # Without a columnar copy the processed file is the result itself
+            return path
+
+        return self._generate(
+            task_id=task_id,
+            path=path,
+            write=lambda partial_path: writer.write(
+                dataframe=self._read_result(task_id=task_id), path=partial_path
+            ),
+        )
+
+    def get_csv_encoding(self, accept_encoding: str) -> str | None:
+        accepted = {
+            coding.split(";")[0].strip().lower()
+            for coding in accept_encoding.split(",")
+            if not coding.strip().endswith(";q=0")
+        }
+        for encoding in self.csv_encodings:
+            if encoding == "zstd" and zstandard is None:
+                continue
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def get_csv_variant_path(self, task_id: str, encoding: str) -> str:
+        root, _ = os.path.splitext(self.get_path(task_id=task_id))
+        return self._generate(
+            task_id=task_id,
+            path=f"{root}.csv.{self.csv_encodings[encoding]}",
+            write=lambda partial_path: self._write_compressed_csv(
+                task_id=task_id, path=partial_path, encoding=encoding
+            ),
+        )
+
+    def get_response(
+        self,
+        path: str,
+        headers: Headers,
+        method: str,
+        media_type: str,
+        filename: str,
+        extra_headers: dict[str, str] | None = None,
+    ) -> Response:
+        etag = self.get_etag(path=path)
+        size = os.path.getsize(path)
+        response_headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            **(extra_headers or {}),
+        }
+
+        if self._matches(etag=etag, header=headers.get("if-none-match")):
+            return Response(status_code=304, headers=response_headers)
+
+        # A stale If-Range means the client's partial copy is outdated
+        byte_range = None
+        range_header = headers.get("range")
+        if range_header and headers.get("if-range", etag) == etag:
+            byte_range = parse_range(header=range_header, size=size)
+
+        status_code = 200
+        start, end = 0, size - 1
+        if byte_range is not None:
+            status_code = 206
+            start, end = byte_range
+            response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response_headers["Content-Length"] = str(end - start + 1)
+
+        if method == "HEAD":
+            return Response(
+                status_code=status_code, headers=response_headers, media_type=media_type
+            )
+        return StreamingResponse(
+            self._iter_file(path=path, start=start, end=end),
+            status_code=status_code,
+            headers=response_headers,
+            media_type=media_type,
+        )
+
+    def get_decompressed_response(
+        self,
+        path: str,
+        headers: Headers,
+        method: str,
+        media_type: str,
+        filename: str,
+    ) -> Response:
+        # For clients accepting neither encoding, the gzip variant is inflated
+        # on the fly, so its length is unknown and ranges are not offered
+        etag = self.get_etag(path=path)[:-1] + '-identity"'
+        response_headers = {
+            "ETag": etag,
+            "Accept-Ranges": "none",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Vary": "Accept-Encoding",
+        }
+        if self._matches(etag=etag, header=headers.get("if-none-match")):
+            return Response(status_code=304, headers=response_headers)
+        if method == "HEAD":
+            return Response(headers=response_headers, media_type=media_type)
+        return StreamingResponse(
+            self._iter_decompressed(path=path),
+            headers=response_headers,
+            media_type=media_type,
+        )
+
+    def _generate(self, task_id: str, path: str, write: Callable[[str], None]) -> str:
+        if os.path.exists(path):
+            if self._file_index is not None:
+                self._file_index.touch_conversion(path=path)
+            return path
+
+        lock = self._get_lock(path=path)
+        with lock:
+            try:
+                with self._hold_shared_lock(path=path):
+                    if not os.path.exists(path):
+                        self._write_conversion(task_id=task_id, path=path, write=write)
+            finally:
+                self._release_lock(path=path, lock=lock)
+        return path
+
+    def _write_conversion(
+        self, task_id: str, path: str, write: Callable[[str], None]
+    ) -> None:
+        root, extension = os.path.splitext(path)
+        partial_path = f"{root}.{uuid4().hex}.part{extension}"
+        try:
+            write(partial_path)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        if self._file_index is not None:
+            self._file_index.track(member=task_id, path=path, conversion=True)
+            if self._config.conversion_cache_max_bytes:
+                self._file_index.evict_conversions(
+                    max_bytes=self._config.conversion_cache_max_bytes, keep=path
+                )
+
+    @contextmanager
+    def _hold_shared_lock(self, path: str) -> Iterator[None]:
+        # Other API processes and the workers wait for the conversion too
+        if self._file_index is None:
+            yield
+            return
+
+        lock = self._file_index.lock(
+            path=path, timeout=self._config.conversion_lock_timeout
+        )
+        lock.acquire()
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                # The conversion outlasted the lock, the file is complete anyway
+                pass
+
+    def _get_format_writer(self, format: DownloadFormat | None) -> ExcelWriter:
+        if format is None or format.value == self._writer.extension:
+            return self._writer
+        return get_writer(engine=self.format_engines[format])
+
+    def _read_result(self, task_id: str) -> "pd.DataFrame":
+        manifest_path = self._columnar_store.get_manifest_path(task_id=task_id)
+        if self._columnar_store.exists(manifest_path=manifest_path):
+            return self._columnar_store.read(manifest_path=manifest_path)
+
+        # pandas is imported on the first conversion, the API starts without it
+        import pandas as pd  # type: ignore
+
+        source_path = self.get_path(task_id=task_id)
+        extension = os.path.splitext(source_path)[1]
+        if extension == ".parquet":
+            dataframe = pd.read_parquet(source_path)
+        elif extension == ".csv":
+            dataframe = pd.read_csv(source_path, parse_dates=[self._config.column_date])
+        elif extension == ".json":
+            dataframe = pd.read_json(source_path, orient="records")
+        else:
+            dataframe = pd.read_excel(source_path)
+        if self._config.column_date in dataframe.columns:
+            dataframe = dataframe.set_index(self._config.column_date)
+        return dataframe
+
+    def _write_compressed_csv(self, task_id: str, path: str, encoding: str) -> None:
+        with self._open_compressed(path=path, encoding=encoding) as file:
+            manifest_path = self._columnar_store.get_manifest_path(task_id=task_id)
+            if self._columnar_store.exists(manifest_path=manifest_path):
+                text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+                try:
+                    self._columnar_store.read(manifest_path=manifest_path).to_csv(text)
+                    text.flush()
+                finally:
+                    text.detach()
+            else:
+                self._write_csv(source_path=self.get_path(task_id=task_id), file=file)
+
+    def _write_csv(self, source_path: str, file: Any) -> None:
+        text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        try:
+            extension = os.path.splitext(source_path)[1]
+            if extension == ".csv":
+                with open(source_path, encoding="utf-8", newline="") as source:
+                    for line in source:
+                        text.write(line)
+            elif extension == ".parquet":
+                # pandas and openpyxl are imported on the first conversion,
+                # the API process starts without them
+                import pandas as pd  # type: ignore
+
+                pd.read_parquet(source_path).to_csv(text)
+            else:
+                self._write_workbook_csv(source_path=source_path, text=text)
+            text.flush()
+        finally:
+            text.detach()
+
+    def _write_workbook_csv(self, source_path: str, text: io.TextIOBase) -> None:
+        import pandas as pd  # type: ignore
+        from openpyxl import load_workbook  # type: ignore
+
+        # Bounded memory, the workbook is read row by row in chunks
+        workbook = load_workbook(source_path, read_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            pd.DataFrame(columns=header).to_csv(text, index=False)
+            chunk: list[tuple] = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.csv_chunk_size:
+                    self._write_chunk(header=header, chunk=chunk, text=text)
+                    chunk = []
+            self._write_chunk(header=header, chunk=chunk, text=text)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _write_chunk(header: list, chunk: list[tuple], text: io.TextIOBase) -> None:
+        import pandas as pd  # type: ignore
+
+        if chunk:
+            pd.DataFrame(chunk, columns=header).to_csv(text, index=False, header=False)
+
+    def _open_compressed(self, path: str, encoding: str) -> Any:
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=10).stream_writer(
+                open(path, "wb"), closefd=True
+            )
+        return gzip.GzipFile(filename=path, mode="wb", compresslevel=6, mtime=0)
+
+    @staticmethod
+    def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @staticmethod
+    def _iter_decompressed(path: str) -> Iterator[bytes]:
+        with gzip.open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                yield chunk
+
+    @staticmethod
+    def _matches(etag: str, header: str | None) -> bool:
+        if not header:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in tags or etag in tags
+
+    @classmethod
+    def _get_lock(cls, path: str) -> threading.Lock:
+        # One generation per variant at a time within the process
+        with cls._locks_lock:
+            return cls._locks.setdefault(path, threading.Lock())
+
+    @classmethod
+    def _release_lock(cls, path: str, lock: threading.Lock) -> None:
+        # Later requests find the file, the lock is only needed while generating
+        with cls._locks_lock:
+            if cls._locks.get(path) is lock:
+                del cls._locks[path]
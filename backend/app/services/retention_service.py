@@ -0,0 +1,109 @@
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.config import ExcelConfig, get_config
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.services.admission_service import AdmissionService
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.upload_staging_service import UploadStagingService
+from app.utils.retention_report_dataclass import RetentionReport
+
+
+class RetentionService:
+    """
+    Janitor of the processed files folder and the logs table.
+
+    Files unread for the TTL are evicted first, then the least recently
+    downloaded ones until the folder fits the size budget. Logs past their
+    TTL are deleted in bounded batches, each in its own short transaction.
+    Staged uploads whose task was lost stop counting against the admission
+    control.
+    """
+
+    def __init__(
+        self,
+        file_index: ProcessedFileIndexService,
+        log_repo: ExcelHandleLogRepo,
+        result_cache: ExcelResultCacheService | None = None,
+        admission: AdmissionService | None = None,
+        staging_service: UploadStagingService | None = None,
+        config: ExcelConfig | None = None,
+    ):
+        self._file_index = file_index
+        self._log_repo = log_repo
+        self._result_cache = result_cache
+        self._admission = admission
+        self._staging_service = staging_service
+        self._config = config or get_config().excel
+
+    def run(self) -> RetentionReport:
+        report = RetentionReport()
+        self.evict_expired(report=report)
+        self.enforce_budget(report=report)
+        self.purge_logs(report=report)
+        self.reconcile_admission(report=report)
+        return report
+
+    def evict_expired(self, report: RetentionReport) -> None:
+        cutoff = time.time() - self._config.processed_file_ttl
+        while True:
+            entries = self._file_index.get_accessed_before(
+                accessed_before=cutoff, limit=self._config.retention_batch_size
+            )
+            if not entries:
+                return
+            for member, _ in entries:
+                self._evict(member=member, accessed_before=cutoff, report=report)
+
+    def enforce_budget(self, report: RetentionReport) -> None:
+        # The running total of the index, re-read as concurrent writes add to it
+        while (
+            self._file_index.get_total_size() > self._config.processed_files_max_bytes
+        ):
+            entries = self._file_index.get_least_recent(
+                limit=self._config.retention_batch_size
+            )
+            if not entries:
+                return
+            for member, accessed in entries:
+                # An entry downloaded since it was listed is skipped
+                self._evict(member=member, accessed_before=accessed, report=report)
+                if (
+                    self._file_index.get_total_size()
+                    <= self._config.processed_files_max_bytes
+                ):
+                    return
+
+    def purge_logs(self, report: RetentionReport) -> None:
+        created_before = datetime.utcnow() - timedelta(seconds=self._config.log_ttl)
+        batch_size = self._config.log_purge_batch_size
+        while True:
+            cache_keys = self._log_repo.delete_created_before(
+                created_before=created_before, limit=batch_size
+            )
+            report.purged_logs += len(cache_keys)
+
+            # The purged tasks no longer hold their cached results
+            if self._result_cache is not None:
+                for cache_key, count in Counter(filter(None, cache_keys)).items():
+                    self._result_cache.release(cache_key=cache_key, count=count)
+
+            if len(cache_keys) < batch_size:
+                return
+
+    def reconcile_admission(self, report: RetentionReport) -> None:
+        if self._admission is None or self._staging_service is None:
+            return
+        staging_service = self._staging_service
+        report.discarded_uploads += self._admission.reconcile(
+            is_staged=lambda key: os.path.exists(staging_service.get_path(key=key))
+        )
+
+    def _evict(self, member: str, accessed_before: float, report: RetentionReport):
+        freed = self._file_index.evict(member=member, accessed_before=accessed_before)
+        if freed >= 0:
+            report.evicted_files += 1
+            report.freed_bytes += freed
@@ -0,0 +1,184 @@
+import math
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from app.config import ExcelConfig, get_config
+from app.enum.series_aggregate import SeriesAggregate
+from app.enum.series_frequency import SeriesFrequency
+from app.exceptions.not_found_exception import NotFoundException
+from app.services.columnar_store_service import ColumnarStoreService
+from app.utils.mapped_series_dataclass import MappedSeries
+from app.utils.validate_uuid_format import validate_uuid_format
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@lru_cache(maxsize=64)
+def _map_series(
+    manifest_path: str,
+    inode: int,
+    mtime_ns: int,
+    column_date: str,
+    column_sales: str,
+) -> MappedSeries:
+    import numpy as np
+
+    # Keyed by the manifest's identity, a rewritten copy is mapped again. The
+    # columns come from the config of the calling service, the key holds them
+    table = ColumnarStoreService.read_table(manifest_path=manifest_path)
+    # Blank date cells are stored as nulls. Those rows have no place on the
+    # date axis and are left out, only a copy with nulls is filtered
+    if table is not None and table.column(column_date).null_count:
+        import pyarrow.compute as pc  # type: ignore
+
+        table = table.filter(pc.is_valid(table.column(column_date)))
+    if table is None or not table.num_rows:
+        return MappedSeries(
+            dates=np.array([], dtype="datetime64[ns]"),
+            values=np.array([], dtype=np.float64),
+            table=None,
+        )
+
+    dates = _to_numpy(column=table.column(column_date))
+    values = _to_numpy(column=table.column(column_sales))
+    # Uploads are usually in date order, others are sorted once when mapped
+    if len(dates) > 1 and not np.all(dates[1:] >= dates[:-1]):
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+    return MappedSeries(dates=dates, values=values, table=table)
+
+
+def _to_numpy(column: Any) -> "np.ndarray":
+    import numpy as np
+
+    # A view of the mapped segment, appended copies hold one chunk per segment
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return np.concatenate(
+        [chunk.to_numpy(zero_copy_only=True) for chunk in column.chunks]
+    )
+
+
+class SeriesService:
+    """
+    Date range queries and resampled sums or means over processed results,
+    read from the memory-mapped columnar copy instead of the workbook. The
+    last series queried stay mapped in the process, and a date range is cut
+    from them by binary search without a copy.
+    """
+
+    def __init__(self, config: ExcelConfig | None = None):
+        self._config = config or get_config().excel
+        self._columnar_store = ColumnarStoreService(config=self._config)
+
+    def get_series(
+        self,
+        task_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        resample: SeriesFrequency | None = None,
+        aggregate: SeriesAggregate = SeriesAggregate.SUM,
+    ) -> dict[str, Any]:
+        task_id = str(validate_uuid_format(string=task_id))
+        manifest_path = self._columnar_store.get_manifest_path(task_id=task_id)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            raise NotFoundException(
+                message=f"No series of the task with uuid={task_id}, it is not "
+                "processed, expired or has no columnar copy"
+            )
+
+        series = _map_series(
+            manifest_path,
+            stat.st_ino,
+            stat.st_mtime_ns,
+            self._config.column_date,
+            self._config.column_sales,
+        )
+        dates, values = self._slice(series=series, start=start, end=end)
+        if resample is not None:
+            dates, values = self._resample(
+                dates=dates, values=values, resample=resample, aggregate=aggregate
+            )
+        return {
+            "task_id": task_id,
+            "start": start,
+            "end": end,
+            "resample": resample.value if resample is not None else None,
+            "aggregate": aggregate.value if resample is not None else None,
+            "points": self._get_points(dates=dates, values=values),
+        }
+
+    def _slice(
+        self, series: MappedSeries, start: datetime | None, end: datetime | None
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        import numpy as np
+
+        # Both bounds are inclusive
+        first = 0
+        if start is not None:
+            first = int(
+                np.searchsorted(series.dates, self._to_datetime64(start), side="left")
+            )
+        last = len(series.dates)
+        if end is not None:
+            last = int(
+                np.searchsorted(series.dates, self._to_datetime64(end), side="right")
+            )
+        return series.dates[first:last], series.values[first:last]
+
+    @staticmethod
+    def _resample(
+        dates: "np.ndarray",
+        values: "np.ndarray",
+        resample: SeriesFrequency,
+        aggregate: SeriesAggregate,
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        import numpy as np
+
+        if not len(dates):
+            return dates, values
+
+        # Periods are labelled by their first day, weeks start on Monday
+        days = dates.astype("datetime64[D]")
+        if resample is SeriesFrequency.MONTH:
+            keys = dates.astype("datetime64[M]").astype("datetime64[D]")
+        elif resample is SeriesFrequency.WEEK:
+            # 1970-01-05, the fourth day of the epoch, was a Monday
+            offsets = (days.astype(np.int64) - 4) % 7
+            keys = days - offsets.astype("timedelta64[D]")
+        else:
+            keys = days
+
+        # Dates are sorted, so every period is one run of rows. Periods
+        # without rows are left out
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        known = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(known, values, 0.0), starts)
+        counts = np.add.reduceat(known.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results = sums if aggregate is SeriesAggregate.SUM else sums / counts
+        # Periods without a known value have none
+        return keys[starts], np.where(counts > 0, results, np.nan)
+
+    @staticmethod
+    def _get_points(dates: "np.ndarray", values: "np.ndarray") -> list[dict]:
+        return [
+            {"date": date, "value": None if math.isnan(value) else value}
+            for date, value in zip(
+                dates.astype("datetime64[us]").tolist(), values.tolist()
+            )
+        ]
+
+    @staticmethod
+    def _to_datetime64(value: datetime) -> "np.datetime64":
+        import numpy as np
+
+        # Stored dates are naive, aware bounds are compared in UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return np.datetime64(value, "ns")
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from celery import states  # type: ignore
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import PubSub
+
+
+class TaskNotificationService:
+    """
+    Wakes requests waiting for a task when the worker publishes its end.
+
+    Workers publish one message per finished task on a single channel. Each
+    API process holds one subscription to it and resolves the futures of the
+    requests waiting for that task, so idle waiters cost no Redis traffic.
+    """
+
+    channel = "excel-task-events"
+
+    def __init__(self, redis: AsyncRedis, backend: Any):
+        self._redis = redis
+        # Celery's result backend, for its key layout and serialization
+        self._backend = backend
+        self._waiters: dict[str, set[asyncio.Future]] = defaultdict(set)
+        self._pubsub: PubSub | None = None
+        self._listener: asyncio.Task | None = None
+
+    @classmethod
+    def publish(cls, client: Redis, task_id: str, status: str) -> None:
+        # Called by the worker once the result backend holds the final state
+        client.publish(cls.channel, json.dumps({"task_id": task_id, "status": status}))
+
+    @staticmethod
+    def is_ready(status: str) -> bool:
+        return status in states.READY_STATES
+
+    async def get_status(self, task_id: str) -> str:
+        # Same answer as AsyncResult.status without blocking the event loop
+        value = await self._redis.get(self._backend.get_key_for_task(task_id))
+        if value is None:
+            return states.PENDING
+        return self._backend.decode_result(value)["status"]
+
+    async def get_statuses(self, task_ids: list[str]) -> list[str]:
+        # One MGET for any number of tasks, in the order of `task_ids`
+        if not task_ids:
+            return []
+        values = await self._redis.mget(
+            [self._backend.get_key_for_task(task_id) for task_id in task_ids]
+        )
+        return [
+            states.PENDING
+            if value is None
+            else self._backend.decode_result(value)["status"]
+            for value in values
+        ]
+
+    async def wait(self, task_id: str, timeout: float) -> str:
+        # The status once the task is done, or the current one after `timeout`
+        async with self.subscribe(task_id=task_id) as waiter:
+            status = await self.get_status(task_id=task_id)
+            if self.is_ready(status=status):
+                return status
+            try:
+                return await asyncio.wait_for(waiter, timeout=timeout)
+            except asyncio.TimeoutError:
+                return await self.get_status(task_id=task_id)
+
+    @asynccontextmanager
+    async def subscribe(self, task_id: str) -> AsyncIterator[asyncio.Future]:
+        # Register before reading the status, so a task ending in between is seen
+        await self._ensure_listening()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[task_id].add(waiter)
+        try:
+            yield waiter
+        finally:
+            waiters = self._waiters.get(task_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[task_id]
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self._redis.aclose()
+
+    async def _ensure_listening(self) -> None:
+        # Started on first use and restarted if the subscription dropped
+        if self._listener is not None and not self._listener.done():
+            return
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub=self._pubsub))
+
+    async def _listen(self, pubsub: PubSub) -> None:
+        async for message in pubsub.listen():
+            event = json.loads(message["data"])
+            for waiter in self._waiters.pop(event["task_id"], set()):
+                if not waiter.done():
+                    waiter.set_result(event["status"])
@@ -0,0 +1,187 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+import traceback
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from app.config import ExcelConfig, get_config
+from app.exceptions.not_found_exception import NotFoundException
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.utils.processed_file_path import get_profile_paths
+
+
+class TaskProfilingService:
+    """
+    Runs flagged tasks under cProfile and tracemalloc, then saves the pstats
+    dump and a JSON summary of the slowest functions and the largest
+    allocation sites next to the processed file. Tasks that are not flagged
+    run without either.
+    """
+
+    # Allocations made by the tracing itself or by imports are left out
+    allocation_filters = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(
+        self,
+        config: ExcelConfig | None = None,
+        file_index: ProcessedFileIndexService | None = None,
+    ):
+        self._config = config or get_config().excel
+        # Profiles are evicted with the task's other files
+        self._file_index = file_index
+
+    def should_profile(self, requested: bool) -> bool:
+        # Asked for by the upload, or sampled from the other uploads
+        if requested:
+            return True
+        percent = self._config.profile_sample_percent
+        return percent > 0 and random.random() * 100 < percent
+
+    @contextmanager
+    def profile(self, task_id: str) -> Iterator[Callable[[str], None]]:
+        # Yields a checkpoint to call between stages: the allocation sites are
+        # those of the checkpoint holding the most memory, as the frames are
+        # freed by the time the task returns
+        largest: dict[str, Any] = {"size": -1, "stage": None, "snapshot": None}
+        profiler = cProfile.Profile()
+
+        def take_snapshot(stage: str) -> None:
+            size = tracemalloc.get_traced_memory()[0]
+            if size > largest["size"]:
+                largest.update(
+                    size=size, stage=stage, snapshot=tracemalloc.take_snapshot()
+                )
+
+        def checkpoint(stage: str) -> None:
+            # Snapshots are left out of the profile
+            profiler.disable()
+            try:
+                take_snapshot(stage=stage)
+            finally:
+                profiler.enable()
+
+        # A trace started by the caller, such as a benchmark, is left running
+        owns_trace = not tracemalloc.is_tracing()
+        if owns_trace:
+            tracemalloc.start(self._config.profile_traceback_frames)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield checkpoint
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - started
+            take_snapshot(stage="end")
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            if owns_trace:
+                tracemalloc.stop()
+
+            # A profile that cannot be saved never fails the task
+            try:
+                self._save(
+                    task_id=task_id,
+                    profiler=profiler,
+                    snapshot=largest["snapshot"],
+                    snapshot_stage=largest["stage"],
+                    seconds=seconds,
+                    peak_bytes=peak_bytes,
+                )
+            except Exception:
+                traceback.print_exc()
+
+    def get_summary(self, task_id: str) -> dict[str, Any]:
+        _, summary_path = get_profile_paths(config=self._config, task_id=task_id)
+        if not os.path.exists(summary_path):
+            raise NotFoundException(
+                message=f"No profile was captured for the task with uuid={task_id}"
+            )
+        with open(summary_path) as file:
+            return json.load(file)
+
+    def get_stats_path(self, task_id: str) -> str:
+        stats_path, _ = get_profile_paths(config=self._config, task_id=task_id)
+        if not os.path.exists(stats_path):
+            raise NotFoundException(
+                message=f"No profile was captured for the task with uuid={task_id}"
+            )
+        return stats_path
+
+    def _save(
+        self,
+        task_id: str,
+        profiler: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        snapshot_stage: str,
+        seconds: float,
+        peak_bytes: int,
+    ) -> None:
+        os.makedirs(self._config.folder_path, exist_ok=True)
+        stats_path, summary_path = get_profile_paths(
+            config=self._config, task_id=task_id
+        )
+        stats = pstats.Stats(profiler)
+        summary = {
+            "task_id": task_id,
+            "seconds": seconds,
+            "peak_bytes": peak_bytes,
+            "functions": self._get_functions(stats=stats),
+            "allocations_stage": snapshot_stage,
+            "allocations": self._get_allocations(snapshot=snapshot),
+        }
+
+        # Moved in place once complete, as the processed files are
+        profiler.dump_stats(f"{stats_path}.part")
+        os.replace(f"{stats_path}.part", stats_path)
+        with open(f"{summary_path}.part", "w") as file:
+            json.dump(summary, file)
+        os.replace(f"{summary_path}.part", summary_path)
+
+        if self._file_index is not None:
+            self._file_index.track(member=task_id, path=stats_path)
+            self._file_index.track(member=task_id, path=summary_path)
+
+    def _get_functions(self, stats: pstats.Stats) -> list[dict[str, Any]]:
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        functions = []
+        for function in stats.fcn_list[: self._config.profile_top_n]:  # type: ignore
+            primitive_calls, calls, total, cumulative, _ = stats.stats[  # type: ignore
+                function
+            ]
+            filename, line, name = function
+            functions.append(
+                {
+                    "function": name,
+                    "file": filename,
+                    "line": line,
+                    "calls": calls,
+                    "primitive_calls": primitive_calls,
+                    "total_seconds": total,
+                    "cumulative_seconds": cumulative,
+                }
+            )
+        return functions
+
+    def _get_allocations(self, snapshot: tracemalloc.Snapshot) -> list[dict[str, Any]]:
+        # Memory held at the checkpoint, by allocating line
+        statistics = snapshot.filter_traces(self.allocation_filters).statistics(
+            "lineno"
+        )
+        return [
+            {
+                "file": statistic.traceback[0].filename,
+                "line": statistic.traceback[0].lineno,
+                "size_bytes": statistic.size,
+                "count": statistic.count,
+            }
+            for statistic in statistics[: self._config.profile_top_n]
+        ]
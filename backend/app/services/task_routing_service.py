@@ -0,0 +1,152 @@
+import json
+import statistics
+import time
+from typing import Any
+
+from redis import Redis
+
+from app.config import ExcelConfig, get_config
+from app.utils.task_route_dataclass import TaskRoute
+from app.utils.workbook_dimension import get_sheet_max_row
+
+
+class TaskRoutingService:
+    """
+    Routes uploads to the small or the large queue, so one huge workbook does
+    not hold up hundreds of small files, and reports how long tasks wait in
+    each queue so the split can be tuned.
+    """
+
+    enqueued_header = "enqueued_at"
+    waits_key = "excel-queue-waits:{queue}"
+
+    def __init__(
+        self,
+        client: Redis,
+        transport_options: dict[str, Any],
+        config: ExcelConfig | None = None,
+    ):
+        # The broker's Redis, with the key layout of its priority queues
+        self._client = client
+        self._priority_steps: list[int] = transport_options["priority_steps"]
+        self._separator: str = transport_options["sep"]
+        self._config = config or get_config().excel
+
+    @property
+    def queues(self) -> list[str]:
+        return [self._config.small_task_queue, self._config.large_task_queue]
+
+    def get_route(
+        self, content_type: str, path: str, size: int, tenant_id: str | None = None
+    ) -> TaskRoute:
+        is_large = size > self._config.large_task_threshold_bytes
+        # Small .xlsx files may still hold many rows, .xls only go by size
+        if not is_large and content_type == self._config.mime_xlsx:
+            with open(path, "rb") as file:
+                rows = get_sheet_max_row(file=file)
+            is_large = (
+                rows is not None and rows > self._config.large_task_threshold_rows
+            )
+
+        return TaskRoute(
+            queue=(
+                self._config.large_task_queue
+                if is_large
+                else self._config.small_task_queue
+            ),
+            priority=self.get_priority(tenant_id=tenant_id),
+            is_large=is_large,
+        )
+
+    def get_priority(self, tenant_id: str | None) -> int:
+        if tenant_id is None:
+            return self._config.default_task_priority
+        return self._config.tenant_priorities.get(
+            tenant_id, self._config.default_task_priority
+        )
+
+    def get_headers(self) -> dict[str, float]:
+        # Read back by the worker to measure the time spent in the queue
+        return {self.enqueued_header: time.time()}
+
+    def record_wait(self, queue: str, enqueued_at: float) -> None:
+        key = self.waits_key.format(queue=queue)
+        pipeline = self._client.pipeline()
+        pipeline.lpush(key, time.time() - enqueued_at)
+        pipeline.ltrim(key, 0, self._config.queue_wait_samples - 1)
+        pipeline.execute()
+
+    def get_depths(self) -> dict[str, int]:
+        # Tasks waiting in each queue, over all of its priorities
+        pipeline = self._client.pipeline()
+        for queue in self.queues:
+            for priority in self._priority_steps:
+                pipeline.llen(self._get_priority_key(queue, priority))
+        depths = pipeline.execute()
+        steps = len(self._priority_steps)
+        return {
+            queue: sum(depths[index * steps : (index + 1) * steps])
+            for index, queue in enumerate(self.queues)
+        }
+
+    def get_stats(self) -> list[dict]:
+        now = time.time()
+        stats = []
+        for queue in self.queues:
+            keys = [
+                self._get_priority_key(queue, priority)
+                for priority in self._priority_steps
+            ]
+            pipeline = self._client.pipeline()
+            for key in keys:
+                pipeline.llen(key)
+            # Messages are pushed left and consumed right, the oldest is last
+            for key in keys:
+                pipeline.lindex(key, -1)
+            pipeline.lrange(self.waits_key.format(queue=queue), 0, -1)
+            results = pipeline.execute()
+
+            depths = results[: len(keys)]
+            oldest = [
+                self._get_enqueued_at(message=message)
+                for message in results[len(keys) : 2 * len(keys)]
+            ]
+            enqueued = [value for value in oldest if value is not None]
+            waits = sorted(float(wait) for wait in results[-1])
+
+            stats.append(
+                {
+                    "queue": queue,
+                    "depth": sum(depths),
+                    "depth_by_priority": {
+                        priority: depth
+                        for priority, depth in zip(self._priority_steps, depths)
+                        if depth
+                    },
+                    "oldest_wait": now - min(enqueued) if enqueued else None,
+                    "wait_p50": statistics.median(waits) if waits else None,
+                    "wait_p95": self._percentile(waits=waits, percent=95),
+                    "wait_samples": len(waits),
+                }
+            )
+        return stats
+
+    def _get_priority_key(self, queue: str, priority: int) -> str:
+        # Same naming as kombu's Redis transport, priority 0 is the bare queue
+        if priority:
+            return f"{queue}{self._separator}{priority}"
+        return queue
+
+    def _get_enqueued_at(self, message: bytes | None) -> float | None:
+        if message is None:
+            return None
+        headers = json.loads(message).get("headers", {})
+        value = headers.get(self.enqueued_header)
+        return float(value) if value is not None else None
+
+    @staticmethod
+    def _percentile(waits: list[float], percent: float) -> float | None:
+        if not waits:
+            return None
+        index = min(len(waits) - 1, round(percent / 100 * (len(waits) - 1)))
+        return waits[index]
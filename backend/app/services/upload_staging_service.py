@@ -0,0 +1,99 @@
+import hashlib
+import os
+from typing import IO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import ExcelConfig, get_config
+from app.exceptions.payload_too_large_exception import PayloadTooLargeException
+from app.utils.staged_upload_dataclass import StagedUpload
+
+
+class UploadStagingService:
+    def __init__(self, config: ExcelConfig | None = None):
+        self._config = config or get_config().excel
+
+    def get_path(self, key: str) -> str:
+        # Keys are plain file names inside the shared staging folder
+        return os.path.join(self._config.staging_path, os.path.basename(key))
+
+    def remove(self, key: str) -> None:
+        try:
+            os.remove(self.get_path(key=key))
+        except FileNotFoundError:
+            pass
+
+    def _get_log_too_large(self, size: int) -> str:
+        return (
+            f"Uploaded file is larger than {self._config.max_upload_size} bytes: "
+            f"{size} bytes"
+        )
+
+    async def stage(self, upload_file: UploadFile, task_id: str) -> StagedUpload:
+        # Reject early when the multipart part already reports its size
+        if (
+            upload_file.size is not None
+            and upload_file.size > self._config.max_upload_size
+        ):
+            raise PayloadTooLargeException(
+                message=self._get_log_too_large(size=upload_file.size)
+            )
+
+        os.makedirs(self._config.staging_path, exist_ok=True)
+        key = task_id
+        path = self.get_path(key=key)
+        partial_path = f"{path}.part"
+
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(partial_path, "wb") as staged_file:
+                # Stream the upload chunk by chunk instead of reading it at once
+                while chunk := await upload_file.read(self._config.upload_chunk_size):
+                    size += len(chunk)
+                    if size > self._config.max_upload_size:
+                        raise PayloadTooLargeException(
+                            message=self._get_log_too_large(size=size)
+                        )
+                    sha256.update(chunk)
+                    await run_in_threadpool(staged_file.write, chunk)
+
+            # Only complete uploads become visible to the workers
+            os.replace(partial_path, path)
+
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        return StagedUpload(key=key, size=size, sha256=sha256.hexdigest())
+
+    def stage_stream(self, stream: IO[bytes], task_id: str) -> StagedUpload:
+        # Blocking variant for streams that are not UploadFiles (archive members)
+        os.makedirs(self._config.staging_path, exist_ok=True)
+        key = task_id
+        path = self.get_path(key=key)
+        partial_path = f"{path}.part"
+
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(partial_path, "wb") as staged_file:
+                while chunk := stream.read(self._config.upload_chunk_size):
+                    size += len(chunk)
+                    if size > self._config.max_upload_size:
+                        raise PayloadTooLargeException(
+                            message=self._get_log_too_large(size=size)
+                        )
+                    sha256.update(chunk)
+                    staged_file.write(chunk)
+
+            os.replace(partial_path, path)
+
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        return StagedUpload(key=key, size=size, sha256=sha256.hexdigest())
@@ -1,52 +1,290 @@
+import time
 import traceback
-from typing import BinaryIO
+from dataclasses import asdict
+from typing import Any
 
-from celery import Celery  # type: ignore
+from celery.signals import (  # type: ignore
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+from redis.exceptions import LockNotOwnedError
 
 from app.config import get_config
 from app.db.session import create_db_session
 from app.db.setup import db_setup
+from app.repositories.excel_handle_logs_buffer import ExcelHandleLogBuffer
 from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.repositories.excel_result_cache_repo import ExcelResultCacheRepo
+from app.services.excel_batch_service import ExcelBatchService
 from app.services.excel_handle_service import ExcelHandleService
+from app.services.excel_metrics_service import ExcelMetricsService
+from app.services.excel_parallel_service import shutdown_executor
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.retention_service import RetentionService
+from app.services.task_routing_service import TaskRoutingService
+from app.services.task_notification_service import TaskNotificationService
+from app.services.upload_staging_service import UploadStagingService
+from app.tasks.celery_client import (
+    APPEND_EXCEL_FILE_TASK,
+    BUILD_EXCEL_BATCH_ARCHIVE_TASK,
+    PROCESS_EXCEL_FILE_TASK,
+    PROCESS_LARGE_EXCEL_FILE_TASK,
+    RUN_RETENTION_JANITOR_TASK,
+    celery_app,
+    get_admission,
+    get_file_index,
+    get_task_routing,
+)
+from app.tasks.excel_processing import process_excel_file
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
 
+# Worker only, the API sets its engines up in its lifespan
+db_setup()
+
+# Created lazily in the process running the tasks, prefork children included
+log_buffer: ExcelHandleLogBuffer | None = None
 
-def configure_redis_url() -> str:
-    redis_config = get_config().redis
-    if redis_config is None:
-        raise RuntimeError("Redis connection configuration is undefined")
 
-    broker_url = f"redis://{redis_config.host}:{redis_config.port}/{redis_config.db}"
-    return broker_url
+def get_log_buffer() -> ExcelHandleLogBuffer | None:
+    global log_buffer
+    excel_config = get_config().excel
+    if not excel_config.log_buffer_enabled:
+        return None
 
+    if log_buffer is None:
+        log_buffer = ExcelHandleLogBuffer(
+            session_factory=create_db_session,
+            size=excel_config.log_buffer_size,
+            flush_interval=excel_config.log_buffer_flush_interval,
+        )
+        log_buffer.start()
+    return log_buffer
 
-redis_url = configure_redis_url()
 
-celery_app = Celery(main="worker", broker=redis_url, backend=redis_url)
-db_setup()
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_log_buffer(**kwargs):
+    # Pending logs are written before the worker (or pool process) exits
+    if log_buffer is not None:
+        log_buffer.close()
+
+
+@worker_shutdown.connect
+def shutdown_partition_pool(**kwargs):
+    # Stops the processes of parallel partitioned processing, if started
+    shutdown_executor()
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    # Started once in the main worker process, before any pool process
+    port = get_config().excel.metrics_worker_port
+    if port is None:
+        return
+    try:
+        ExcelMetricsService.start_exporter(
+            port=port, address=get_config().excel.metrics_worker_address
+        )
+    except OSError:
+        # Another worker on this host already serves the port
+        traceback.print_exc()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid: int, **kwargs):
+    ExcelMetricsService.mark_process_dead(pid=pid)
 
 
-@celery_app.task
+def get_task_metrics(request: Any) -> ExcelHandleMetrics:
+    # Queue and time in queue of the task, from the headers set by the API
+    metrics = ExcelHandleMetrics(queue=(request.delivery_info or {}).get("routing_key"))
+    enqueued_at = getattr(request, TaskRoutingService.enqueued_header, None)
+    if enqueued_at is not None:
+        metrics.queue_wait_seconds = max(0.0, time.time() - float(enqueued_at))
+    return metrics
+
+
+@celery_app.task(name=PROCESS_EXCEL_FILE_TASK, bind=True)
 def process_excel_file_task(
+    self,
+    task_id: str,
+    filename: str,
+    content_type: str,
+    file_key: str,
+    file_size: int,
+    file_sha256: str,
+    cache_key: str | None = None,
+    profile: bool = False,
+):
+    process_excel_file(
+        task_id,
+        filename,
+        content_type,
+        file_key,
+        file_size,
+        file_sha256,
+        cache_key,
+        metrics=get_task_metrics(request=self.request),
+        profile=profile,
+        log_buffer=get_log_buffer(),
+    )
+
+
+@celery_app.task(
+    name=PROCESS_LARGE_EXCEL_FILE_TASK,
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def process_large_excel_file_task(
+    self,
     task_id: str,
     filename: str,
     content_type: str,
-    file: BinaryIO,
+    file_key: str,
+    file_size: int,
+    file_sha256: str,
+    cache_key: str | None = None,
+    profile: bool = False,
 ):
+    # Acknowledged once finished, a worker lost mid-task hands it to another one
+    process_excel_file(
+        task_id,
+        filename,
+        content_type,
+        file_key,
+        file_size,
+        file_sha256,
+        cache_key,
+        metrics=get_task_metrics(request=self.request),
+        profile=profile,
+        log_buffer=get_log_buffer(),
+    )
+
+
+def append_excel_file(
+    task_id: str,
+    parent_task_id: str,
+    filename: str,
+    content_type: str,
+    file_key: str,
+    metrics: ExcelHandleMetrics | None = None,
+):
+    # Merges a delta sheet into the columnar copy of the parent's result
+    staging_service = UploadStagingService()
+    metrics = metrics or ExcelHandleMetrics()
     session = create_db_session()
     try:
-        service = ExcelHandleService(repo=ExcelHandleLogRepo(session=session))
-
-        service.process_file(
-            task_id=task_id,
-            filename=filename,
-            content_type=content_type,
-            file=file,
+        service = ExcelHandleService(
+            repo=ExcelHandleLogRepo(session=session),
+            log_buffer=get_log_buffer(),
+            file_index=get_file_index(),
         )
-        session.commit()
+        with open(staging_service.get_path(key=file_key), "rb") as file:
+            log = service.append_file(
+                task_id=task_id,
+                parent_task_id=parent_task_id,
+                filename=filename,
+                content_type=content_type,
+                file=file,
+                metrics=metrics,
+            )
+        ExcelMetricsService.observe(metrics=metrics, status=log.status)
 
-    except Exception as e:
+    except Exception:
         traceback.print_exc()
         session.rollback()
 
     finally:
         session.close()
+        # Released first, the janitor drops entries whose staged file is gone
+        get_admission().release(key=file_key)
+        staging_service.remove(key=file_key)
+
+
+@celery_app.task(name=APPEND_EXCEL_FILE_TASK, bind=True)
+def append_excel_file_task(
+    self,
+    task_id: str,
+    parent_task_id: str,
+    filename: str,
+    content_type: str,
+    file_key: str,
+):
+    append_excel_file(
+        task_id,
+        parent_task_id,
+        filename,
+        content_type,
+        file_key,
+        metrics=get_task_metrics(request=self.request),
+    )
+
+
+@task_prerun.connect(sender=process_excel_file_task)
+@task_prerun.connect(sender=process_large_excel_file_task)
+@task_prerun.connect(sender=append_excel_file_task)
+def record_queue_wait(task, **kwargs):
+    # Time between the upload and the start of the task, for the queue stats
+    enqueued_at = getattr(task.request, TaskRoutingService.enqueued_header, None)
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    if enqueued_at is not None and queue:
+        get_task_routing().record_wait(queue=queue, enqueued_at=float(enqueued_at))
+
+
+@task_postrun.connect(sender=process_excel_file_task)
+@task_postrun.connect(sender=process_large_excel_file_task)
+@task_postrun.connect(sender=append_excel_file_task)
+def publish_task_finished(task_id: str, state: str, **kwargs):
+    # Sent after the result backend stored the state, so woken waiters read it
+    TaskNotificationService.publish(
+        client=celery_app.backend.client, task_id=task_id, status=state
+    )
+
+
+@celery_app.task(name=BUILD_EXCEL_BATCH_ARCHIVE_TASK)
+def build_excel_batch_archive_task(batch_id: str, task_ids: list[str]):
+    # Chord body of a batch upload, runs once every task of the batch finished
+    batch_service = ExcelBatchService(
+        staging_service=UploadStagingService(), file_index=get_file_index()
+    )
+    batch_service.build_archive(batch_id=batch_id, task_ids=task_ids)
+
+
+@celery_app.task(name=RUN_RETENTION_JANITOR_TASK)
+def run_retention_janitor_task():
+    # Scheduled by Celery beat, a run still going makes the next one a no-op
+    excel_config = get_config().excel
+    lock = celery_app.backend.client.lock(
+        "excel-retention-janitor", timeout=excel_config.retention_interval
+    )
+    if not lock.acquire(blocking=False):
+        return None
+
+    session = create_db_session()
+    try:
+        log_repo = ExcelHandleLogRepo(session=session)
+        file_index = get_file_index()
+        retention_service = RetentionService(
+            file_index=file_index,
+            log_repo=log_repo,
+            result_cache=ExcelResultCacheService(
+                repo=ExcelResultCacheRepo(session=session),
+                log_repo=log_repo,
+                file_index=file_index,
+            ),
+            admission=get_admission(),
+            staging_service=UploadStagingService(),
+        )
+        return asdict(retention_service.run())
+
+    finally:
+        session.close()
+        try:
+            lock.release()
+        except LockNotOwnedError:
+            # The run outlasted the lock, another one may have started since
+            pass
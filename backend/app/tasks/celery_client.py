@@ -0,0 +1,72 @@
+from celery import Celery  # type: ignore
+
+from app.config import get_config
+from app.repositories.admission_repo import AdmissionRepo
+from app.repositories.processed_file_index_repo import ProcessedFileIndexRepo
+from app.services.admission_service import AdmissionService
+from app.services.processed_file_index_service import ProcessedFileIndexService
+from app.services.task_routing_service import TaskRoutingService
+
+# The API publishes the tasks by these names, the worker registers them under
+# the same ones in app.tasks.celery_app, so neither imports the other's code
+PROCESS_EXCEL_FILE_TASK = "app.tasks.celery_app.process_excel_file_task"
+PROCESS_LARGE_EXCEL_FILE_TASK = "app.tasks.celery_app.process_large_excel_file_task"
+APPEND_EXCEL_FILE_TASK = "app.tasks.celery_app.append_excel_file_task"
+BUILD_EXCEL_BATCH_ARCHIVE_TASK = "app.tasks.celery_app.build_excel_batch_archive_task"
+RUN_RETENTION_JANITOR_TASK = "app.tasks.celery_app.run_retention_janitor_task"
+
+
+def configure_redis_url() -> str:
+    redis_config = get_config().redis
+    if redis_config is None:
+        raise RuntimeError("Redis connection configuration is undefined")
+
+    broker_url = f"redis://{redis_config.host}:{redis_config.port}/{redis_config.db}"
+    return broker_url
+
+
+redis_url = configure_redis_url()
+
+celery_app = Celery(main="worker", broker=redis_url, backend=redis_url)
+# Priorities 0 (first) to 9 (last) get their own Redis list per queue, and a
+# task of the large queue is redelivered only once its visibility timeout passed
+celery_app.conf.broker_transport_options = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+    "visibility_timeout": get_config().excel.broker_visibility_timeout,
+}
+celery_app.conf.task_routes = {
+    PROCESS_EXCEL_FILE_TASK: {"queue": get_config().excel.small_task_queue},
+    PROCESS_LARGE_EXCEL_FILE_TASK: {"queue": get_config().excel.large_task_queue},
+    APPEND_EXCEL_FILE_TASK: {"queue": get_config().excel.small_task_queue},
+}
+celery_app.conf.beat_schedule = {
+    "retention-janitor": {
+        "task": RUN_RETENTION_JANITOR_TASK,
+        "schedule": get_config().excel.retention_interval,
+    },
+}
+
+
+def get_file_index() -> ProcessedFileIndexService:
+    # The index lives next to the task results, on the result backend's pool
+    return ProcessedFileIndexService(
+        repo=ProcessedFileIndexRepo(client=celery_app.backend.client)
+    )
+
+
+def get_task_routing() -> TaskRoutingService:
+    # Broker and result backend share one Redis, and its connection pool
+    return TaskRoutingService(
+        client=celery_app.backend.client,
+        transport_options=celery_app.conf.broker_transport_options,
+    )
+
+
+def get_admission() -> AdmissionService:
+    # Queue depths come from the broker, the other state from the same Redis
+    return AdmissionService(
+        repo=AdmissionRepo(client=celery_app.backend.client),
+        routing=get_task_routing(),
+    )
@@ -0,0 +1,86 @@
+import traceback
+from contextlib import nullcontext
+
+from app.db.session import create_db_session
+from app.repositories.excel_handle_logs_buffer import ExcelHandleLogBuffer
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+from app.repositories.excel_result_cache_repo import ExcelResultCacheRepo
+from app.services.excel_handle_service import ExcelHandleService
+from app.services.excel_metrics_service import ExcelMetricsService
+from app.services.excel_result_cache_service import ExcelResultCacheService
+from app.services.task_profiling_service import TaskProfilingService
+from app.services.upload_staging_service import UploadStagingService
+from app.tasks.celery_client import get_admission, get_file_index
+from app.utils.excel_handle_log_dataclass import LogMinor
+from app.utils.excel_handle_metrics_dataclass import ExcelHandleMetrics
+
+# Shared by the worker tasks and the inline fast path of the API, so a small
+# upload processed by the API leaves the same files and log as a task would
+
+
+def process_excel_file(
+    task_id: str,
+    filename: str,
+    content_type: str,
+    file_key: str,
+    file_size: int,
+    file_sha256: str,
+    cache_key: str | None = None,
+    metrics: ExcelHandleMetrics | None = None,
+    profile: bool = False,
+    log_buffer: ExcelHandleLogBuffer | None = None,
+) -> LogMinor | None:
+    # The upload itself stays in the staging folder, the message carries its key
+    log = None
+    staging_service = UploadStagingService()
+    metrics = metrics or ExcelHandleMetrics()
+    session = create_db_session()
+    try:
+        log_repo = ExcelHandleLogRepo(session=session)
+        file_index = get_file_index()
+        result_cache = ExcelResultCacheService(
+            repo=ExcelResultCacheRepo(session=session),
+            log_repo=log_repo,
+            file_index=file_index,
+        )
+        service = ExcelHandleService(
+            repo=log_repo,
+            result_cache=result_cache,
+            log_buffer=log_buffer,
+            file_index=file_index,
+        )
+
+        # Unflagged tasks run without the profiler, at no cost
+        profiling = (
+            TaskProfilingService(file_index=file_index).profile(task_id=task_id)
+            if profile
+            else nullcontext()
+        )
+        with open(staging_service.get_path(key=file_key), "rb") as file:
+            with profiling as checkpoint:
+                metrics.on_stage = checkpoint
+                log = service.process_file(
+                    task_id=task_id,
+                    filename=filename,
+                    content_type=content_type,
+                    file=file,
+                    cache_key=cache_key,
+                    metrics=metrics,
+                )
+        ExcelMetricsService.observe(metrics=metrics, status=log.status)
+
+        # Later identical uploads are linked to this result
+        if cache_key is not None:
+            result_cache.register(cache_key=cache_key, task_id=task_id, log=log)
+
+    except Exception:
+        traceback.print_exc()
+        session.rollback()
+
+    finally:
+        session.close()
+        # Counts as drained for the admission control of the uploads. Released
+        # first, the janitor drops entries whose staged file is gone
+        get_admission().release(key=file_key)
+        staging_service.remove(key=file_key)
+    return log
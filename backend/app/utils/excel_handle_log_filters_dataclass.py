@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.enum.excel_handle_errors import ExcelHandleError
+from app.enum.excel_handle_status import ExcelHandleStatus
+
+
+@dataclass
+class ExcelHandleLogFilters:
+    status: ExcelHandleStatus | None = None
+    error_type: ExcelHandleError | None = None
+    filename_prefix: str | None = None
+    # Naive UTC bounds, created_from is inclusive and created_to exclusive
+    created_from: datetime | None = None
+    created_to: datetime | None = None
@@ -0,0 +1,33 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+
+@dataclass
+class ExcelHandleMetrics:
+    # Seconds per pipeline stage: parse, validate, interpolate, write and log
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    # Every stage before the log insert
+    processing_seconds: float | None = None
+    rows: int | None = None
+    input_bytes: int | None = None
+    output_bytes: int | None = None
+    queue: str | None = None
+    queue_wait_seconds: float | None = None
+    # Called with the stage name once a stage finished, such as by a profiler
+    on_stage: Callable[[str], None] | None = field(default=None, repr=False)
+
+    def add(self, stage: str, seconds: float) -> None:
+        # Stages of the same name, such as the validators, add up
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage=stage, seconds=time.perf_counter() - started)
+            if self.on_stage is not None:
+                self.on_stage(stage)
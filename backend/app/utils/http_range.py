@@ -0,0 +1,33 @@
+from app.exceptions.range_not_satisfiable_exception import (
+    RangeNotSatisfiableException,
+)
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    # Returns the inclusive (start, end) of a single "bytes=" range, None to
+    # send the whole file, which is also the answer to multi-range requests
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if not first:
+            # "bytes=-N" asks for the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiableException(
+                    message=f"Requested range not satisfiable: {header}", size=size
+                )
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise RangeNotSatisfiableException(
+            message=f"Requested range not satisfiable: {header}", size=size
+        )
+    return start, min(end, size - 1)
@@ -0,0 +1,21 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+
+from app.exceptions.invalid_cursor_exception import InvalidCursorException
+
+
+def encode_cursor(created_date: datetime, uuid: UUID) -> str:
+    # Opaque to clients, it only carries the sort key of the last row of a page
+    payload = json.dumps([created_date.isoformat(), str(uuid)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_date, uuid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_date), UUID(uuid)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursorException(message=f"Requested malformed cursor: {cursor}")
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class LinearInterpolationCarry:
+    """
+    Chunk-by-chunk equivalent of Series.interpolate(method="linear").
+
+    Carries the last known point and the pending NaN run between chunks, so
+    values are bit-identical to interpolating the whole column at once:
+    leading NaNs stay NaN, inner runs use np.interp between the surrounding
+    known points and trailing NaNs take the last known value.
+    """
+
+    def __init__(self, start: int = 0):
+        self._position = start
+        self._last_position: int | None = None
+        self._last_value: float | None = None
+        self._pending_keys: list[np.ndarray] = []
+        self._pending_size = 0
+
+    @property
+    def pending_size(self) -> int:
+        return self._pending_size
+
+    def push(
+        self, keys: np.ndarray, values: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Returns the rows that are final, pending rows are held back in order
+        values = np.asarray(values, dtype="float64")
+        positions = np.arange(self._position, self._position + len(values))
+        self._position += len(values)
+
+        known = np.flatnonzero(~np.isnan(values))
+        if len(known) == 0:
+            if self._last_position is None:
+                # Leading NaNs have nothing to interpolate from
+                return keys, values
+            self._hold(keys=keys)
+            return keys[:0], values[:0]
+
+        last_known = known[-1]
+        ready_keys = keys[: last_known + 1]
+        ready_values = values[: last_known + 1].copy()
+
+        xp = positions[known]
+        fp = values[known]
+        if self._last_position is not None:
+            xp = np.concatenate((np.array([self._last_position]), xp))
+            fp = np.concatenate((np.array([self._last_value]), fp))
+
+        # NaNs before the first known point ever seen are leading NaNs
+        first_fillable = 0 if self._last_position is not None else known[0]
+        missing = np.flatnonzero(np.isnan(ready_values[first_fillable:]))
+        missing += first_fillable
+        ready_values[missing] = np.interp(positions[missing], xp, fp)
+
+        if self._pending_size:
+            pending_positions = np.arange(
+                positions[0] - self._pending_size, positions[0]
+            )
+            pending_keys = np.concatenate(self._pending_keys)
+            pending_values = np.interp(pending_positions, xp, fp)
+            ready_keys = np.concatenate((pending_keys, ready_keys))
+            ready_values = np.concatenate((pending_values, ready_values))
+            self._pending_keys = []
+            self._pending_size = 0
+
+        self._last_position = int(positions[last_known])
+        self._last_value = float(values[last_known])
+
+        if last_known + 1 < len(values):
+            self._hold(keys=keys[last_known + 1 :])
+        return ready_keys, ready_values
+
+    def finish(self) -> tuple[np.ndarray, np.ndarray]:
+        # Trailing NaNs are filled with the last known value, as np.interp does
+        if not self._pending_size:
+            return np.array([]), np.array([], dtype="float64")
+
+        keys = np.concatenate(self._pending_keys)
+        values = np.full(self._pending_size, self._last_value, dtype="float64")
+        self._pending_keys = []
+        self._pending_size = 0
+        return keys, values
+
+    def _hold(self, keys: np.ndarray) -> None:
+        self._pending_keys.append(keys)
+        self._pending_size += len(keys)
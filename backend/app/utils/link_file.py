@@ -0,0 +1,13 @@
+import os
+import shutil
+
+
+def link_file(source: str, target: str) -> None:
+    # Hard links share the bytes but not the lifetime of a single name
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class MappedSeries:
+    # Dates in ascending order and the sales of each, views of the memory
+    # mapped segments unless a copy was needed to combine or sort them
+    dates: "np.ndarray"
+    values: "np.ndarray"
+    # Keeps the mapping, and the segments' files, open while in use
+    table: Any
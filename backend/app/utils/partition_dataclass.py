@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class SharedColumn:
+    # A column in a shared memory block: a NumPy buffer, or an Arrow IPC stream
+    name: str
+    kind: str
+    dtype: str
+    length: int
+
+
+@dataclass
+class PartitionTask:
+    start: int
+    stop: int
+    dates: SharedColumn | None
+    sales: SharedColumn
+    dates_out: SharedColumn | None
+    sales_out: SharedColumn
+
+
+@dataclass
+class PartitionResult:
+    # First invalid row of the partition, by absolute position
+    invalid_row: int | None = None
+    invalid_date: bool = False
+    # Known points at both ends, to stitch NaN runs across partitions
+    first_known: tuple[int, float] | None = None
+    last_known: tuple[int, float] | None = None
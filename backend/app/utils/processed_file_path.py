@@ -0,0 +1,49 @@
+import os
+
+from app.config import ExcelConfig
+from app.services.columnar_store_service import ColumnarStoreService
+from app.services.excel_engines import get_writer
+
+
+def get_processed_file_path(config: ExcelConfig, task_id: str) -> str:
+    # The extension follows the configured writer engine
+    writer = get_writer(engine=config.writer_engine)
+    return os.path.join(config.folder_path, f"{task_id}.{writer.extension}")
+
+
+def get_conversion_path(config: ExcelConfig, task_id: str, extension: str) -> str:
+    # The format of the writer engine is the processed file itself
+    processed_file_path = get_processed_file_path(config=config, task_id=task_id)
+    root, processed_extension = os.path.splitext(processed_file_path)
+    if processed_extension == f".{extension}":
+        return processed_file_path
+    return f"{root}.{extension}"
+
+
+def get_processed_variant_paths(config: ExcelConfig, task_id: str) -> list[str]:
+    # The processed file, the conversions and compressed CSV copies served
+    # next to it, the profile of the task, if one was captured, and its
+    # columnar copy
+    processed_file_path = get_processed_file_path(config=config, task_id=task_id)
+    root, _ = os.path.splitext(processed_file_path)
+    columnar_store = ColumnarStoreService(config=config)
+    conversion_paths = {
+        get_conversion_path(config=config, task_id=task_id, extension=extension)
+        for extension in ("xlsx", "parquet", "json")
+    }
+    return [
+        processed_file_path,
+        *sorted(conversion_paths - {processed_file_path}),
+        f"{root}.csv.zst",
+        f"{root}.csv.gz",
+        *get_profile_paths(config=config, task_id=task_id),
+        *columnar_store.get_paths(
+            manifest_path=columnar_store.get_manifest_path(task_id=task_id)
+        ),
+    ]
+
+
+def get_profile_paths(config: ExcelConfig, task_id: str) -> tuple[str, str]:
+    # The pstats dump of a profiled task and the JSON summary of it
+    root, _ = os.path.splitext(get_processed_file_path(config=config, task_id=task_id))
+    return f"{root}.pstats", f"{root}.profile.json"
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class RetentionReport:
+    evicted_files: int = 0
+    freed_bytes: int = 0
+    purged_logs: int = 0
+    discarded_uploads: int = 0
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class StagedUpload:
+    key: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class StagedBatchItem:
+    task_id: str
+    filename: str
+    content_type: str
+    staged_upload: StagedUpload
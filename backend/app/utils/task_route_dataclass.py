@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class TaskRoute:
+    queue: str
+    priority: int
+    is_large: bool
@@ -0,0 +1,20 @@
+from typing import BinaryIO
+
+
+def get_sheet_max_row(file: BinaryIO) -> int | None:
+    # Imported on first use, the API routes uploads without loading openpyxl
+    # at startup
+    from openpyxl import load_workbook  # type: ignore
+
+    # The row count comes from the sheet dimension, no rows are parsed
+    try:
+        workbook = load_workbook(file, read_only=True)
+        try:
+            return workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+    except Exception:
+        # Unreadable files are reported by the processing pipeline
+        return None
+    finally:
+        file.seek(0)
@@ -0,0 +1,125 @@
+"""
+Load test: status poll latency while /excel-logs queries are in flight.
+
+Measures GET /excel-task/status/{task_id} latencies first on an idle API and
+then while `--log-clients` clients keep requesting large /excel-logs pages.
+With the async DB layer the p99 of the polls should stay flat.
+
+Start the API (one worker, so every request shares one event loop), then run
+from the backend directory:
+
+    uvicorn app.api.main:app --workers 1
+    python -m benchmarks.async_db_load_benchmark --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+
+
+def percentile(latencies: list[float], percent: float) -> float:
+    ordered = sorted(latencies)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    milliseconds = [latency * 1000 for latency in latencies]
+    print(
+        f"{name:<14} n={len(milliseconds):<6} "
+        f"p50={statistics.median(milliseconds):7.2f}ms "
+        f"p95={percentile(milliseconds, 95):7.2f}ms "
+        f"p99={percentile(milliseconds, 99):7.2f}ms "
+        f"max={max(milliseconds):7.2f}ms"
+    )
+
+
+async def poll_status(
+    client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]
+) -> None:
+    task_id = str(uuid4())
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(f"/excel-task/status/{task_id}")
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def query_logs(
+    client: httpx.AsyncClient, stop: asyncio.Event, page_size: int, count: list[int]
+) -> None:
+    cursor = None
+    while not stop.is_set():
+        params: dict[str, str | int] = {"limit": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/excel-logs", params=params)
+        response.raise_for_status()
+        cursor = response.json()["next_cursor"]
+        count[0] += 1
+
+
+async def run_phase(
+    url: str, duration: float, pollers: int, log_clients: int, page_size: int
+) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    log_requests = [0]
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=pollers + log_clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        tasks = [
+            asyncio.create_task(poll_status(client, stop, latencies))
+            for _ in range(pollers)
+        ]
+        tasks += [
+            asyncio.create_task(query_logs(client, stop, page_size, log_requests))
+            for _ in range(log_clients)
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return latencies, log_requests[0]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    idle, _ = await run_phase(
+        url=args.url,
+        duration=args.duration,
+        pollers=args.pollers,
+        log_clients=0,
+        page_size=args.page_size,
+    )
+    loaded, log_requests = await run_phase(
+        url=args.url,
+        duration=args.duration,
+        pollers=args.pollers,
+        log_clients=args.log_clients,
+        page_size=args.page_size,
+    )
+
+    print(
+        f"pollers={args.pollers} log_clients={args.log_clients} "
+        f"page_size={args.page_size} duration={args.duration}s"
+    )
+    report("status idle", idle)
+    report("status loaded", loaded)
+    print(f"/excel-logs pages served under load: {log_requests}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--log-clients", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: reader and writer engines on a typical Date/Sales sheet.
+
+Run from the backend directory (engines extra installed):
+
+    python -m benchmarks.engines_benchmark --rows 100000
+"""
+import argparse
+import io
+import os
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from app.enum.excel_engines import ExcelReaderEngine, ExcelWriterEngine
+from app.services.excel_engines import get_reader, get_writer
+
+
+def make_dataframe(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed=42)
+    sales = rng.uniform(100, 1000, size=rows).round(2)
+    sales[::10] = np.nan
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range("2000-01-01", periods=rows, freq="D"),
+            "Sales": sales,
+        }
+    )
+
+
+def measure(function, repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dataframe = make_dataframe(rows=args.rows)
+    uploaded = io.BytesIO()
+    dataframe.to_excel(uploaded, index=False)
+    content = uploaded.getvalue()
+
+    print(f"rows={args.rows} xlsx={len(content)} bytes")
+    for reader_engine in ExcelReaderEngine:
+        reader = get_reader(engine=reader_engine)
+        try:
+            seconds = measure(
+                lambda: reader.read(file=io.BytesIO(content)), repeat=args.repeat
+            )
+        except ImportError as error:
+            print(f"read  {reader_engine.value:<11} skipped: {error}")
+            continue
+        print(f"read  {reader_engine.value:<11} {seconds:.4f}s")
+
+    processed = dataframe.set_index("Date")
+    with tempfile.TemporaryDirectory() as folder:
+        for writer_engine in ExcelWriterEngine:
+            writer = get_writer(engine=writer_engine)
+            path = os.path.join(folder, f"processed.{writer.extension}")
+            try:
+                seconds = measure(
+                    lambda: writer.write(dataframe=processed, path=path),
+                    repeat=args.repeat,
+                )
+            except ImportError as error:
+                print(f"write {writer_engine.value:<11} skipped: {error}")
+                continue
+            size = os.path.getsize(path)
+            print(f"write {writer_engine.value:<11} {seconds:.4f}s {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Benchmark: ExcelHandleService.process_file and validate_and_get_log, stage
+by stage, on generated Date/Sales workbooks.
+
+Every scenario (format x rows x gap density x invalid row) is generated by
+benchmarks.workbook_generator and run `--repeat` times, the median of each
+stage is kept. One more run under tracemalloc records the peak memory of
+the whole call and of each stage; allocations of the parallel pool's
+processes are not traced. Logs go to an in-memory repo, nothing needs
+Postgres or Redis.
+
+Results are written as JSON. Given a baseline from an earlier run, any
+timing or peak more than `--threshold` above it is reported and the exit
+status is 1, as it is when a scenario was skipped for a missing dependency
+(.xls workbooks need xlwt and xlrd, from the dev dependencies). Run from
+the backend directory:
+
+    python -m benchmarks.handle_service_benchmark --output baseline.json
+    python -m benchmarks.handle_service_benchmark --baseline baseline.json \
+        --output current.json
+    python -m benchmarks.handle_service_benchmark --rows 1000000 5000000 \
+        --format xlsx --invalid-row none --no-memory
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from app.config import ExcelConfig
+from app.enum.excel_engines import ExcelReaderEngine, ExcelWriterEngine
+from app.services.excel_handle_service import ExcelHandleService
+from app.services.excel_pipeline import (
+    ExcelPipeline,
+    ExcelPipelineStage,
+    ExcelProcessingContext,
+    LoadStage,
+    LogStage,
+    PartitionStage,
+    StreamStage,
+    TransformStage,
+    ValidatorStage,
+    WriteStage,
+)
+from app.utils.excel_handle_log_dataclass import LogMinor
+from benchmarks.in_memory_log_repo import InMemoryExcelHandleLogRepo
+from benchmarks.workbook_generator import (
+    FORMATS,
+    XLS_MAX_ROWS,
+    WorkbookSpec,
+    generate_workbook,
+    get_invalid_row,
+)
+
+# Validators in the order ExcelHandleService builds them
+VALIDATOR_NAMES = ["content_type", "columns", "rows"]
+STAGE_NAMES: dict[type, str] = {
+    LoadStage: "load",
+    TransformStage: "interpolate",
+    PartitionStage: "validate_interpolate",
+    WriteStage: "write",
+    StreamStage: "stream",
+}
+
+
+class StageRecorder:
+    def __init__(self):
+        self.trace_memory = False
+        self.seconds: dict[str, float] = {}
+        self.peak_bytes: dict[str, int] = {}
+
+    def reset(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.seconds = {}
+        self.peak_bytes = {}
+
+    def measure(self, name: str, function: Callable[[], Any]) -> Any:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            return function()
+        finally:
+            self.seconds[name] = time.perf_counter() - started
+            if self.trace_memory:
+                self.peak_bytes[name] = tracemalloc.get_traced_memory()[1]
+
+
+class TimedStage:
+    def __init__(self, stage: ExcelPipelineStage, name: str, recorder: StageRecorder):
+        self.stage = stage
+        self.name = name
+        self._recorder = recorder
+
+    def run(self, context: ExcelProcessingContext) -> LogMinor | None:
+        return self._recorder.measure(
+            name=self.name, function=lambda: self.stage.run(context=context)
+        )
+
+
+class TimedExcelHandleService(ExcelHandleService):
+    # Wraps every stage the service builds, its methods run unchanged
+    def __init__(self, recorder: StageRecorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def get_validation_stages(self) -> list[ExcelPipelineStage]:
+        return self._wrap(stages=super().get_validation_stages())
+
+    def get_pipeline(self) -> ExcelPipeline:
+        return self._wrap_pipeline(pipeline=super().get_pipeline())
+
+    def get_streaming_pipeline(self) -> ExcelPipeline:
+        return self._wrap_pipeline(pipeline=super().get_streaming_pipeline())
+
+    def _wrap_pipeline(self, pipeline: ExcelPipeline) -> ExcelPipeline:
+        log_stage = pipeline.log_stage
+        if log_stage is not None:
+            log_stage = self._wrap_log_stage(log_stage=log_stage)
+        return ExcelPipeline(
+            stages=self._wrap(stages=pipeline.stages), log_stage=log_stage
+        )
+
+    def _wrap_log_stage(self, log_stage: LogStage) -> LogStage:
+        return LogStage(
+            log_writer=lambda context, log: self.recorder.measure(
+                name="log", function=lambda: log_stage.run(context=context, log=log)
+            )
+        )
+
+    def _wrap(self, stages: list[ExcelPipelineStage]) -> list[ExcelPipelineStage]:
+        # Stages wrapped by get_validation_stages are kept, but still counted
+        wrapped: list[ExcelPipelineStage] = []
+        validators = 0
+        for stage in stages:
+            inner = stage.stage if isinstance(stage, TimedStage) else stage
+            if isinstance(inner, ValidatorStage):
+                name = VALIDATOR_NAMES[min(validators, len(VALIDATOR_NAMES) - 1)]
+                validators += 1
+            else:
+                name = STAGE_NAMES.get(type(inner), type(inner).__name__)
+            if not isinstance(stage, TimedStage):
+                stage = TimedStage(stage=stage, name=name, recorder=self.recorder)
+            wrapped.append(stage)
+        return wrapped
+
+
+def get_config(args: argparse.Namespace, folder_path: str) -> ExcelConfig:
+    return ExcelConfig(
+        folder_path=folder_path,
+        staging_path=os.path.join(folder_path, "staging"),
+        mime_xlsx=FORMATS["xlsx"],
+        mime_xls=FORMATS["xls"],
+        column_date="Date",
+        column_sales="Sales",
+        reader_engine=args.reader_engine,
+        writer_engine=args.writer_engine,
+        parallel_enabled=args.parallel,
+        result_cache_enabled=False,
+    )
+
+
+def get_scenario_key(spec: WorkbookSpec, invalid_position: str) -> str:
+    key = f"{spec.file_format}-rows{spec.rows}-gaps{spec.gap_density:g}"
+    if spec.invalid_rows:
+        return f"{key}-invalid-{spec.invalid_column}-{invalid_position}"
+    return f"{key}-valid"
+
+
+def run_operation(
+    service: TimedExcelHandleService,
+    operation: Callable[[], LogMinor | None],
+    repeat: int,
+    trace_memory: bool,
+) -> dict[str, Any]:
+    recorder = service.recorder
+    totals = []
+    stages: dict[str, list[float]] = {}
+    log = None
+    for _ in range(repeat):
+        recorder.reset()
+        started = time.perf_counter()
+        log = operation()
+        totals.append(time.perf_counter() - started)
+        for name, seconds in recorder.seconds.items():
+            stages.setdefault(name, []).append(seconds)
+
+    result: dict[str, Any] = {
+        "status": log.status if log is not None else "VALID",
+        "error_type": log.error_type if log is not None else None,
+        "seconds": statistics.median(totals),
+        "stages": {name: statistics.median(values) for name, values in stages.items()},
+    }
+
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            recorder.reset(trace_memory=True)
+            tracemalloc.reset_peak()
+            operation()
+            # Every stage resets the peak, the call's peak is the highest of them
+            result["peak_bytes"] = max(
+                [*recorder.peak_bytes.values(), tracemalloc.get_traced_memory()[1]]
+            )
+            result["stage_peak_bytes"] = dict(recorder.peak_bytes)
+        finally:
+            recorder.reset()
+            tracemalloc.stop()
+    return result
+
+
+def run_scenario(
+    args: argparse.Namespace, spec: WorkbookSpec, folder_path: str
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    content = generate_workbook(spec=spec)
+    generate_seconds = time.perf_counter() - started
+
+    service = TimedExcelHandleService(
+        recorder=StageRecorder(),
+        repo=InMemoryExcelHandleLogRepo(),
+        config=get_config(args=args, folder_path=folder_path),
+    )
+
+    def process_file() -> LogMinor:
+        task_id = str(uuid4())
+        try:
+            return service.process_file(
+                task_id=task_id,
+                filename=spec.filename,
+                content_type=spec.content_type,
+                file=io.BytesIO(content),
+            )
+        finally:
+            # Each run starts from an empty folder
+            for name in os.listdir(folder_path):
+                if name.startswith(task_id):
+                    os.remove(os.path.join(folder_path, name))
+
+    def validate_and_get_log() -> LogMinor | None:
+        return service.validate_and_get_log(
+            content_type=spec.content_type, file=io.BytesIO(content)
+        )
+
+    return {
+        "format": spec.file_format,
+        "rows": spec.rows,
+        "gap_density": spec.gap_density,
+        "invalid_rows": list(spec.invalid_rows),
+        "invalid_column": spec.invalid_column,
+        "file_bytes": len(content),
+        "generate_seconds": generate_seconds,
+        "process_file": run_operation(
+            service=service,
+            operation=process_file,
+            repeat=args.repeat,
+            trace_memory=not args.no_memory,
+        ),
+        "validate_and_get_log": run_operation(
+            service=service,
+            operation=validate_and_get_log,
+            repeat=args.repeat,
+            trace_memory=not args.no_memory,
+        ),
+    }
+
+
+def get_specs(args: argparse.Namespace) -> list[tuple[WorkbookSpec, str]]:
+    specs = []
+    for file_format in args.format:
+        for rows in args.rows:
+            if file_format == "xls" and rows > XLS_MAX_ROWS:
+                print(f"skipped xls rows={rows}: above {XLS_MAX_ROWS} rows")
+                continue
+            for gap_density in args.gap_density:
+                for position in args.invalid_row:
+                    invalid_rows = (
+                        ()
+                        if position == "none"
+                        else (get_invalid_row(position=position, rows=rows),)
+                    )
+                    spec = WorkbookSpec(
+                        rows=rows,
+                        gap_density=gap_density,
+                        invalid_rows=invalid_rows,
+                        invalid_column=args.invalid_column,
+                        file_format=file_format,
+                        seed=args.seed,
+                    )
+                    specs.append((spec, position))
+    return specs
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    min_seconds: float,
+    min_bytes: int,
+) -> list[str]:
+    # Only scenarios present in both runs are compared
+    regressions = []
+
+    def check(name: str, current: float | None, base: float | None, floor: float):
+        if current is None or base is None:
+            return
+        if current > base * (1 + threshold) and current - base > floor:
+            regressions.append(
+                f"{name}: {base:.6g} -> {current:.6g} (+{(current / base - 1) * 100:.1f}%)"
+                if base
+                else f"{name}: {base:.6g} -> {current:.6g}"
+            )
+
+    for key, scenario in results["scenarios"].items():
+        base_scenario = baseline.get("scenarios", {}).get(key)
+        if base_scenario is None:
+            continue
+        for operation in ("process_file", "validate_and_get_log"):
+            current, base = scenario[operation], base_scenario.get(operation, {})
+            prefix = f"{key} {operation}"
+            check(
+                f"{prefix} seconds",
+                current["seconds"],
+                base.get("seconds"),
+                min_seconds,
+            )
+            for stage, seconds in current["stages"].items():
+                check(
+                    f"{prefix} {stage} seconds",
+                    seconds,
+                    base.get("stages", {}).get(stage),
+                    min_seconds,
+                )
+            check(
+                f"{prefix} peak_bytes",
+                current.get("peak_bytes"),
+                base.get("peak_bytes"),
+                min_bytes,
+            )
+    return regressions
+
+
+def report(key: str, scenario: dict[str, Any]) -> None:
+    for operation in ("process_file", "validate_and_get_log"):
+        result = scenario[operation]
+        peak = result.get("peak_bytes")
+        peak_text = f"peak={peak / 2**20:8.1f}MiB" if peak is not None else ""
+        stages = " ".join(
+            f"{name}={seconds:.4f}s" for name, seconds in result["stages"].items()
+        )
+        print(
+            f"{key:<38} {operation:<21} {result['status']:<8} "
+            f"{result['seconds']:8.4f}s {peak_text}"
+        )
+        print(f"{'':<38} {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--gap-density", type=float, nargs="+", default=[0.1])
+    parser.add_argument(
+        "--invalid-row",
+        nargs="+",
+        default=["none", "last"],
+        help="none, first, middle, last or a 0-based row",
+    )
+    parser.add_argument("--invalid-column", choices=["sales", "date"], default="sales")
+    parser.add_argument(
+        "--format", nargs="+", choices=sorted(FORMATS), default=["xlsx", "xls"]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument(
+        "--reader-engine",
+        type=ExcelReaderEngine,
+        choices=list(ExcelReaderEngine),
+        default=ExcelReaderEngine.OPENPYXL,
+    )
+    parser.add_argument(
+        "--writer-engine",
+        type=ExcelWriterEngine,
+        choices=list(ExcelWriterEngine),
+        default=ExcelWriterEngine.OPENPYXL,
+    )
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--output", help="JSON file the results are written to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--min-seconds", type=float, default=0.01)
+    parser.add_argument("--min-bytes", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {
+        "created": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "reader_engine": args.reader_engine.value,
+            "writer_engine": args.writer_engine.value,
+            "parallel": args.parallel,
+        },
+        "repeat": args.repeat,
+        "scenarios": {},
+        # Scenarios that could not run, an optional dependency is missing
+        "skipped": {},
+    }
+
+    with tempfile.TemporaryDirectory() as folder_path:
+        for spec, position in get_specs(args=args):
+            key = get_scenario_key(spec=spec, invalid_position=position)
+            try:
+                scenario = run_scenario(args=args, spec=spec, folder_path=folder_path)
+            except ImportError as error:
+                print(f"{key:<38} skipped: {error}")
+                results["skipped"][key] = str(error)
+                continue
+            results["scenarios"][key] = scenario
+            report(key=key, scenario=scenario)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(
+            results=results,
+            baseline=baseline,
+            threshold=args.threshold,
+            min_seconds=args.min_seconds,
+            min_bytes=args.min_bytes,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        # A skipped scenario was not compared, it must not pass as unchanged
+        for key, reason in results["skipped"].items():
+            print(f"MISSING {key}: skipped, {reason}")
+        if regressions or results["skipped"]:
+            sys.exit(1)
+        print(f"No regression above {args.threshold * 100:g}% of the baseline")
+
+
+if __name__ == "__main__":
+    main()
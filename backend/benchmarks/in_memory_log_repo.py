@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.models.excel_handle_logs import ExcelHandleLog
+from app.repositories.excel_handle_logs_repo import ExcelHandleLogRepo
+
+
+class InMemoryExcelHandleLogRepo(ExcelHandleLogRepo):
+    """
+    ExcelHandleLogRepo keeping the logs in a dict, so the benchmarks run
+    offline and time the processing without a Postgres round trip.
+    """
+
+    def __init__(self):
+        # Unbound, the session is never used
+        super().__init__(session=Session())
+        # Keyed by the model uuid, typed as its Column
+        self.logs: dict[Any, ExcelHandleLog] = {}
+
+    def get(self, uuid: UUID) -> ExcelHandleLog | None:
+        return self.logs.get(uuid)
+
+    def get_all(self, order_by="created_date", desc=True) -> list[ExcelHandleLog]:
+        return sorted(
+            self.logs.values(),
+            key=lambda model: getattr(model, order_by),
+            reverse=desc,
+        )
+
+    def create(self, model: ExcelHandleLog, refresh: bool = True) -> ExcelHandleLog:
+        self.logs[model.uuid] = model
+        return model
+
+    def update(self, model: ExcelHandleLog) -> ExcelHandleLog:
+        self.logs[model.uuid] = model
+        return model
+
+    def delete(self, model: ExcelHandleLog | None, commit: bool = True) -> None:
+        if model is not None:
+            self.logs.pop(model.uuid, None)
+
+    def commit(self) -> None:
+        pass
+
+    def delete_created_before(self, created_before: datetime, limit: int) -> list:
+        models = sorted(
+            (
+                model
+                for model in self.logs.values()
+                if model.created_date < created_before
+            ),
+            key=lambda model: model.created_date,
+        )[:limit]
+        for model in models:
+            del self.logs[model.uuid]
+        return [model.cache_key for model in models]
@@ -0,0 +1,171 @@
+"""
+Benchmark: import time of the API process, from `python -X importtime`.
+
+Each run imports the module in a fresh interpreter, so nothing is cached in
+sys.modules, and the median cumulative import time is kept. The self time of
+every imported module is summed per top-level package to show where the
+time goes. Importing the app creates no engine and connects to nothing,
+only the configuration is read from the environment.
+
+The run fails (exit status 1) when the median exceeds `--budget` seconds or
+when any `--forbid` module was imported: the API publishes tasks by name and
+never needs pandas, openpyxl or the worker code. Run from the backend
+directory:
+
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --budget 0.8 --output startup.json
+    python -m benchmarks.startup_benchmark --module app.tasks.celery_app \
+        --budget 3 --forbid
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+
+# import time: <self us> | <cumulative us> | <indent><module>
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+DEFAULT_FORBIDDEN = [
+    "pandas",
+    "numpy",
+    "openpyxl",
+    "pyarrow",
+    "app.tasks.celery_app",
+    "app.services.excel_handle_service",
+    "app.tasks.excel_processing",
+]
+
+
+def run_importtime(module: str) -> list[tuple[str, int, int, int]]:
+    # (module, self us, cumulative us, depth) of every module imported
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is not None:
+            self_us, cumulative_us, indent, name = match.groups()
+            depth = (len(indent) - 1) // 2
+            imports.append((name, int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def summarize(module: str, imports: list[tuple[str, int, int, int]]) -> dict:
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        packages[name.split(".")[0]] += self_us
+    cumulative_us = next(
+        cumulative_us
+        for name, _, cumulative_us, depth in imports
+        if name == module and depth == 0
+    )
+    return {
+        "seconds": cumulative_us / 1e6,
+        "modules": {name for name, _, _, _ in imports},
+        "packages": {name: self_us / 1e6 for name, self_us in packages.items()},
+    }
+
+
+def run(module: str, repeat: int) -> dict[str, Any]:
+    runs = [
+        summarize(module=module, imports=run_importtime(module=module))
+        for _ in range(repeat)
+    ]
+    # Timings of the run closest to the median, modules of every run
+    median = statistics.median(run["seconds"] for run in runs)
+    closest = min(runs, key=lambda run: abs(run["seconds"] - median))
+    return {
+        "seconds": median,
+        "runs": [run["seconds"] for run in runs],
+        "packages": dict(
+            sorted(closest["packages"].items(), key=lambda item: -item[1])
+        ),
+        "modules": sorted(set().union(*(run["modules"] for run in runs))),
+    }
+
+
+def check(
+    result: dict[str, Any], budget: float | None, forbidden: list[str]
+) -> list[str]:
+    failures = []
+    if budget is not None and result["seconds"] > budget:
+        failures.append(
+            f"import took {result['seconds']:.3f}s, above the {budget:g}s budget"
+        )
+    imported = set(result["modules"])
+    for module in forbidden:
+        if module in imported:
+            failures.append(f"{module} is imported at startup")
+    return failures
+
+
+def report(module: str, result: dict[str, Any], top: int) -> None:
+    runs = ", ".join(f"{seconds:.3f}" for seconds in result["runs"])
+    print(f"{module}: {result['seconds']:.3f}s median ({runs})")
+    print(f"{len(result['modules'])} modules, self time by package:")
+    for package, seconds in list(result["packages"].items())[:top]:
+        print(f"  {package:<32} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.api.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1.0,
+        help="Maximum median import seconds, 0 to disable",
+    )
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=DEFAULT_FORBIDDEN,
+        help="Modules that must not be imported, none when given empty",
+    )
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    result = run(module=args.module, repeat=args.repeat)
+    report(module=args.module, result=result, top=args.top)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "created": datetime.utcnow().isoformat(),
+                    "environment": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                    },
+                    "module": args.module,
+                    "repeat": args.repeat,
+                    "budget": args.budget,
+                    **result,
+                },
+                file,
+                indent=2,
+            )
+
+    failures = check(result=result, budget=args.budget or None, forbidden=args.forbid)
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+    print("Startup within budget, no forbidden module imported")
+
+
+if __name__ == "__main__":
+    main()
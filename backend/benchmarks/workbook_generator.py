@@ -0,0 +1,287 @@
+"""
+Deterministic Date/Sales workbooks for the benchmarks.
+
+The same spec always produces the same bytes, so timings of two runs are
+taken on identical input. .xlsx sheets are written straight as SpreadsheetML
+into a zip with fixed timestamps, fast enough for millions of rows and with
+the <dimension> element the routing and streaming thresholds read. .xls
+sheets need xlwt and hold at most 65535 data rows.
+
+Write a workbook from the backend directory:
+
+    python -m benchmarks.workbook_generator --rows 1000000 --gap-density 0.2 \
+        --invalid-row last --output /tmp/sales.xlsx
+"""
+import argparse
+import io
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_XLS = "application/vnd.ms-excel"
+FORMATS = {"xlsx": MIME_XLSX, "xls": MIME_XLS}
+XLS_MAX_ROWS = 65535
+
+# Excel serial of 2000-01-01. Dates repeat every 100 years so any row count
+# stays within the datetime64[ns] range pandas reads them into
+FIRST_DATE_SERIAL = 36526
+DATE_PERIOD_DAYS = 36524
+# Not among the strings pandas reads as NaN, such as "n/a"
+INVALID_SALES = "invalid"
+INVALID_DATE = "not a date"
+
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_CHUNK_ROWS = 100_000
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    "</Relationships>"
+)
+# Style 1 is the built-in short date format, so readers return datetimes
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    "</borders>"
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    "</cellStyleXfs>"
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" '
+    'applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles>"
+    "</styleSheet>"
+)
+
+
+@dataclass(frozen=True)
+class WorkbookSpec:
+    rows: int
+    # Share of Sales cells left empty, to be interpolated
+    gap_density: float = 0.1
+    # 0-based data rows holding an invalid value, reported as row index + 1
+    invalid_rows: tuple[int, ...] = ()
+    invalid_column: str = "sales"
+    file_format: str = "xlsx"
+    seed: int = 42
+    column_date: str = "Date"
+    column_sales: str = "Sales"
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.file_format]
+
+    @property
+    def filename(self) -> str:
+        return f"sales_{self.rows}.{self.file_format}"
+
+
+def get_invalid_row(position: str, rows: int) -> int:
+    # "first", "middle", "last" or a 0-based row number
+    positions = {"first": 0, "middle": rows // 2, "last": rows - 1}
+    if position in positions:
+        return positions[position]
+    return int(position)
+
+
+def generate_values(spec: WorkbookSpec) -> tuple[np.ndarray, np.ndarray]:
+    # Excel date serials and sales, NaN where the cell is left empty
+    rng = np.random.default_rng(seed=spec.seed)
+    dates = FIRST_DATE_SERIAL + np.arange(spec.rows, dtype=np.int64) % DATE_PERIOD_DAYS
+    sales = rng.uniform(100, 1000, size=spec.rows).round(2)
+    sales[rng.random(spec.rows) < spec.gap_density] = np.nan
+    return dates, sales
+
+
+def write_workbook(spec: WorkbookSpec, file: BinaryIO) -> None:
+    if spec.invalid_column not in ("sales", "date"):
+        raise ValueError(f"Unknown invalid column: {spec.invalid_column}")
+    if any(not 0 <= row < spec.rows for row in spec.invalid_rows):
+        raise ValueError(f"Invalid rows must be within 0..{spec.rows - 1}")
+
+    if spec.file_format == "xlsx":
+        _write_xlsx(spec=spec, file=file)
+    elif spec.file_format == "xls":
+        _write_xls(spec=spec, file=file)
+    else:
+        raise ValueError(f"Unknown workbook format: {spec.file_format}")
+
+
+def generate_workbook(spec: WorkbookSpec) -> bytes:
+    buffer = io.BytesIO()
+    write_workbook(spec=spec, file=buffer)
+    return buffer.getvalue()
+
+
+def _write_xlsx(spec: WorkbookSpec, file: BinaryIO) -> None:
+    dates, sales = generate_values(spec=spec)
+    invalid_rows = set(spec.invalid_rows)
+
+    with zipfile.ZipFile(file, "w") as archive:
+        for name, content in (
+            ("[Content_Types].xml", _CONTENT_TYPES),
+            ("_rels/.rels", _ROOT_RELS),
+            ("xl/workbook.xml", _WORKBOOK),
+            ("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS),
+            ("xl/styles.xml", _STYLES),
+        ):
+            archive.writestr(_get_zip_info(name=name), content)
+
+        with archive.open(_get_zip_info(name="xl/worksheets/sheet1.xml"), "w") as sheet:
+            sheet.write(
+                (
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/'
+                    'spreadsheetml/2006/main">'
+                    f'<dimension ref="A1:B{spec.rows + 1}"/><sheetData>'
+                    '<row r="1">'
+                    f'<c r="A1" t="inlineStr"><is><t>{spec.column_date}</t></is></c>'
+                    f'<c r="B1" t="inlineStr"><is><t>{spec.column_sales}</t></is></c>'
+                    "</row>"
+                ).encode()
+            )
+            for start in range(0, spec.rows, _CHUNK_ROWS):
+                stop = min(start + _CHUNK_ROWS, spec.rows)
+                sheet.write(
+                    "".join(
+                        _get_xlsx_row(
+                            index=index,
+                            date=int(dates[index]),
+                            sales=float(sales[index]),
+                            invalid=spec.invalid_column
+                            if index in invalid_rows
+                            else "",
+                        )
+                        for index in range(start, stop)
+                    ).encode()
+                )
+            sheet.write(b"</sheetData></worksheet>")
+
+
+def _get_xlsx_row(index: int, date: int, sales: float, invalid: str) -> str:
+    row = index + 2
+    if invalid == "date":
+        date_cell = f'<c r="A{row}" t="inlineStr"><is><t>{INVALID_DATE}</t></is></c>'
+    else:
+        date_cell = f'<c r="A{row}" s="1"><v>{date}</v></c>'
+
+    if invalid == "sales":
+        sales_cell = f'<c r="B{row}" t="inlineStr"><is><t>{INVALID_SALES}</t></is></c>'
+    elif sales != sales:
+        # Empty cells are left out, as Excel saves them
+        sales_cell = ""
+    else:
+        sales_cell = f'<c r="B{row}"><v>{sales:.2f}</v></c>'
+    return f'<row r="{row}">{date_cell}{sales_cell}</row>'
+
+
+def _get_zip_info(name: str) -> zipfile.ZipInfo:
+    # Fixed timestamps keep the archive bytes identical between runs
+    info = zipfile.ZipInfo(filename=name, date_time=_ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _write_xls(spec: WorkbookSpec, file: BinaryIO) -> None:
+    import xlwt  # type: ignore
+
+    if spec.rows > XLS_MAX_ROWS:
+        raise ValueError(f".xls sheets hold at most {XLS_MAX_ROWS} data rows")
+
+    dates, sales = generate_values(spec=spec)
+    invalid_rows = set(spec.invalid_rows)
+    date_style = xlwt.easyxf(num_format_str="YYYY-MM-DD")
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet("Sheet1")
+    sheet.write(0, 0, spec.column_date)
+    sheet.write(0, 1, spec.column_sales)
+    for index in range(spec.rows):
+        invalid = spec.invalid_column if index in invalid_rows else ""
+        if invalid == "date":
+            sheet.write(index + 1, 0, INVALID_DATE)
+        else:
+            sheet.write(index + 1, 0, int(dates[index]), date_style)
+
+        if invalid == "sales":
+            sheet.write(index + 1, 1, INVALID_SALES)
+        elif not np.isnan(sales[index]):
+            sheet.write(index + 1, 1, float(sales[index]))
+    workbook.save(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--gap-density", type=float, default=0.1)
+    parser.add_argument(
+        "--invalid-row",
+        action="append",
+        default=[],
+        help="first, middle, last or a 0-based row, may be repeated",
+    )
+    parser.add_argument("--invalid-column", choices=["sales", "date"], default="sales")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="xlsx")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    spec = WorkbookSpec(
+        rows=args.rows,
+        gap_density=args.gap_density,
+        invalid_rows=tuple(
+            get_invalid_row(position=position, rows=args.rows)
+            for position in args.invalid_row
+        ),
+        invalid_column=args.invalid_column,
+        file_format=args.format,
+        seed=args.seed,
+    )
+    with open(args.output, "wb") as file:
+        write_workbook(spec=spec, file=file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import sys
+
 from app.tasks.celery_app import celery_app
 
 
@@ -5,6 +7,8 @@ def start_celery_worker():
     argv = [
         "worker",
         "--loglevel=info",
+        # Queues, concurrency and prefetch are given per worker by the scripts
+        *sys.argv[1:],
     ]
     celery_app.worker_main(argv)
 
@@ -1,5 +1,14 @@
 #!/bin/bash
 
+# Small uploads, batch archives and the retention janitor
+SMALL_QUEUE="${SMALL_QUEUE:-excel-small}"
+CONCURRENCY="${CONCURRENCY:-4}"
+
+# Prefork children write their metrics here for the exporter of the main
+# process, samples of an earlier run are dropped
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-celery}"
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}" && mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+
 cd backend || exit
 
-python start_celery.py
+python start_celery.py --queues="${SMALL_QUEUE},celery" --concurrency="${CONCURRENCY}"
@@ -0,0 +1,5 @@
+#!/bin/bash
+
+cd backend || exit
+
+celery -A app.tasks.celery_app:celery_app beat --loglevel=info --schedule=/tmp/celerybeat-schedule
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Large uploads, one task at a time and no prefetched backlog. The solo pool
+# lets a task spread a huge sheet over a process pool (EXCEL__PARALLEL_ENABLED)
+LARGE_QUEUE="${LARGE_QUEUE:-excel-large}"
+
+cd backend || exit
+
+python start_celery.py --queues="${LARGE_QUEUE}" --pool=solo --prefetch-multiplier=1